@@ -21,18 +21,20 @@ import xarray as xr
 from types import SimpleNamespace
 from pathlib import Path
 
-from copy import deepcopy
 from abc import ABC, ABCMeta, abstractmethod
 import os
 import re
 
 from shybox.dataset_toolkit.dataset_handler_utils import make_namespaces
+from shybox.dataset_toolkit.dataset_handler_cache import (MemoryCache, materialize_data, get_dataset_cache,
+                                                          is_lazy_data)
 from shybox.logging_toolkit.logging_handler import LoggingManager
 from shybox.default.lib_default_geo import crs_wkt as default_crs_wkt
 
-from shybox.dataset_toolkit.lib_dataset_parse import substitute_string, extract_date_and_tags
+from shybox.dataset_toolkit.lib_dataset_parse import substitute_string, extract_date_and_tags, get_path_template
+from shybox.dataset_toolkit.lib_dataset_plan import normalize_data
 from shybox.dataset_toolkit.lib_dataset_generic import (
-    get_format_from_path, map_dims, map_coords, map_vars, flat_dims,
+    get_format_from_path, map_dims, map_vars, flat_dims,
     straighten_data, straighten_time, straighten_dims, select_by_time, rename_da_by_template, select_da_by_mapping,
     set_type, check_data_format, select_variable)
 from shybox.generic_toolkit.lib_utils_debug import plot_data
@@ -152,6 +154,18 @@ class Dataset(ABC, metaclass=DatasetMeta):
         if 'warnings_on_reading' in kwargs:
             self.warnings_on_reading = kwargs.pop('warnings_on_reading')
 
+        self.memory_copy_on_write = True
+        if 'memory_copy_on_write' in kwargs:
+            self.memory_copy_on_write = kwargs.pop('memory_copy_on_write')
+
+        self.shared_cache = True
+        if 'shared_cache' in kwargs:
+            self.shared_cache = kwargs.pop('shared_cache')
+
+        self.normalize_plan = True
+        if 'normalize_plan' in kwargs:
+            self.normalize_plan = kwargs.pop('normalize_plan')
+
         self.expected_time_steps = (
             self.time_reference, self.time_period, self.time_freq, self.time_direction, self.time_normalize)
 
@@ -162,7 +176,7 @@ class Dataset(ABC, metaclass=DatasetMeta):
         self.file_namespace = make_namespaces(variables=self.file_variable, workflows=self.file_workflow)
 
         self.memory_active = True
-        self.memory_data = None
+        self.memory_cache = MemoryCache(copy_on_write=self.memory_copy_on_write)
 
         # readability fields
         self.readable: bool = False
@@ -386,6 +400,18 @@ class Dataset(ABC, metaclass=DatasetMeta):
             return cls._defaults['type']
     
     ## PROPERTIES
+    @property
+    def memory_data(self):
+        return self.memory_cache.data
+
+    @memory_data.setter
+    def memory_data(self, value):
+        self.memory_cache.put(value)
+
+    @property
+    def memory_stats(self) -> dict:
+        return self.memory_cache.stats()
+
     @property
     def file_format(self):
         return self._format
@@ -489,7 +515,11 @@ class Dataset(ABC, metaclass=DatasetMeta):
         return self.get_available_keys()
     
     def get_available_keys(self, time: (dt.datetime, pd.date_range) = None, **kwargs):
-        
+        return [key for key, _, _ in self.get_available_entries(time, **kwargs)]
+
+    # method to get the available keys with their parsed time and tags
+    def get_available_entries(self, time: (dt.datetime, pd.date_range) = None, **kwargs) -> list:
+
         prefix = self.get_prefix(time, **kwargs)
         if not self._check_data(prefix):
             return []
@@ -497,20 +527,26 @@ class Dataset(ABC, metaclass=DatasetMeta):
             time = xr.date_range(time, time)
 
         loc_pattern = self.get_key(time = None, **kwargs)
-        files = []
-        for file in self._walk(prefix):
-            try:
-                this_time, _ = extract_date_and_tags(file, loc_pattern)
-                if time is None or (time is not None and time.contains(this_time)) or not self.has_time:
-                    files.append(file)
-            except ValueError:
-                pass
-        
-        return files
+        entries = []
+        for key, key_time, key_tags in self._walk_keys(prefix, loc_pattern, time):
+            if time is None or (time is not None and time.contains(key_time)) or not self.has_time:
+                entries.append((key, key_time, key_tags))
+
+        return entries
 
     def _walk(self, prefix: str) -> Generator[str, None, None]:
         raise NotImplementedError
 
+    # method to walk the keys under a prefix with their parsed time and tags (keys not matching are skipped)
+    def _walk_keys(self, prefix: str, loc_pattern: str,
+                   time: (dt.datetime, pd.date_range) = None) -> Generator[tuple, None, None]:
+        for key in self._walk(prefix):
+            try:
+                key_time, key_tags = extract_date_and_tags(key, loc_pattern)
+            except ValueError:
+                continue
+            yield key, key_time, key_tags
+
     @property
     def is_static(self):
         return not '{' in self.loc_pattern and not self.has_time
@@ -525,7 +561,8 @@ class Dataset(ABC, metaclass=DatasetMeta):
         return self.get_available_tags()
 
     def get_prefix(self, time: (dt.datetime, pd.date_range) = None, **kwargs):
-        if not isinstance(time, pd.date_range):
+        # time ranges are defined by start and end (pd.date_range is a function, not a type)
+        if not (hasattr(time, 'start') and hasattr(time, 'end')):
             prefix = self.get_key(time = time, **kwargs)
         else:
             start = time.start
@@ -538,19 +575,24 @@ class Dataset(ABC, metaclass=DatasetMeta):
                     if start.day == end.day:
                         prefix = prefix.replace('%d', f'{start.day:02d}')
 
+        # folder before the first tag or time part (same as removing the last folders until none is left)
         prefix = os.path.dirname(prefix)
-        while '%' in prefix or '{' in prefix:
-            prefix = os.path.dirname(prefix)
-        
+        prefix_cut = min((prefix.find(char) for char in '%{' if char in prefix), default=None)
+        if prefix_cut is not None:
+            prefix = os.path.dirname(prefix[:prefix_cut])
+
         return prefix
 
     def get_available_tags(self, time: (dt.datetime, pd.date_range) = None, **kwargs):
-        all_keys = self.get_available_keys(time, **kwargs)
+        all_entries = self.get_available_entries(time, **kwargs)
+        # the keys are parsed again only if the tags are substituted in the key pattern
+        reparse = self.get_key(time = None, **kwargs) != self.loc_pattern
         all_tags = {}
         all_dates = set()
-        for key in all_keys:
-            this_date, this_tags = extract_date_and_tags(key, self.loc_pattern)
-            
+        for key, this_date, this_tags in all_entries:
+            if reparse:
+                this_date, this_tags = extract_date_and_tags(key, self.loc_pattern)
+
             for tag in this_tags:
                 if tag not in all_tags:
                     all_tags[tag] = set()
@@ -631,13 +673,32 @@ class Dataset(ABC, metaclass=DatasetMeta):
             else:
                 length = None
             self.previous_requested_time = time
-        elif isinstance(timestep, list):
+        elif isinstance(timestep, (list, pd.DatetimeIndex)):
+
+            if len(timestep) == 0:
+                self.logger.error('Time period is defined by an empty list of time steps')
+                raise ValueError('Time period is defined by an empty list of time steps')
 
             time_signature = self.time_signature
-            if time_signature == 'start':
-                time = timestep[0]
-            elif time_signature == 'end':
+            if time_signature == 'end':
                 time = timestep[-1]
+            elif time_signature in ['start', 'period', 'unique', 'constant', None]:
+                # the file covers the whole period (or it is not time dependent), so use the period start
+                time = timestep[0]
+            elif time_signature in ['step', 'current']:
+                # one file per step: the period is valid only if all the steps share the same file
+                key_without_tags = get_path_template(self.loc_pattern).literal
+                if len({pd.Timestamp(step).strftime(key_without_tags) for step in timestep}) > 1:
+                    self.logger.error(
+                        f'Time signature "{time_signature}" defines a file for each step; '
+                        f'the period from {timestep[0]} to {timestep[-1]} is stored in more than one file')
+                    raise ValueError(
+                        f'Time signature "{time_signature}" defines a file for each step; '
+                        f'the period from {timestep[0]} to {timestep[-1]} is stored in more than one file')
+                time = timestep[0]
+            else:
+                self.logger.error(f'Time signature "{time_signature}" is not supported for a period')
+                raise ValueError(f'Time signature "{time_signature}" is not supported for a period')
             length = 1
             self.previous_requested_time = time
 
@@ -650,10 +711,13 @@ class Dataset(ABC, metaclass=DatasetMeta):
                 time = timestep.end
             elif time_signature == 'end+1':
                 time = (timestep+1).start
+            else:
+                self.logger.error(f'Time signature "{time_signature}" is not supported for a time range')
+                raise ValueError(f'Time signature "{time_signature}" is not supported for a time range')
             length = timestep.get_length()
             self.previous_requested_time = time
 
-        key_without_tags = re.sub(r'\{[^}]*\}', '', self.loc_pattern)
+        key_without_tags = get_path_template(self.loc_pattern).literal
         hasyear = '%Y' in key_without_tags
 
         # change the date to 28th of February if it is the 29th of February,
@@ -710,6 +774,8 @@ class Dataset(ABC, metaclass=DatasetMeta):
         # check memory active (if defined true or false)
         if 'memory_active' in kwargs:
             self.memory_active = kwargs.pop('memory_active')
+        # check memory writeable (if true a private copy of the cached data is returned)
+        memory_writeable = kwargs.pop('memory_writeable', False)
 
         # check memory if active
         if self.memory_active:
@@ -720,8 +786,8 @@ class Dataset(ABC, metaclass=DatasetMeta):
                 # info log start (memory case)
                 log_data('start', name=name, time=time, from_memory=True)
 
-                # get data from memory
-                data = deepcopy(self.memory_data)
+                # get data from memory (read-only view or private copy)
+                data = self.memory_cache.get(writeable=memory_writeable)
 
                 # get variables
                 variable = select_variable(data, **self.variable_template)
@@ -750,6 +816,9 @@ class Dataset(ABC, metaclass=DatasetMeta):
 
                 # select by time
                 data = select_by_time(data, when=time, tolerance='1H')
+                # load the selected time step(s) of the lazy data
+                if is_lazy_data(data):
+                    data = data.load()
 
                 # check data after selecting by time
                 if data is None:
@@ -821,59 +890,54 @@ class Dataset(ABC, metaclass=DatasetMeta):
         # check if data is available
         if self.check_data(time, **kwargs):
 
-            # get data
-            data = self._read_data(full_location, **self.variable_template)
+            # get data from the shared (process-wide) cache
+            cache_key = self.get_cache_key(full_location) if (self.shared_cache and not as_is) else None
+            data = get_dataset_cache().get(cache_key)
 
-            # return data as is (if specified)
-            if as_is:
-                return data
-
-            # ensure that the data dimensions are not empty
-            data = straighten_dims(data)
-            data = self._check_step(data, "straighten_dims")
-            if data is None: return None
+            if data is None:
 
-            # map the data dimensions
-            data = map_dims(data, **self.variable_template)
-            data = self._check_step(data, "map_dims")
-            if data is None: return None
+                # get data
+                data = self._read_data(full_location, **self.variable_template)
 
-            # map the data coords
-            data = map_coords(data, **self.variable_template)
-            data = self._check_step(data, "map_coords")
-            if data is None: return None
+                # return data as is (if specified)
+                if as_is:
+                    return data
 
-            # map the data variables
-            data = map_vars(data, **self.variable_template)
-            data = self._check_step(data, "map_vars")
-            if data is None: return None
+                # ensure that the data dimensions are not empty
+                data = straighten_dims(data)
+                data = self._check_step(data, "straighten_dims")
+                if data is None: return None
 
-            # ensure that the data has descending latitudes
-            data = straighten_data(data)
-            data = self._check_step(data, "straighten_data")
-            if data is None: return None
+                # map the data dimensions, coords and variables, ensure that the data has descending latitudes
+                # and flat dimensions (single step with the plan cached for the variable template)
+                data, data_step = normalize_data(data, self.variable_template, use_plan=self.normalize_plan)
+                data = self._check_step(data, data_step)
+                if data is None: return None
 
-            # debug data
-            if self.debug_state: plot_data(data)
+                # debug data
+                if self.debug_state: plot_data(data)
 
-            # ensure that the data dimensions are flat
-            data = flat_dims(data)
+                # ensure that the time info is correctly defined (if needed)
+                data = straighten_time(
+                    data, time_file=self.time_reference, time_freq=self.time_freq, time_direction=self.time_direction)
+                data = self._check_step(data, "straighten_time")
+                if data is None: return None
 
-            # ensure that the time info is correctly defined (if needed)
-            data = straighten_time(
-                data, time_file=self.time_reference, time_freq=self.time_freq, time_direction=self.time_direction)
-            data = self._check_step(data, "straighten_time")
-            if data is None: return None
+                # make sure the nodata value is set to np.nan for floats and to the max int for integers
+                data = set_type(data, self.nan_value)
 
-            # make sure the nodata value is set to np.nan for floats and to the max int for integers
-            data = set_type(data, self.nan_value)
+                # store in the shared cache
+                data = get_dataset_cache().put(cache_key, data)
 
             # get variables
             variable = select_variable(data, **self.variable_template)
 
             # store in memory (if active)
             if self.memory_active:
-                self.memory_data = deepcopy(data)
+                data = self.memory_cache.put(data)
+            # get a private copy of the shared data (if requested)
+            if memory_writeable:
+                data = materialize_data(data)
 
         else:
             self.logger.error(f'Could not resolve data from {full_location}.')
@@ -889,11 +953,9 @@ class Dataset(ABC, metaclass=DatasetMeta):
         else:
             # otherwise, update the data in the template
             # (this will make sure there is no errors in the coordinates due to minor rounding)
+            # (data and memory data share the same buffers when the memory is active)
             attrs = data.attrs
-            if self.memory_data is not None:
-                data = self.set_data_to_structure_template(self.memory_data, template_dict)
-            else:
-                data = self.set_data_to_structure_template(data, template_dict)
+            data = self.set_data_to_structure_template(data, structure_template)
             data.attrs.update(attrs)
 
         # set attributes
@@ -901,6 +963,9 @@ class Dataset(ABC, metaclass=DatasetMeta):
 
         # select by time
         data = select_by_time(data, when=time, tolerance='1H')
+        # load the selected time step(s) of the lazy data
+        if is_lazy_data(data):
+            data = data.load()
         # check data after selecting by time
         if data is None:
             self.logger.warning(f'Data is defined by NoneType after selecting by time {time}.')
@@ -930,6 +995,10 @@ class Dataset(ABC, metaclass=DatasetMeta):
 
         return data
 
+    # method to get the key of the shared cache (None disables the shared cache)
+    def get_cache_key(self, location: str):
+        return None
+
     def _check_step(self, data, step_name='n/a'):
         if data is None:
             self.logger.warning(f"Data became None after step: {step_name}")
@@ -1155,8 +1224,7 @@ class Dataset(ABC, metaclass=DatasetMeta):
     def get_key(self, time: Union[pd.Timestamp, dt.datetime] = None, **kwargs):
         
         time = self.get_time_signature(time)
-        raw_key = substitute_string(self.loc_pattern, kwargs)
-        key = time.strftime(raw_key) if time is not None else raw_key
+        key = get_path_template(self.loc_pattern).get_key(time, kwargs)
         return key
 
     # methods to organize the structure template
@@ -1295,7 +1363,8 @@ class Dataset(ABC, metaclass=DatasetMeta):
             return data
 
         if isinstance(data, xr.DataArray):
-            data = Dataset.build_structure_template_array(template_dict, data.values)
+            # underlying array (numpy or dask, lazy data are not loaded)
+            data = Dataset.build_structure_template_array(template_dict, data.data)
         elif isinstance(data, np.ndarray):
             data = Dataset.build_structure_template_array(template_dict, data)
         elif isinstance(data, xr.Dataset):
@@ -0,0 +1,430 @@
+"""
+Class Features
+
+Name:          dataset_handler_cache
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from collections import OrderedDict
+
+from shybox.default.lib_default_generic import cache_max_bytes
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (time indexes, by pandas index object of the time coordinate)
+# (reentrant lock: the weakref callbacks dropping the entries may run in a garbage collection of a locked block)
+_TIME_INDEX_CACHE = {}
+_TIME_INDEX_LOCK = threading.RLock()
+_TIME_INDEX_MAX = 256
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the in-memory copy-on-write cache of a dataset
+class MemoryCache:
+    """
+    Copy-on-write cache for the decoded data of a dataset.
+
+    The data are stored once with read-only numpy buffers; every read returns a shallow xarray object that
+    shares the cached buffers (no copy). A copy is materialized only when it is explicitly requested
+    (writeable=True) or when a process tries to modify the shared buffers (see materialize_data).
+    """
+
+    def __init__(self, copy_on_write: bool = True) -> None:
+
+        self.copy_on_write = copy_on_write
+
+        self._data = None
+        self._nbytes = 0
+
+        self.n_views = 0
+        self.n_copies = 0
+        self.bytes_saved = 0
+
+    def __repr__(self):
+        return (f'MemoryCache(stored={self._data is not None}, views={self.n_views}, '
+                f'copies={self.n_copies}, bytes_saved={self.bytes_saved})')
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def is_empty(self) -> bool:
+        return self._data is None
+
+    # method to store data in the cache
+    def put(self, data: (xr.DataArray, xr.Dataset)) -> (xr.DataArray, xr.Dataset):
+
+        if data is None:
+            self.clear()
+            return None
+
+        if self.copy_on_write:
+            self._data = freeze_data(data)
+            get_time_index(self._data)
+            self._nbytes = get_data_nbytes(self._data)
+            # the stored object shares the buffers of the decoded data (no copy)
+            self.bytes_saved += self._nbytes
+        else:
+            self._data = data.copy(deep=True)
+            self._nbytes = get_data_nbytes(self._data)
+
+        return self._data
+
+    # method to get data from the cache
+    def get(self, writeable: bool = False) -> (xr.DataArray, xr.Dataset, None):
+
+        if self._data is None:
+            return None
+
+        if writeable or not self.copy_on_write:
+            self.n_copies += 1
+            return self._data.copy(deep=True)
+
+        # shallow copy: new attrs/coords containers, shared (read-only) data buffers
+        self.n_views += 1
+        self.bytes_saved += self._nbytes
+
+        return self._data.copy(deep=False)
+
+    # method to clear the cache
+    def clear(self) -> None:
+        self._data = None
+        self._nbytes = 0
+
+    # method to summarize the cache usage
+    def stats(self) -> dict:
+        return {'nbytes': self._nbytes, 'views': self.n_views,
+                'copies': self.n_copies, 'bytes_saved': self.bytes_saved}
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the process-wide dataset cache (shared by all the dataset instances)
+class DatasetCache:
+    """
+    Bounded LRU cache for decoded datasets, shared across the dataset instances of the process.
+
+    Entries are keyed by the resolved path, the file modification time and the variable template, so
+    different datasets (e.g. raw and derived handlers or copies created by update) reuse the same decoded
+    source. The stored data are frozen (read-only buffers); the least recently used entries are evicted
+    when the byte budget is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = cache_max_bytes) -> None:
+
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return (f'DatasetCache(entries={len(self._entries)}, nbytes={self.nbytes}, max_bytes={self.max_bytes}, '
+                f'hits={self.hits}, misses={self.misses}, evictions={self.evictions})')
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    # method to get data from the cache
+    def get(self, key) -> (xr.DataArray, xr.Dataset, None):
+
+        if key is None:
+            return None
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            data, _ = self._entries[key]
+
+        return data.copy(deep=False)
+
+    # method to put data in the cache
+    def put(self, key, data: (xr.DataArray, xr.Dataset)) -> (xr.DataArray, xr.Dataset):
+
+        if key is None or data is None:
+            return data
+
+        data = freeze_data(data)
+        data_nbytes = get_data_nbytes(data)
+        # the views of the cached data share the time coordinate (and its prebuilt time index)
+        get_time_index(data)
+
+        # skip objects larger than the whole budget
+        if self.max_bytes is not None and data_nbytes > self.max_bytes:
+            return data
+
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (data, data_nbytes)
+            self.nbytes += data_nbytes
+            self._evict()
+
+        return data
+
+    # method to evict the least recently used entries
+    def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, data_nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= data_nbytes
+            self.evictions += 1
+
+    # method to resize the byte budget
+    def resize(self, max_bytes: (int, None)) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    # method to clear the cache
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    # method to summarize the cache usage
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'nbytes': self.nbytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+# process-wide dataset cache
+_DATASET_CACHE = DatasetCache()
+
+
+# method to get the process-wide dataset cache
+def get_dataset_cache() -> DatasetCache:
+    return _DATASET_CACHE
+
+
+# method to configure the process-wide dataset cache
+def set_dataset_cache(max_bytes: (int, None) = cache_max_bytes, clear: bool = False) -> DatasetCache:
+    if clear:
+        _DATASET_CACHE.clear()
+    _DATASET_CACHE.resize(max_bytes)
+    return _DATASET_CACHE
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to iterate over the variables of a data object
+def _iter_variables(data: (xr.DataArray, xr.Dataset)):
+    if isinstance(data, xr.DataArray):
+        yield data.variable
+    elif isinstance(data, xr.Dataset):
+        for var_name in data.data_vars:
+            yield data[var_name].variable
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to freeze data (load once and mark the numpy buffers as read-only)
+def freeze_data(data: (xr.DataArray, xr.Dataset)) -> (xr.DataArray, xr.Dataset):
+
+    if not isinstance(data, (xr.DataArray, xr.Dataset)):
+        return data
+
+    # load lazy (file-backed) arrays to avoid keeping open references to removed files
+    # (dask-backed data of the lazy reading mode are kept lazy; only the selected time steps are loaded)
+    if not is_lazy_data(data):
+        data = data.load()
+    for var_obj in _iter_variables(data):
+        var_data = var_obj.data
+        if isinstance(var_data, np.ndarray):
+            var_data.flags.writeable = False
+
+    return data
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check if data are dask-backed (lazy reading mode)
+def is_lazy_data(data) -> bool:
+    if isinstance(data, (xr.DataArray, xr.Dataset)):
+        return any(var_obj.chunks is not None for var_obj in _iter_variables(data))
+    return False
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to check if data have read-only (shared) buffers
+def is_frozen_data(data) -> bool:
+
+    if isinstance(data, (xr.DataArray, xr.Dataset)):
+        for var_obj in _iter_variables(data):
+            var_data = var_obj.data
+            if isinstance(var_data, np.ndarray) and not var_data.flags.writeable:
+                return True
+    elif isinstance(data, dict):
+        return any(is_frozen_data(value) for value in data.values())
+    elif isinstance(data, (list, tuple)):
+        return any(is_frozen_data(value) for value in data)
+
+    return False
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to materialize a writeable copy of data (only for the read-only buffers)
+def materialize_data(data):
+
+    if isinstance(data, (xr.DataArray, xr.Dataset)):
+        if is_frozen_data(data):
+            return data.copy(deep=True)
+        return data
+    elif isinstance(data, dict):
+        return {key: materialize_data(value) for key, value in data.items()}
+    elif isinstance(data, (list, tuple)):
+        return type(data)(materialize_data(value) for value in data)
+
+    return data
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the size of the data buffers (in bytes)
+def get_data_nbytes(data: (xr.DataArray, xr.Dataset)) -> int:
+    # dask-backed variables are not held in memory
+    return int(sum(var_obj.nbytes for var_obj in _iter_variables(data) if var_obj.chunks is None))
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the sorted time index of a time coordinate (tolerance-aware selection)
+class TimeIndex:
+    """
+    Sorted int64 (ns) copy of a time coordinate, built once for each coordinate.
+
+    The requested times are located with a binary search (searchsorted) on the sorted values: "pad" selects the
+    previous time within the tolerance, "nearest" the closest one on any side (the previous one on ties).
+    Positions refer to the original order of the coordinate (first occurrence of duplicated times).
+    """
+
+    def __init__(self, times: (pd.DatetimeIndex, np.ndarray)) -> None:
+
+        values = _get_time_ns(times)
+        self.is_sorted = bool(np.all(values[1:] >= values[:-1]))
+
+        self.order = np.arange(values.size) if self.is_sorted else np.argsort(values, kind='stable')
+        self.values = values if self.is_sorted else values[self.order]
+
+        # position of each original step in the sorted values
+        self.rank = self.order
+        if not self.is_sorted:
+            self.rank = np.empty_like(self.order)
+            self.rank[self.order] = np.arange(values.size)
+
+    def __repr__(self):
+        return f'TimeIndex(size={self.size}, sorted={self.is_sorted})'
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def size(self) -> int:
+        return int(self.values.size)
+
+    # method to locate the requested times (positions in the original order, -1 if not found)
+    def locate(self, when: (pd.DatetimeIndex, list), tolerance: pd.Timedelta = pd.Timedelta(0),
+               method: str = 'pad') -> np.ndarray:
+
+        when = _get_time_ns(when)
+        tol = pd.Timedelta(tolerance).value
+        if self.size == 0:
+            return np.full(when.size, -1, dtype=np.int64)
+
+        # previous (or equal) time of each requested time
+        pos = np.searchsorted(self.values, when, side='right') - 1
+        pos_prev = np.clip(pos, 0, self.size - 1)
+        dist = np.where(pos >= 0, when - self.values[pos_prev], np.iinfo(np.int64).max)
+
+        if method == 'nearest':
+            # next time of each requested time (chosen only if strictly closer)
+            pos_next = np.clip(pos + 1, 0, self.size - 1)
+            dist_next = np.where(pos + 1 < self.size, self.values[pos_next] - when, np.iinfo(np.int64).max)
+            use_next = dist_next < dist
+            pos = np.where(use_next, pos_next, pos_prev)
+            dist = np.where(use_next, dist_next, dist)
+        elif method == 'pad':
+            pos = pos_prev
+        else:
+            raise NotImplementedError(f'Time index method "{method}" is not available')
+
+        # first occurrence of the selected time (as the argmin of the time differences)
+        pos = np.searchsorted(self.values, self.values[pos], side='left')
+        return np.where(dist <= tol, self.order[pos], -1)
+
+    # method to locate a single time (position in the original order, None if not found)
+    def locate_one(self, when, tolerance: pd.Timedelta = pd.Timedelta(0), method: str = 'pad') -> (int, None):
+        pos = int(self.locate([pd.Timestamp(when)], tolerance=tolerance, method=method)[0])
+        return pos if pos >= 0 else None
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the times as int64 nanoseconds (same unit for any resolution of the datetime values)
+def _get_time_ns(times) -> np.ndarray:
+    return np.asarray(pd.DatetimeIndex(times), dtype='datetime64[ns]').view(np.int64)
+
+
+# method to get the time index of a data object (built once for each time coordinate, shared by the views)
+def get_time_index(data: (xr.DataArray, xr.Dataset), time_dim: str = 'time') -> (TimeIndex, None):
+
+    if not isinstance(data, (xr.DataArray, xr.Dataset)) or time_dim not in data.indexes:
+        return None
+    time_obj = data.indexes[time_dim]
+    if not isinstance(time_obj, pd.DatetimeIndex):
+        return None
+
+    with _TIME_INDEX_LOCK:
+        time_entry = _TIME_INDEX_CACHE.get(id(time_obj))
+        if time_entry is not None and time_entry[0]() is time_obj:
+            return time_entry[1]
+
+    time_index = TimeIndex(time_obj)
+
+    # entries are dropped with the time coordinate (the shallow copies of the cached data share it)
+    try:
+        time_weak = weakref.ref(time_obj, lambda _, time_id=id(time_obj): _drop_time_index(time_id))
+    except TypeError:
+        return time_index
+    with _TIME_INDEX_LOCK:
+        _TIME_INDEX_CACHE[id(time_obj)] = (time_weak, time_index)
+        # bounded number of entries (the oldest time coordinates are dropped first)
+        while len(_TIME_INDEX_CACHE) > _TIME_INDEX_MAX:
+            _TIME_INDEX_CACHE.pop(next(iter(_TIME_INDEX_CACHE)))
+
+    return time_index
+
+
+# method to drop the time index of a time coordinate
+def _drop_time_index(time_id: int) -> None:
+    with _TIME_INDEX_LOCK:
+        time_entry = _TIME_INDEX_CACHE.get(time_id)
+        if time_entry is not None and time_entry[0]() is None:
+            _TIME_INDEX_CACHE.pop(time_id, None)
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,193 @@
+"""
+Class Features
+
+Name:          dataset_handler_catalog
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251202'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import os
+import json
+import sqlite3
+import threading
+import datetime as dt
+
+from contextlib import contextmanager
+
+from shybox.default.lib_default_generic import catalog_file_name
+from shybox.dataset_toolkit.lib_dataset_parse import extract_date_and_tags
+from shybox.generic_toolkit.lib_utils_tmp import ensure_folder_tmp
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (file catalogs, by database file)
+_CATALOGS = {}
+_CATALOGS_LOCK = threading.Lock()
+
+# time format of the catalog (sortable, used by the range queries)
+_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+_CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    pattern TEXT NOT NULL, path TEXT NOT NULL, folder TEXT NOT NULL,
+    valid INTEGER NOT NULL, time TEXT, tags TEXT,
+    PRIMARY KEY (pattern, path));
+CREATE INDEX IF NOT EXISTS files_time ON files (pattern, valid, time);
+CREATE INDEX IF NOT EXISTS files_folder ON files (pattern, folder);
+CREATE TABLE IF NOT EXISTS folders (
+    pattern TEXT NOT NULL, folder TEXT NOT NULL, mtime_ns INTEGER NOT NULL, subfolders TEXT NOT NULL,
+    PRIMARY KEY (pattern, folder));
+"""
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the persistent catalog of the dataset files (path -> parsed time and tags)
+class FileCatalog:
+    """
+    SQLite catalog of the files matching a location pattern.
+
+    Each file is parsed once (extract_date_and_tags) and stored with its time and tags; the folders are stored
+    with their mtime, so a refresh lists and parses only the folders changed since the last scan (files added,
+    removed or renamed). Queries select the files under a prefix and in a time range through the indexes.
+    """
+
+    def __init__(self, file_name: str = None) -> None:
+
+        if file_name is None:
+            file_name = os.path.join(str(ensure_folder_tmp()), catalog_file_name)
+        folder_name = os.path.dirname(file_name)
+        if folder_name:
+            os.makedirs(folder_name, exist_ok=True)
+        self.file_name = file_name
+
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_CATALOG_SCHEMA)
+
+        self.n_scanned = 0
+        self.n_parsed = 0
+
+    def __repr__(self):
+        return f'FileCatalog(file={self.file_name}, scanned={self.n_scanned}, parsed={self.n_parsed})'
+
+    # method to open a connection to the database (committed and closed at the end of the block)
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.file_name, timeout=60)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # method to update the catalog of the files under a prefix (only the folders changed since the last scan)
+    def refresh(self, prefix: str, pattern: str) -> None:
+
+        with self._lock, self._connect() as conn:
+            folders_stored = {
+                folder: (mtime_ns, json.loads(subfolders)) for folder, mtime_ns, subfolders in conn.execute(
+                    'SELECT folder, mtime_ns, subfolders FROM folders WHERE pattern = ? '
+                    'AND (folder = ? OR (folder >= ? AND folder < ?))', (pattern, prefix) + _get_range(prefix))}
+
+            folders_seen, folders_stack = set(), [prefix]
+            while folders_stack:
+                folder = folders_stack.pop()
+                try:
+                    mtime_ns = os.stat(folder).st_mtime_ns
+                except OSError:
+                    continue
+                folders_seen.add(folder)
+
+                folder_stored = folders_stored.get(folder)
+                if folder_stored is not None and folder_stored[0] == mtime_ns:
+                    folders_stack.extend(folder_stored[1])
+                    continue
+
+                # list and parse the folder (new or changed)
+                files, subfolders = [], []
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            # symbolic links to folders are not followed (as os.walk)
+                            if not entry.is_symlink():
+                                subfolders.append(entry.path)
+                        else:
+                            files.append(entry.path)
+
+                conn.execute('DELETE FROM files WHERE pattern = ? AND folder = ?', (pattern, folder))
+                conn.executemany(
+                    'INSERT OR REPLACE INTO files (pattern, path, folder, valid, time, tags) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    [(pattern, file, folder) + _parse_file(file, pattern) for file in files])
+                conn.execute(
+                    'INSERT OR REPLACE INTO folders (pattern, folder, mtime_ns, subfolders) VALUES (?, ?, ?, ?)',
+                    (pattern, folder, mtime_ns, json.dumps(sorted(subfolders))))
+
+                folders_stack.extend(subfolders)
+                self.n_scanned += 1
+                self.n_parsed += len(files)
+
+            # drop the folders removed since the last scan
+            folders_removed = [(pattern, folder) for folder in folders_stored if folder not in folders_seen]
+            conn.executemany('DELETE FROM files WHERE pattern = ? AND folder = ?', folders_removed)
+            conn.executemany('DELETE FROM folders WHERE pattern = ? AND folder = ?', folders_removed)
+
+    # method to query the files under a prefix (optionally in the [time_start, time_end] range)
+    def query(self, prefix: str, pattern: str,
+              time_start: dt.datetime = None, time_end: dt.datetime = None) -> list:
+
+        query = ('SELECT path, time, tags FROM files WHERE pattern = ? AND valid = 1 '
+                 'AND path >= ? AND path < ?')
+        query_args = [pattern, *_get_range(prefix)]
+        if time_start is not None:
+            query, query_args = query + ' AND time >= ?', query_args + [time_start.strftime(_TIME_FORMAT)]
+        if time_end is not None:
+            query, query_args = query + ' AND time <= ?', query_args + [time_end.strftime(_TIME_FORMAT)]
+
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(query + ' ORDER BY time, path', query_args).fetchall()
+
+        return [(path, dt.datetime.strptime(time, _TIME_FORMAT), json.loads(tags)) for path, time, tags in rows]
+
+    # method to clear the catalog (all the patterns or only one)
+    def clear(self, pattern: str = None) -> None:
+        with self._lock, self._connect() as conn:
+            if pattern is None:
+                conn.execute('DELETE FROM files')
+                conn.execute('DELETE FROM folders')
+            else:
+                conn.execute('DELETE FROM files WHERE pattern = ?', (pattern,))
+                conn.execute('DELETE FROM folders WHERE pattern = ?', (pattern,))
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the range of the paths under a folder (index range of the queries)
+def _get_range(prefix: str) -> tuple:
+    prefix = prefix.rstrip(os.sep) + os.sep
+    return prefix, prefix + '\U0010ffff'
+
+
+# method to parse a file of the catalog (valid flag, time and tags)
+def _parse_file(file: str, pattern: str) -> tuple:
+    try:
+        file_time, file_tags = extract_date_and_tags(file, pattern)
+    except ValueError:
+        return 0, None, None
+    return 1, file_time.strftime(_TIME_FORMAT), json.dumps(file_tags)
+
+
+# method to get the file catalog of a database file (shared by the datasets of the process)
+def get_file_catalog(file_name: str = None) -> FileCatalog:
+    catalog_key = os.path.abspath(file_name) if file_name is not None else None
+    with _CATALOGS_LOCK:
+        if catalog_key not in _CATALOGS:
+            _CATALOGS[catalog_key] = FileCatalog(file_name)
+        return _CATALOGS[catalog_key]
+# ----------------------------------------------------------------------------------------------------------------------
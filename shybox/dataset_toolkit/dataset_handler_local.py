@@ -10,6 +10,8 @@ Version:       '1.0.0'
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
 import os
+import hashlib
+import numpy as np
 import xarray as xr
 import pandas as pd
 
@@ -17,7 +19,9 @@ from types import SimpleNamespace
 from datetime import datetime
 
 from shybox.dataset_toolkit.dataset_handler_base import Dataset
+from shybox.dataset_toolkit.dataset_handler_catalog import get_file_catalog
 from shybox.dataset_toolkit.lib_dataset_generic import write_to_file, read_from_file, rm_file
+from shybox.dataset_toolkit.lib_dataset_parse import make_hashable
 from shybox.generic_toolkit.lib_utils_tmp import ensure_folder_tmp, ensure_file_tmp
 from shybox.logging_toolkit.logging_handler import LoggingManager
 
@@ -84,6 +88,61 @@ class DataLocal(Dataset):
         else:
             self.file_deps = []
 
+        # check folder of the decompressed files cache (None means in-memory decompression)
+        if 'decompress_cache' in kwargs:
+            self.decompress_cache = kwargs.pop('decompress_cache')
+        else:
+            self.decompress_cache = None
+
+        # check the .npy sidecar cache of the ascii grids (static grids as terrain and masks)
+        if 'grid_cache' in kwargs:
+            self.grid_cache = kwargs.pop('grid_cache')
+        else:
+            self.grid_cache = False
+
+        # check the .npz sidecar cache of the hmc time-series (parsed tables)
+        if 'ts_cache' in kwargs:
+            self.ts_cache = kwargs.pop('ts_cache')
+        else:
+            self.ts_cache = False
+
+        # check asynchronous compression of the output files (hmc and s3m writers)
+        if 'file_compression_async' in kwargs:
+            self.file_compression_async = kwargs.pop('file_compression_async')
+        else:
+            self.file_compression_async = False
+
+        # check the geographical reference of the binary grids (grid or ascii grid file)
+        if 'file_geo' in kwargs:
+            self.file_geo = kwargs.pop('file_geo')
+        else:
+            self.file_geo = None
+        self._file_geo_key = None
+
+        # check the time steps read from the binary grids (integer, [start, end) tuple or slice; None for all)
+        if 'file_time_index' in kwargs:
+            self.file_time_index = kwargs.pop('file_time_index')
+        else:
+            self.file_time_index = None
+
+        # check the file catalog of the available files (True for the default database or the database path)
+        if 'file_catalog' in kwargs:
+            self.file_catalog = kwargs.pop('file_catalog')
+        else:
+            self.file_catalog = None
+
+        # check the lazy reading mode (dask chunks of the netcdf/grib files, e.g. {"time": 1} or "auto")
+        if 'chunks' in kwargs:
+            self.chunks = kwargs.pop('chunks')
+        else:
+            self.chunks = None
+
+        # check the netcdf encoding profile of the output files (chunks, compression, shuffle and quantization)
+        if 'nc_encoding' in kwargs:
+            self.nc_encoding = kwargs.pop('nc_encoding')
+        else:
+            self.nc_encoding = None
+
         if 'data_layout' in kwargs:
             self.data_layout = kwargs.pop('data_layout')
         else:
@@ -241,7 +300,9 @@ class DataLocal(Dataset):
 
         data = read_from_file(
             path,
-            file_format=self.file_format, file_type=self.file_type, file_variable=variable)
+            file_format=self.file_format, file_type=self.file_type, file_variable=variable,
+            decompress_cache=self.decompress_cache, grid_cache=self.grid_cache, ts_cache=self.ts_cache,
+            chunks=self.chunks, file_geo=self.file_geo, file_time_index=self.file_time_index)
 
         # message info end
         self.logger.info_down(f"Read data from {path} ... DONE")
@@ -252,11 +313,48 @@ class DataLocal(Dataset):
         write_to_file(
             data,
             path, file_format=self.file_format, file_type=self.file_type, file_mode=self.file_mode,
+            file_compression_async=self.file_compression_async, nc_encoding=self.nc_encoding,
             **kwargs)
 
     def _rm_data(self, path) -> None:
         rm_file(path)
 
+    ## METHODS TO CACHE DATA
+    def get_cache_key(self, path: str):
+        # key of the shared cache (resolved path, file signature and normalization settings)
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        return (os.path.realpath(path), file_stat.st_mtime_ns, file_stat.st_size,
+                self.file_format, self.file_type, make_hashable(self.variable_template),
+                str(self.time_reference), self.time_freq, self.time_direction, self.nan_value,
+                make_hashable(self.chunks), self.get_geo_key(), _get_index_key(self.file_time_index))
+
+    # method to get the identity of the geographical reference (file signature or hash of the grid)
+    def get_geo_key(self) -> (tuple, None):
+
+        file_geo = self.file_geo
+        if file_geo is None:
+            return None
+
+        if isinstance(file_geo, str):
+            try:
+                file_stat = os.stat(file_geo)
+            except OSError:
+                return 'file', os.path.realpath(file_geo), None, None
+            return 'file', os.path.realpath(file_geo), file_stat.st_mtime_ns, file_stat.st_size
+
+        # grid hash (computed once for each grid object)
+        if self._file_geo_key is None or self._file_geo_key[0] is not file_geo:
+            geo_hash = hashlib.sha1()
+            for geo_obj in [file_geo] + [file_geo.coords[coord] for coord in sorted(map(str, file_geo.coords))]:
+                geo_values = np.ascontiguousarray(geo_obj.values)
+                geo_hash.update(str((geo_obj.name, geo_obj.dims, geo_values.shape, geo_values.dtype.str)).encode())
+                geo_hash.update(geo_values.tobytes() if geo_values.dtype.kind != 'O' else str(geo_values).encode())
+            self._file_geo_key = (file_geo, ('grid', geo_hash.hexdigest()))
+        return self._file_geo_key[1]
+
     ## METHODS TO CHECK DATA AVAILABILITY
     def _check_data(self, path) -> bool:
         return os.path.exists(path)
@@ -265,4 +363,31 @@ class DataLocal(Dataset):
         for root, _, filenames in os.walk(prefix):
             for filename in filenames:
                 yield os.path.join(root, filename)
+
+    def _walk_keys(self, prefix, loc_pattern, time=None):
+
+        # walk and parse all the files (catalog not active)
+        if not self.file_catalog:
+            yield from super()._walk_keys(prefix, loc_pattern, time)
+            return
+
+        # update the catalog (only the changed folders) and query the time range by index
+        catalog = get_file_catalog(self.file_catalog if isinstance(self.file_catalog, str) else None)
+        catalog.refresh(prefix, loc_pattern)
+
+        time_start, time_end = None, None
+        if self.has_time and time is not None and hasattr(time, 'start') and hasattr(time, 'end'):
+            time_start, time_end = time.start, time.end
+        yield from catalog.query(prefix, loc_pattern, time_start=time_start, time_end=time_end)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the hashable key of the time steps of the binary grids (slices are not hashable)
+def _get_index_key(time_index):
+    if isinstance(time_index, slice):
+        return 'slice', time_index.start, time_index.stop, time_index.step
+    if isinstance(time_index, list):
+        return tuple(time_index)
+    return time_index
 # ----------------------------------------------------------------------------------------------------------------------
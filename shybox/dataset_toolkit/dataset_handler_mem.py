@@ -13,6 +13,7 @@ class DataMem(Dataset):
         super().__init__(**kwargs)
         self.data_dict = {}
         self.keep_after_reading = keep_after_reading
+        self._keys_index = {}
 
     @property
     def loc_pattern(self):
@@ -47,6 +48,21 @@ class DataMem(Dataset):
         for key in self.data_dict.keys():
             if key.startswith(prefix):
                 yield key
+
+    def _walk_keys(self, prefix, loc_pattern, time=None):
+        # keys parsed once for each pattern (index limited to the keys still in memory)
+        self._keys_index = {
+            index_key: index_value for index_key, index_value in getattr(self, '_keys_index', {}).items()
+            if index_key[1] in self.data_dict}
+        for key in list(self._walk(prefix)):
+            index_key = (loc_pattern, key)
+            if index_key not in self._keys_index:
+                try:
+                    self._keys_index[index_key] = extract_date_and_tags(key, loc_pattern)
+                except ValueError:
+                    self._keys_index[index_key] = None
+            if self._keys_index[index_key] is not None:
+                yield (key,) + self._keys_index[index_key]
     
     def update(self, in_place = False, **kwargs):
         new_self = super().update(in_place = in_place, **kwargs)
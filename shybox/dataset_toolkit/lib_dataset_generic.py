@@ -36,10 +36,14 @@ from decimal import Decimal
 from typing import Optional, Dict
 
 from shybox.io_toolkit.lib_io_ascii_hmc import read_sections_db, read_sections_data, read_sections_registry
-from shybox.io_toolkit.lib_io_gzip import uncompress_and_remove
+from shybox.io_toolkit.lib_io_ascii_grid import read_grid_ascii, get_grid_darray
+from shybox.io_toolkit.lib_io_binary import read_data_binary
+from shybox.io_toolkit.lib_io_gzip import uncompress_and_remove, uncompress_to_cache, open_compressed_dataset
 from shybox.io_toolkit.lib_io_nc_s3m import write_dataset_s3m
 from shybox.io_toolkit.lib_io_nc_hmc import write_dataset_hmc, write_ts_hmc
 from shybox.io_toolkit.lib_io_nc_other import write_dataset_itwater
+from shybox.io_toolkit.lib_io_nc_encoding import get_nc_encoding
+from shybox.dataset_toolkit.dataset_handler_cache import TimeIndex, get_time_index
 from shybox.generic_toolkit.lib_utils_file import has_compression_extension
 from shybox.time_toolkit.lib_utils_time import is_date
 from shybox.logging_toolkit.lib_logging_utils import with_logger
@@ -137,6 +141,9 @@ def get_format_from_path(path: str) -> str:
     elif extension in ['tmp', 'temp']:
         return 'tmp'
 
+    elif extension in ['bin', 'binary']:
+        return 'binary'
+
     raise ValueError(f'File format not supported: {extension}')
 # ----------------------------------------------------------------------------------------------------------------------
 
@@ -144,8 +151,11 @@ def get_format_from_path(path: str) -> str:
 # method to read from file
 def read_from_file(
         path, file_format: Optional[str] = None,
-        file_type: Optional[str] = None, file_variable: (str, list) = 'na') \
-        -> (xr.DataArray, xr.Dataset, pd.DataFrame):
+        file_type: Optional[str] = None, file_variable: (str, list) = 'na',
+        decompress_cache: Optional[str] = None, grid_cache: bool = False, ts_cache: bool = False,
+        chunks: (dict, str, int) = None,
+        file_geo: (xr.DataArray, str) = None,
+        file_time_index: (int, tuple, slice) = None) -> (xr.DataArray, xr.Dataset, pd.DataFrame):
 
     # add suppress warnings
     rxr_logger = logging.getLogger('rioxarray')
@@ -172,31 +182,28 @@ def read_from_file(
     elif file_format in ['txt', 'ascii']:
         if file_type in ['grid', 'grid_2d']:
 
-            # get header
+            # get header and values (parsed once, values cached in a .npy sidecar if grid_cache is active)
+            grid_header, grid_values = read_grid_ascii(path, grid_cache=grid_cache)
+
             geo_attrs = {}
-            with open(path, 'r') as file:
-                # Read the first six lines
-                geo_lines = [next(file) for _ in range(6)]
-
-            # Parse the header lines
-            for line in geo_lines:
-                if line.startswith('xllcorner'):
-                    geo_attrs['xllcorner'] = Decimal(line.split()[1])
-                elif line.startswith('yllcorner'):
-                    geo_attrs['yllcorner'] = Decimal(line.split()[1])
-                elif line.startswith('cellsize'):
-                    geo_attrs['cellsize'] = Decimal(line.split()[1])
-                elif line.startswith('NODATA_value'):
-                    geo_attrs['NODATA_value'] = float(line.split()[1])
-                elif line.startswith('ncols'):
-                    geo_attrs['ncols']  = int(line.split()[1])
-                elif line.startswith('nrows'):
-                    geo_attrs['nrows']  = int(line.split()[1])
+            for key, value in grid_header.items():
+                if key in ['xllcorner', 'yllcorner', 'cellsize']:
+                    geo_attrs[key] = Decimal(value)
+                elif key == 'nodata_value':
+                    geo_attrs['NODATA_value'] = float(value)
+                elif key in ['ncols', 'nrows']:
+                    geo_attrs[key] = int(value)
 
             # get data
-            data = rxr.open_rasterio(path)
+            data = get_grid_darray(grid_header, grid_values)
             generic_attrs = data.attrs
 
+            # get the projection (if available)
+            path_prj = os.path.splitext(path)[0] + '.prj'
+            if os.path.exists(path_prj):
+                with open(path_prj, 'r') as file_prj:
+                    data = data.rio.write_crs(file_prj.read())
+
             # store attributes
             data.attrs = {**generic_attrs, **geo_attrs}
 
@@ -216,8 +223,8 @@ def read_from_file(
 
         elif file_type == 'time_series_hmc':
 
-            # read time series data (hmc format)
-            data = read_sections_data(path=path)
+            # read time series data (hmc format, parsed table cached in a .npz sidecar if ts_cache is active)
+            data = read_sections_data(path=path, cache=ts_cache)
 
         elif file_type == 'points' or file_type == 'points_generic':
 
@@ -288,31 +295,31 @@ def read_from_file(
 
         has_compression = has_compression_extension(path)
 
+        # compressed file are decompressed in memory (or once in the decompressed cache folder)
+        # (chunks defines the lazy reading mode, dask-backed variables loaded only when selected)
         if has_compression:
-            file = uncompress_and_remove(path)
+            data = open_compressed_dataset(path, cache_folder=decompress_cache, chunks=chunks)
         else:
-            file = path
-
-        data = xr.open_dataset(file)
+            data = xr.open_dataset(path, chunks=chunks)
         # check if there is a single variable in the dataset
         if len(data.data_vars) == 1:
             data = data[list(data.data_vars)[0]]
 
-        if has_compression:
-            if os.path.exists(file):
-                os.remove(file)
-
     elif file_format == 'grib':
 
         has_compression = has_compression_extension(path)
 
+        # grib files need a path on disk (cfgrib), so use the decompressed cache if available
         if has_compression:
-            file = uncompress_and_remove(path)
+            if decompress_cache is not None:
+                file = uncompress_to_cache(path, decompress_cache, uncompress_ext='.grib')
+            else:
+                file = uncompress_and_remove(path)
         else:
             file = path
 
         # read the grib file
-        data = xr.open_dataset(file, engine="cfgrib")
+        data = xr.open_dataset(file, engine="cfgrib", chunks=chunks)
 
         # 1) Preserve the original reference time
         #    (rename 'time' -> 'time_start' to keep it)
@@ -338,10 +345,35 @@ def read_from_file(
         if len(data.data_vars) == 1:
             data = data[list(data.data_vars)[0]]
 
-        if has_compression:
+        if has_compression and decompress_cache is None:
+            # the temporary file is removed, so the lazy data must be loaded
+            if chunks is not None:
+                data = data.load()
             if os.path.exists(file):
                 os.remove(file)
 
+    # read the data from a binary grid (hmc format, geographical reference defined by a grid or an ascii file)
+    elif file_format == 'binary':
+
+        if file_geo is None:
+            raise ValueError('Binary grid needs the geographical reference (file_geo)')
+        if isinstance(file_geo, str):
+            file_geo = get_grid_darray(*read_grid_ascii(file_geo, grid_cache=grid_cache))
+        geo_x = file_geo['longitude'].values if 'longitude' in file_geo.coords else file_geo['x'].values
+        geo_y = file_geo['latitude'].values if 'latitude' in file_geo.coords else file_geo['y'].values
+
+        if isinstance(file_variable, list):
+            file_variable = file_variable[0]
+
+        # memory-mapped (time, latitude, longitude) grid (time as step indexes, dates set by the dataset)
+        # (file_time_index selects the steps to read, only their bytes are mapped)
+        data = read_data_binary(
+            path, geo_x, geo_y, var_name=file_variable, var_time=None, var_time_steps_expected=None,
+            var_time_index=file_time_index,
+            coord_name_geo_x='longitude', coord_name_geo_y='latitude',
+            dim_name_geo_x='longitude', dim_name_geo_y='latitude',
+            dims_order=['time', 'latitude', 'longitude'])
+
     # read the data from a png or pdf
     elif file_format == 'file':
         data = path
@@ -431,7 +463,8 @@ def write_to_file(data, path,
         elif file_type in ['itwater', 'it_water']:
             write_dataset_itwater(path=path, data=data, time=time, attrs_data=None, **kwargs)
         else:
-            data.to_netcdf(path, format = 'NETCDF4', engine = 'netcdf4')
+            encoding = get_nc_encoding(data, kwargs.get('nc_encoding', None)) if isinstance(data, xr.Dataset) else None
+            data.to_netcdf(path, format = 'NETCDF4', engine = 'netcdf4', encoding = encoding)
 
     # write the data to a png or pdf (i.e. move the file)
     elif file_format == 'file':
@@ -793,7 +826,15 @@ def reset_nan(data: xr.DataArray, nan_value = None) -> xr.DataArray:
     if fill_value is None:
         data.attrs['_FillValue'] = new_fill_value
     elif not np.isclose(fill_value, new_fill_value, equal_nan = True):
-        data = data.where(~np.isclose(data, fill_value, equal_nan = True), new_fill_value)
+        if data.chunks is not None:
+            # same tolerance of np.isclose, computed lazily
+            if np.isnan(fill_value):
+                data_fill = data.isnull()
+            else:
+                data_fill = abs(data - fill_value) <= 1e-08 + 1e-05 * abs(fill_value)
+            data = data.where(~data_fill, new_fill_value)
+        else:
+            data = data.where(~np.isclose(data, fill_value, equal_nan = True), new_fill_value)
         data.attrs['_FillValue'] = new_fill_value
 
     return data
@@ -830,8 +871,8 @@ def select_by_time(
     ----------
     da : xr.DataArray
         Must have a 'time' coordinate.
-    when : str | pandas.Timestamp | numpy.datetime64
-        Target timestamp.
+    when : str | pandas.Timestamp | numpy.datetime64 | list | pandas.DatetimeIndex
+        Target timestamp (or target period; the matched steps are kept along 'time').
     tolerance : str | pandas.Timedelta, default "1H"
         Max time difference allowed when no exact match is found.
     active : bool, default False
@@ -841,7 +882,7 @@ def select_by_time(
     Returns
     -------
     xr.DataArray | None
-        The selected data (0D) or None if no valid time found.
+        The selected data (0D, or with the 'time' dimension for a period) or None if no valid time found.
     """
     # if no time selection is required
     if when is None:
@@ -854,34 +895,67 @@ def select_by_time(
     if "time" not in da.coords:
         raise ValueError("DataArray must have a 'time' coordinate.")
 
-    ts = pd.to_datetime(when)
-    times = pd.to_datetime(da.time.values)
-    tol = pd.to_timedelta(tolerance.lower())
+    # sorted time index (built once for each time coordinate, shared by the views of the cached data)
+    time_index = _get_time_index(da)
+    tol = pd.to_timedelta(tolerance.lower() if isinstance(tolerance, str) else tolerance)
+    method = 'nearest' if active else 'pad'
 
-    # if exact match exists
-    if ts in times:
-        return da.sel(time=ts)
+    # select a period (all the steps are matched in one call, unmatched steps are dropped)
+    if isinstance(when, (list, tuple, pd.DatetimeIndex)):
+        idx = time_index.locate(pd.to_datetime(list(when)), tolerance=tol, method=method)
+        idx = idx[idx >= 0]
+        if idx.size == 0:
+            return None
+        # unique steps in time order
+        return da.isel(time=time_index.order[np.unique(time_index.rank[idx])])
 
-    # find candidate times within tolerance
-    diffs = times - ts
-    diffs_abs = abs(diffs)
+    # select a single time (exact match or time within tolerance)
+    idx = time_index.locate_one(pd.to_datetime(when), tolerance=tol, method=method)
+    if idx is None:
+        return None
+    return da.isel(time=idx)
 
-    if active:
-        # select nearest time (before or after) within tolerance
-        idx = diffs_abs.argmin()
-        if diffs_abs[idx] <= tol:
-            return da.isel(time=idx)
-    else:
-        # select previous time (before only)
-        mask_prev = diffs <= pd.Timedelta(0)
-        if not mask_prev.any():
-            return None
-        diffs_prev = diffs_abs.where(mask_prev, pd.NaT)
-        idx = diffs_prev.argmin()
-        if pd.notna(diffs_prev[idx]) and diffs_prev[idx] <= tol:
-            return da.isel(time=idx)
+# method to select the requested steps of a DatetimeIndex (one step for each requested time, as one view)
+@withxrds
+def select_by_time_bulk(
+    da: xr.DataArray,
+    when: pd.DatetimeIndex,
+    *,
+    tolerance: str | pd.Timedelta = "1H",
+    active: bool = False
+):
+    """
+    Select all the requested times of a DatetimeIndex with one indexed selection.
 
-    return None
+    The tolerance logic is the same of select_by_time; the result has one step for each matched requested
+    time (labelled by the requested time, the selected time is kept in the 'time_source' coordinate) and the
+    unmatched requested times are dropped. None is returned if no requested time is matched.
+    """
+
+    if when is None:
+        return da
+    if "time" not in da.coords:
+        raise ValueError("DataArray must have a 'time' coordinate.")
+
+    when = pd.DatetimeIndex(pd.to_datetime(list(when)))
+    tol = pd.to_timedelta(tolerance.lower() if isinstance(tolerance, str) else tolerance)
+
+    idx = _get_time_index(da).locate(when, tolerance=tol, method='nearest' if active else 'pad')
+    valid = idx >= 0
+    if not valid.any():
+        return None
+
+    data = da.isel(time=idx[valid])
+    data = data.assign_coords(time_source=('time', data['time'].values))
+    data['time'] = when[valid]
+    return data
+
+# method to get the time index of a data array (time coordinates not defined by a DatetimeIndex are converted)
+def _get_time_index(da: xr.DataArray) -> TimeIndex:
+    time_index = get_time_index(da)
+    if time_index is None:
+        time_index = TimeIndex(pd.to_datetime(da.time.values))
+    return time_index
 
 # method to select da by mapping (mapping_str = variable:workflow)
 @with_logger(var_name="logger_stream")
@@ -1029,6 +1103,12 @@ def set_type(data: xr.DataArray, nan_value = None) -> xr.DataArray:
     Make sure that the data is the smallest possible.
     """
 
+    # lazy (dask-backed) data are not scanned for the value range (floats as float32, integers unchanged)
+    if data.chunks is not None:
+        if np.issubdtype(data.dtype, np.floating):
+            data = data.astype(np.float32)
+        return reset_nan(data, nan_value)
+
     max_value = data.max()
     min_value = data.min()
 
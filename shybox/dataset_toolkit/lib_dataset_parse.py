@@ -1,5 +1,8 @@
 import datetime as dt
 import re
+import pandas as pd
+
+from functools import lru_cache
 
 #from ..timestepping.time_utils import get_date_from_str
 
@@ -26,51 +29,7 @@ def substitute_string(string, tag_dict, rec=False):
     if not isinstance(string, str):
         return string
 
-    pattern = r'{([\w.]+)(?::(.*?))?}'
-
-    def replace_match(match, tag_dict):
-        key = match.group(1)
-        fmt = match.group(2)
-        value = tag_dict.get(key)
-
-        if value is None:
-            return match.group(0)  # Return the original match if the key is not found
-
-        if isinstance(value, str):
-            try:
-                value = get_date_from_str(value)
-            except ValueError:
-                value = value
-
-        if isinstance(value, dt.datetime) and fmt:
-            return value.strftime(fmt)
-        elif fmt:
-            return format(value, fmt)
-        else:
-            return str(value)
-
-    def generate_strings(string, tag_dict):
-        matches = re.findall(pattern, string)
-        if not matches:
-            return string
-
-        key = matches[0][0]
-        fmt = matches[0][1]
-        value = tag_dict.get(key)
-
-        if isinstance(value, list):
-            results = []
-            for val in value:
-                temp_dict = tag_dict.copy()
-                temp_dict[key] = val
-                this_replace = lambda m: replace_match(m, temp_dict)
-                this_replacement = re.sub(pattern, this_replace, string, count=1)
-                results.append(generate_strings(this_replacement, temp_dict))
-            return results
-        else:
-            return re.sub(pattern, lambda m: replace_match(m, tag_dict), string)
-
-    return generate_strings(string, tag_dict)
+    return get_path_template(string).substitute(tag_dict)
 
 def set_dataset(structure, obj_dict):
     """
@@ -163,68 +122,7 @@ def get_unique_values(values):
     return [transform_back(value) if isinstance(value, tuple) else value for value in unique_values]
 
 def extract_date_and_tags(string: str, string_pattern:str):
-    pattern = string_pattern
-    pattern = re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', pattern)
-    pattern = pattern.replace('%Y', '(?P<year>\\d{4})')
-    pattern = pattern.replace('%m', '(?P<month>\\d{2})')
-    pattern = pattern.replace('%d', '(?P<day>\\d{2})')
-    pattern = pattern.replace('%H', '(?P<hour>\\d{2})')
-    pattern = pattern.replace('%M', '(?P<minute>\\d{2})')
-    pattern = pattern.replace('%S', '(?P<second>\\d{2})')
-
-    # get all the substituted names (i.e. the parts of the pattern that are between < and >)
-    substituted_names = re.findall(r'(?<=<)\w+(?=>)', pattern)
-
-    # if there are duplicate names, change them to avoid conflicts
-    for name in set(substituted_names):
-        count = substituted_names.count(name)
-        if count > 1:
-            for i in range(count-1):
-                pattern = pattern.replace(f'(?P<{name}>', f'(?P<{name}{i}>', 1)
-
-    # Match the string with the pattern
-    match = re.match(pattern, string)
-    if not match:
-        raise ValueError("The string does not match the pattern")
-    
-    # Extract the date components
-    if 'year' in substituted_names:
-        year = int(match.group('year'))
-    else:
-        year = 1900
-    
-    if 'month' in substituted_names:
-        month = int(match.group('month'))
-    else:
-        month = 1
-    
-    if 'day' in substituted_names:
-        day = int(match.group('day'))
-    else:
-        day = 1
-
-    if 'hour' in substituted_names:
-        hour = int(match.group('hour'))
-    else:
-        hour = 0
-    
-    if 'minute' in substituted_names:
-        minute = int(match.group('minute'))
-    else:
-        minute = 0
-    
-    if 'second' in substituted_names:
-        second = int(match.group('second'))
-    else:
-        second = 0
-
-    date = dt.datetime(year, month, day, hour, minute, second)
-    
-    # Extract the other key-value pairs
-    all_tags = match.groupdict()
-    tags = {key: value for key, value in all_tags.items() if key in substituted_names and key not in ['year', 'month', 'day', 'hour', 'minute', 'second']}
-    
-    return date, tags
+    return get_path_template(string_pattern).parse(string)
 
 def format_dict(dict):
     str_list = []
@@ -235,4 +133,161 @@ def format_dict(dict):
             str_list.append(f'{key}={value:%Y-%m-%d}')
         else:
             str_list.append(f'{key}={value}')
-    return ', '.join(str_list)
\ No newline at end of file
+    return ', '.join(str_list)
+
+# date parts of the patterns (strftime code, group name, default value)
+_DATE_PARTS = [('%Y', 'year', r'\d{4}', 1900), ('%m', 'month', r'\d{2}', 1), ('%d', 'day', r'\d{2}', 1),
+               ('%H', 'hour', r'\d{2}', 0), ('%M', 'minute', r'\d{2}', 0), ('%S', 'second', r'\d{2}', 0)]
+_TAG_PATTERN = re.compile(r'{([\w.]+)(?::(.*?))?}')
+_DATE_PATTERN = re.compile('|'.join(code for code, _, _, _ in _DATE_PARTS))
+
+class PathTemplate:
+    """
+    Location pattern compiled once into literal and {tag} segments.
+
+    The segments are used to substitute the tags (substitute), to resolve the keys of one time or of a
+    DatetimeIndex (get_key, get_keys, with a vectorized strftime) and to parse a key back to its date and
+    tags (parse, with the regular expression built from the same segments).
+    """
+
+    def __init__(self, pattern: str):
+
+        self.pattern = pattern
+
+        # split the pattern in literal (str) and tag (key, format, original text) segments
+        self.segments, position = [], 0
+        for match in _TAG_PATTERN.finditer(pattern):
+            if match.start() > position:
+                self.segments.append(pattern[position:match.start()])
+            self.segments.append((match.group(1), match.group(2), match.group(0)))
+            position = match.end()
+        if position < len(pattern):
+            self.segments.append(pattern[position:])
+
+        self.tags = [segment[0] for segment in self.segments if isinstance(segment, tuple)]
+        self.literal = ''.join(segment for segment in self.segments if isinstance(segment, str))
+        self.has_time = '%' in pattern
+
+        self._regex = None
+
+    def __repr__(self):
+        return f'PathTemplate({self.pattern})'
+
+    # method to format the value of a tag (the tag is kept if the value is not available)
+    @staticmethod
+    def _format_tag(segment: tuple, tag_dict: dict) -> str:
+        key, fmt, text = segment
+        value = tag_dict.get(key)
+
+        if value is None:
+            return text
+
+        if isinstance(value, str) and fmt and '%' in fmt:
+            try:
+                value = dt.datetime.fromisoformat(value)
+            except ValueError:
+                return value
+
+        if isinstance(value, dt.datetime) and fmt:
+            return value.strftime(fmt)
+        elif fmt:
+            return format(value, fmt)
+        else:
+            return str(value)
+
+    # method to substitute the tags (list values generate a list of strings, as substitute_string)
+    def substitute(self, tag_dict: dict = None):
+        return self._generate(self.segments, tag_dict if tag_dict is not None else {})
+
+    def _generate(self, segments: list, tag_dict: dict):
+
+        idx = next((i for i, segment in enumerate(segments) if isinstance(segment, tuple)), None)
+        if idx is None:
+            return ''.join(segments)
+
+        value = tag_dict.get(segments[idx][0])
+        if isinstance(value, list):
+            results = []
+            for val in value:
+                temp_dict = tag_dict.copy()
+                temp_dict[segments[idx][0]] = val
+                temp_segments = segments[:idx] + [self._format_tag(segments[idx], temp_dict)] + segments[idx + 1:]
+                results.append(self._generate(temp_segments, temp_dict))
+            return results
+
+        return ''.join(
+            segment if isinstance(segment, str) else self._format_tag(segment, tag_dict) for segment in segments)
+
+    # method to get the key of a time (tags substituted, then the strftime codes)
+    def get_key(self, time: dt.datetime = None, tag_dict: dict = None) -> str:
+        raw_key = self.substitute(tag_dict)
+        return time.strftime(raw_key) if time is not None else raw_key
+
+    # method to get the keys of a DatetimeIndex (one vectorized strftime)
+    def get_keys(self, times: (pd.DatetimeIndex, list), tag_dict: dict = None) -> list:
+        raw_key = self.substitute(tag_dict)
+        if not self.has_time:
+            return [raw_key] * len(times)
+        return list(pd.DatetimeIndex(times).strftime(raw_key))
+
+    # method to build the regular expression of the pattern (date parts and tags as groups)
+    def _get_regex(self):
+
+        if self._regex is not None:
+            return self._regex
+
+        regex_parts, names = [], []
+        for segment in self.segments:
+            if isinstance(segment, tuple):
+                regex_parts.append(('tag', segment[0] if re.fullmatch(r'\w+', segment[0]) and not segment[1] else None))
+                continue
+            position = 0
+            for match in _DATE_PATTERN.finditer(segment):
+                regex_parts.append(('text', segment[position:match.start()]))
+                regex_parts.append(('date', match.group(0)))
+                position = match.end()
+            regex_parts.append(('text', segment[position:]))
+
+        date_parts = {code: (name, regex) for code, name, regex, _ in _DATE_PARTS}
+        for part_type, part_value in regex_parts:
+            if part_type == 'date':
+                names.append(date_parts[part_value][0])
+            elif part_type == 'tag' and part_value is not None:
+                names.append(part_value)
+
+        # the last occurrence of a duplicated name defines the value (the others are not captured)
+        regex, names_left = '', list(names)
+        for part_type, part_value in regex_parts:
+            if part_type == 'text':
+                regex += re.escape(part_value)
+                continue
+            name, part_regex = (date_parts[part_value] if part_type == 'date' else (part_value, '[^/]+'))
+            if name is None:
+                regex += f'(?:{part_regex})'
+                continue
+            names_left.remove(name)
+            regex += f'(?:{part_regex})' if name in names_left else f'(?P<{name}>{part_regex})'
+
+        self._regex = (re.compile(regex), set(names))
+        return self._regex
+
+    # method to parse a key (date and tags)
+    def parse(self, string: str) -> (dt.datetime, dict):
+
+        regex, names = self._get_regex()
+        match = regex.match(string)
+        if not match:
+            raise ValueError("The string does not match the pattern")
+
+        date_values = [int(match.group(name)) if name in names else default for _, name, _, default in _DATE_PARTS]
+        date = dt.datetime(*date_values)
+
+        tags = {key: value for key, value in match.groupdict().items()
+                if key not in ['year', 'month', 'day', 'hour', 'minute', 'second']}
+
+        return date, tags
+
+# method to get the compiled template of a pattern (cached)
+@lru_cache(maxsize=4096)
+def get_path_template(pattern: str) -> PathTemplate:
+    return PathTemplate(pattern)
@@ -0,0 +1,368 @@
+"""
+Library Features:
+
+Name:          lib_dataset_plan
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251204'
+Version:       '1.0.0'
+"""
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import json
+import threading
+
+import numpy as np
+import xarray as xr
+
+from collections import OrderedDict
+
+from shybox.dataset_toolkit.dataset_handler_cache import is_lazy_data
+from shybox.dataset_toolkit.lib_dataset_generic import (
+    map_dims, map_coords, map_vars, straighten_data, flat_dims)
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (normalization plans, by variable template and data signature)
+_PLAN_CACHE = OrderedDict()
+_PLAN_LOCK = threading.Lock()
+_PLAN_MAX = 128
+
+# steps of the normalization chain (name and method)
+NORMALIZE_STEPS = [('map_dims', map_dims), ('map_coords', map_coords), ('map_vars', map_vars),
+                   ('straighten_data', straighten_data), ('flat_dims', flat_dims)]
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the normalization plan of a variable (rename, transpose, flip and coordinates in one step)
+class VariablePlan:
+    """
+    Normalization of a data array computed once from the chain map_dims, map_coords, map_vars, straighten_data
+    and flat_dims. The plan stores the axes of the output (input axis and flip), the output dims and name and
+    the source of each output coordinate; apply() builds the output array on a (transposed, flipped) view of
+    the input buffer, without the intermediate objects of the chain.
+    """
+
+    def __init__(self, name, dims: tuple, axes: list, coords: list, attrs: tuple, encoding: tuple) -> None:
+        self.name = name
+        self.dims = dims
+        self.axes = axes
+        self.coords = coords
+        self.attrs = attrs
+        self.encoding = encoding
+
+    def __repr__(self):
+        return f'VariablePlan(name={self.name}, dims={self.dims}, axes={self.axes})'
+
+    # method to apply the plan to a data array
+    def apply(self, data: xr.DataArray) -> xr.DataArray:
+
+        values = _get_view(data.data, self.axes)
+
+        coords = {}
+        for coord_name, coord_dims, coord_source, coord_attrs, coord_encoding in self.coords:
+            if coord_source[0] == 'arange':
+                coord_values, coord_meta = _get_view(np.arange(coord_source[1]), coord_source[-1]), ({}, {})
+            else:
+                coord_obj = data.coords[coord_source[1]]
+                coord_values = coord_obj.values
+                if coord_source[0] == 'take':
+                    coord_values = np.take(coord_values, coord_source[3], axis=coord_source[2])
+                coord_values, coord_meta = _get_view(coord_values, coord_source[-1]), (
+                    coord_obj.attrs, coord_obj.encoding)
+            coords[coord_name] = xr.Variable(coord_dims, coord_values,
+                                             attrs=_get_meta(coord_attrs, coord_meta[0]),
+                                             encoding=_get_meta(coord_encoding, coord_meta[1]))
+
+        data_out = xr.DataArray(values, dims=self.dims, coords=coords, name=self.name,
+                                attrs=_get_meta(self.attrs, data.attrs))
+        data_out.encoding = _get_meta(self.encoding, data.encoding)
+
+        return data_out
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the normalization plan of a data object (data array or dataset)
+class NormalizePlan:
+
+    def __init__(self, plans: dict, is_dataset: bool) -> None:
+        self.plans = plans
+        self.is_dataset = is_dataset
+
+    def __repr__(self):
+        return f'NormalizePlan(dataset={self.is_dataset}, variables={list(self.plans)})'
+
+    # method to apply the plan (variables without plan are dropped, as in the chain)
+    def apply(self, data: (xr.DataArray, xr.Dataset)) -> (xr.DataArray, xr.Dataset, None):
+
+        if not self.is_dataset:
+            var_plan = self.plans[None]
+            return var_plan.apply(data) if var_plan is not None else None
+
+        data_out = None
+        for var_name in data:
+            var_plan = self.plans[var_name]
+            if var_plan is None:
+                continue
+            var_data = var_plan.apply(data[var_name])
+            if data_out is None:
+                data_out = xr.Dataset()
+            data_out[var_data.name if var_data.name is not None else var_name] = var_data
+
+        return data_out
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to normalize the data (chain of the normalization steps or cached plan)
+def normalize_data(data: (xr.DataArray, xr.Dataset), variable_template: dict = None,
+                   use_plan: bool = True) -> ((xr.DataArray, xr.Dataset, None), str):
+    """
+    Apply map_dims, map_coords, map_vars, straighten_data and flat_dims to the data.
+
+    The first data of a product (variable template and data signature) are normalized by the chain of the steps;
+    the plan computed from the chain is checked against its output and cached, so the next files with the same
+    signature are normalized in a single step. Returns the data (None if a step drops them) and the name of
+    the last step applied.
+    """
+
+    variable_template = variable_template if variable_template is not None else {}
+    # lazy data are normalized by the chain (the steps do not copy the dask-backed arrays)
+    if not use_plan or not isinstance(data, (xr.DataArray, xr.Dataset)) or is_lazy_data(data):
+        return _normalize_chain(data, variable_template)
+
+    plan_key = _get_plan_key(data, variable_template)
+    with _PLAN_LOCK:
+        plan = _PLAN_CACHE.get(plan_key)
+        if plan is not None:
+            _PLAN_CACHE.move_to_end(plan_key)
+
+    if plan is None:
+        data_out, step_name = _normalize_chain(data, variable_template)
+        plan = _build_plan(data, data_out, variable_template) if plan_key is not None else False
+        with _PLAN_LOCK:
+            _PLAN_CACHE[plan_key] = plan
+            while len(_PLAN_CACHE) > _PLAN_MAX:
+                _PLAN_CACHE.popitem(last=False)
+        return data_out, step_name
+
+    # signature not supported by the plans (normalized by the chain)
+    if plan is False:
+        return _normalize_chain(data, variable_template)
+
+    # the variables are dropped only by map_vars (names not defined in the template)
+    data = plan.apply(data)
+    return data, NORMALIZE_STEPS[-1][0] if data is not None else 'map_vars'
+
+
+# method to clear the normalization plans
+def clear_normalize_plan() -> None:
+    with _PLAN_LOCK:
+        _PLAN_CACHE.clear()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to apply the chain of the normalization steps
+def _normalize_chain(data, variable_template: dict) -> ((xr.DataArray, xr.Dataset, None), str):
+    step_name = None
+    for step_name, step_fx in NORMALIZE_STEPS:
+        if step_fx in (map_dims, map_coords, map_vars):
+            data = step_fx(data, **variable_template)
+        else:
+            data = step_fx(data)
+        if data is None:
+            break
+    return data, step_name
+
+
+# method to get the key of a plan (variable template and signature of the data)
+def _get_plan_key(data: (xr.DataArray, xr.Dataset), variable_template: dict) -> (tuple, None):
+    try:
+        template_key = json.dumps(variable_template, sort_keys=True, default=str)
+        if isinstance(data, xr.Dataset):
+            data_key = ('dataset',) + tuple((var_name, _get_signature(data[var_name])) for var_name in data)
+        else:
+            data_key = ('array', _get_signature(data))
+    except (TypeError, ValueError):
+        return None
+    return template_key, data_key
+
+
+# method to get the signature of a data array (structure and the coordinates values used by the steps)
+def _get_signature(data: xr.DataArray) -> tuple:
+
+    coords_key = []
+    for coord_name in sorted(map(str, data.coords)):
+        coord_obj = data.coords[coord_name]
+        coord_key = (coord_name, coord_obj.dims, coord_obj.shape, coord_obj.dtype.str)
+        if np.issubdtype(coord_obj.dtype, np.number) and coord_obj.size > 0 and coord_obj.ndim in (1, 2):
+            coord_values = coord_obj.values
+            # values of the coordinates used by the steps (axis to collapse, order and longitude range)
+            for coord_axis in ([coord_values] if coord_obj.ndim == 1 else
+                               [coord_values[0, :], coord_values[:, 0], coord_values[-1, :], coord_values[:, -1]]):
+                coord_min, coord_max = np.nanmin(coord_axis), np.nanmax(coord_axis)
+                coord_key += (bool(coord_axis[0] < coord_axis[-1]), bool(coord_min == coord_max),
+                              bool(coord_max > 180 and coord_min >= 0 and coord_max - coord_min >= 180))
+        coords_key.append(coord_key)
+
+    return data.name, data.dims, data.shape, data.dtype.str, tuple(coords_key)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to build the plan of a data object (False if the output of the chain is not reproduced)
+def _build_plan(data: (xr.DataArray, xr.Dataset), data_out, variable_template: dict) -> (NormalizePlan, bool):
+
+    try:
+        if isinstance(data, xr.Dataset):
+            plans = {var_name: _build_variable_plan(data[var_name], variable_template) for var_name in data}
+            plan = NormalizePlan(plans, is_dataset=True)
+        else:
+            plan = NormalizePlan({None: _build_variable_plan(data, variable_template)}, is_dataset=False)
+
+        # the plan must reproduce the output of the chain
+        plan_out = plan.apply(data)
+        if data_out is None or plan_out is None:
+            return plan if data_out is None and plan_out is None else False
+        if not plan_out.identical(data_out):
+            return False
+    except (KeyError, ValueError, TypeError, IndexError):
+        return False
+
+    return plan
+
+
+# method to build the plan of a data array (axes from the chain applied to the input positions)
+def _build_variable_plan(data: xr.DataArray, variable_template: dict) -> (VariablePlan, None):
+
+    # chain applied to a proxy array of the positions (same coordinates of the data)
+    data_pos = np.arange(data.size, dtype=np.int32 if data.size < 2 ** 31 else np.int64).reshape(data.shape)
+    data_proxy, _ = _normalize_chain(data.copy(data=data_pos), variable_template)
+    if data_proxy is None:
+        return None
+    data_out, _ = _normalize_chain(data.copy(deep=False), variable_template)
+
+    axes = _get_axes(data_proxy.values, data.shape)
+    if axes is None:
+        raise ValueError('Normalization steps are not a transpose and flip of the data')
+
+    # output coordinates (source coordinate of the input and its axes)
+    axes_out = {data.dims[axis_in]: (axis_out, flip) for axis_out, (axis_in, flip) in enumerate(axes)}
+    coords = []
+    for coord_name in data_out.coords:
+        coord_out = data_out.coords[coord_name]
+        coord_source, coord_in = _get_coord_source(coord_name, coord_out, data, axes_out, data_out.dims)
+        if coord_source is None:
+            raise ValueError(f'Coordinate {coord_name} is not defined by the input coordinates')
+        coords.append((coord_name, coord_out.dims, coord_source,
+                       _get_meta_rule(coord_out.attrs, coord_in.attrs if coord_in is not None else {}),
+                       _get_meta_rule(coord_out.encoding, coord_in.encoding if coord_in is not None else {})))
+
+    return VariablePlan(data_out.name, data_out.dims, axes, coords,
+                        _get_meta_rule(data_out.attrs, data.attrs), _get_meta_rule(data_out.encoding, data.encoding))
+
+
+# method to get the axes of the output (input axis and flip) from the positions of the proxy array
+def _get_axes(positions: np.ndarray, shape: tuple) -> (list, None):
+
+    if positions.ndim != len(shape) or positions.size != int(np.prod(shape)):
+        return None
+    strides = [int(np.prod(shape[axis + 1:])) for axis in range(len(shape))]
+
+    origin = int(positions[(0,) * positions.ndim])
+    axes, axes_free = [None] * positions.ndim, list(range(len(shape)))
+    for axis_out, size_out in enumerate(positions.shape):
+        if size_out == 1:
+            continue
+        step = [0] * positions.ndim
+        step[axis_out] = 1
+        delta = int(positions[tuple(step)]) - origin
+        axis_in = next((axis for axis in axes_free if strides[axis] == abs(delta) and shape[axis] == size_out), None)
+        if axis_in is None:
+            return None
+        axes[axis_out] = (axis_in, delta < 0)
+        axes_free.remove(axis_in)
+    for axis_out, size_out in enumerate(positions.shape):
+        if axes[axis_out] is None:
+            axis_in = next((axis for axis in axes_free if shape[axis] == size_out), None)
+            if axis_in is None:
+                return None
+            axes[axis_out] = (axis_in, False)
+            axes_free.remove(axis_in)
+
+    # all the positions must follow the axes (no other reordering of the steps)
+    if not np.array_equal(positions, _get_view(np.arange(positions.size).reshape(shape), axes)):
+        return None
+    return axes
+
+
+# method to get the source of an output coordinate (input coordinate, taken index and axes)
+def _get_coord_source(coord_name, coord_out: xr.DataArray, data: xr.DataArray, axes_out: dict, dims_out: tuple):
+
+    values_out = coord_out.values
+    coords_in = sorted(data.coords, key=lambda name: name != coord_name)
+
+    for name_in in coords_in:
+        coord_in = data.coords[name_in]
+        values_in = coord_in.values
+        if any(dim_in not in axes_out for dim_in in coord_in.dims):
+            continue
+
+        # coordinate with the same dims of the output (transpose and flip of the input)
+        dims_mapped = [dims_out[axes_out[dim_in][0]] for dim_in in coord_in.dims]
+        if sorted(dims_mapped) == sorted(coord_out.dims):
+            coord_axes = [(dims_mapped.index(dim), axes_out[coord_in.dims[dims_mapped.index(dim)]][1])
+                          for dim in coord_out.dims]
+            if _equal_values(_get_view(values_in, coord_axes), values_out):
+                return ('coord', name_in, coord_axes), coord_in
+
+        # 2d coordinate collapsed to 1d (first or last row/column)
+        if coord_in.ndim == 2 and coord_out.ndim == 1 and coord_out.dims[0] in dims_mapped:
+            axis_keep = dims_mapped.index(coord_out.dims[0])
+            coord_axes = [(0, axes_out[coord_in.dims[axis_keep]][1])]
+            for take_idx in (0, -1):
+                values_take = np.take(values_in, take_idx, axis=1 - axis_keep)
+                if _equal_values(_get_view(values_take, coord_axes), values_out):
+                    return ('take', name_in, 1 - axis_keep, take_idx, coord_axes), coord_in
+
+    # index coordinate created by the steps (flipped if the axis is flipped)
+    if coord_out.ndim == 1:
+        for flip in (False, True):
+            if _equal_values(_get_view(np.arange(coord_out.size), [(0, flip)]), values_out):
+                return ('arange', coord_out.size, [(0, flip)]), None
+
+    return None, None
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get a view of an array (output axes as input axis and flip)
+def _get_view(values, axes: list):
+    values = values.transpose([axis_in for axis_in, _ in axes]) if len(axes) > 1 else values
+    flips = tuple(slice(None, None, -1) if flip else slice(None) for _, flip in axes)
+    return values[flips] if any(flip for _, flip in axes) else values
+
+
+# method to get the rule of the metadata (attributes or encoding) of an output object
+def _get_meta_rule(meta_out: dict, meta_in: dict) -> tuple:
+    if meta_out == meta_in:
+        return ('source',)
+    return ('fixed', dict(meta_out))
+
+
+# method to get the metadata of an output object from its rule
+def _get_meta(meta_rule: tuple, meta_in: dict) -> dict:
+    return dict(meta_in) if meta_rule[0] == 'source' else dict(meta_rule[1])
+
+
+# method to compare the values of two arrays (nan values are equal)
+def _equal_values(values_a: np.ndarray, values_b: np.ndarray) -> bool:
+    if values_a.shape != values_b.shape or values_a.dtype != values_b.dtype:
+        return False
+    try:
+        return bool(np.array_equal(values_a, values_b, equal_nan=True))
+    except TypeError:
+        return bool(np.array_equal(values_a, values_b))
+# ----------------------------------------------------------------------------------------------------------------------
@@ -67,4 +67,18 @@ file_comment = "Author(s): XXXX XXXX"
 file_email = "xxxxx.yyyyy@cimafoundation.org"
 file_project_info = ""
 file_algorithm = "Processing tool developed by CIMA Research Foundation"
+
+# definition of netcdf encoding profiles (chunks by dimension, time for the time dimension, full size if not set)
+# (quantization is opt-in: least_significant_digit as digits for all the float variables or {variable: digits})
+nc_encoding_profiles = {
+    'fast-write': {
+        'zlib': False, 'complevel': 0, 'shuffle': False, 'least_significant_digit': None,
+        'chunks': {'time': 1}},
+    'small-size': {
+        'zlib': True, 'complevel': 6, 'shuffle': True, 'least_significant_digit': None,
+        'chunks': {'time': 24}},
+    'model-read-optimized': {
+        'zlib': True, 'complevel': 2, 'shuffle': True, 'least_significant_digit': None,
+        'chunks': {'time': 1}},
+}
 # ----------------------------------------------------------------------------------------------------------------------
@@ -11,3 +11,20 @@ Version:       '1.0.0'
 # definition of zip extension
 zip_extension = '.gz'
 # ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# definition of the shared dataset cache (process-wide byte budget)
+cache_max_bytes = 2 * 1024 ** 3
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# definition of the compression backend ('auto', 'pigz' or 'gzip') and workers
+zip_backend = 'auto'
+zip_workers = 4
+zip_level = 9
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# definition of the file catalog (sqlite database of the available files, in the temporary folder by default)
+catalog_file_name = 'shybox_file_catalog.sqlite'
+# ----------------------------------------------------------------------------------------------------------------------
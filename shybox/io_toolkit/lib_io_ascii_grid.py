@@ -1,6 +1,7 @@
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
 import logging
+import os
 import numpy as np
 import xarray as xr
 import rasterio as rio
@@ -9,6 +10,107 @@ from rasterio.crs import CRS
 from shybox.io_toolkit.lib_io_utils import create_darray
 # ----------------------------------------------------------------------------------------------------------------------
 
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (ascii grid header keys)
+GRID_HEADER_KEYS = ['ncols', 'nrows', 'xllcorner', 'yllcorner', 'xllcenter', 'yllcenter', 'cellsize', 'nodata_value']
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read the header of an ascii grid (keys in lower case, values as strings)
+def read_grid_header(file_handle) -> (dict, int):
+
+    header, offset = {}, 0
+    file_handle.seek(0)
+    for _ in range(len(GRID_HEADER_KEYS)):
+        line = file_handle.readline()
+        parts = line.split()
+        if len(parts) != 2 or parts[0].decode().lower() not in GRID_HEADER_KEYS:
+            break
+        header[parts[0].decode().lower()] = parts[1].decode()
+        offset = file_handle.tell()
+
+    if 'ncols' not in header or 'nrows' not in header:
+        raise ValueError('Ascii grid header must define "ncols" and "nrows"')
+    file_handle.seek(offset)
+
+    return header, offset
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read an ascii grid (header and values); values are cached in a .npy sidecar validated by the file mtime
+def read_grid_ascii(file_name: str, grid_cache: bool = False) -> (dict, np.ndarray):
+
+    file_stat = os.stat(file_name)
+    with open(file_name, 'rb') as file_handle:
+        header, offset = read_grid_header(file_handle)
+        n_rows, n_cols = int(header['nrows']), int(header['ncols'])
+
+        # get the values from the sidecar (same mtime of the grid file)
+        file_cache = file_name + '.npy'
+        if grid_cache and os.path.exists(file_cache) and os.stat(file_cache).st_mtime_ns == file_stat.st_mtime_ns:
+            values = np.load(file_cache)
+            if values.shape == (n_rows, n_cols):
+                return header, values
+
+        # parse the values (c tokenizer); integer grids are int32, float grids float32 (as the gdal driver)
+        file_body = file_handle.read()
+
+    values = np.fromstring(file_body, dtype=np.float64, sep=' ')
+    if values.size != n_rows * n_cols:
+        raise ValueError(f'Ascii grid "{file_name}" has {values.size} values, expected {n_rows * n_cols}')
+
+    if any(token in file_body for token in (b'.', b'e', b'E', b'n', b'N')) or '.' in header.get('nodata_value', ''):
+        values = values.astype(np.float32)
+    else:
+        values = values.astype(np.int32)
+    values = values.reshape(n_rows, n_cols)
+
+    # save the sidecar (best effort, the grid folder could be read-only)
+    if grid_cache:
+        try:
+            file_tmp = file_cache + '.part.npy'
+            np.save(file_tmp, values)
+            os.utime(file_tmp, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+            os.replace(file_tmp, file_cache)
+        except OSError as exc:
+            logging.warning(f' ===> Ascii grid cache "{file_cache}" not saved ({exc})')
+
+    return header, values
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to create the data array of an ascii grid (same layout of the rioxarray reader: (y, x) at cell centers)
+def get_grid_darray(header: dict, values: np.ndarray) -> xr.DataArray:
+
+    n_rows, n_cols = values.shape
+    cell_size = float(header['cellsize'])
+    if 'xllcorner' in header:
+        x_ll = float(header['xllcorner'])
+    else:
+        x_ll = float(header['xllcenter']) - cell_size / 2
+    if 'yllcorner' in header:
+        y_ll = float(header['yllcorner'])
+    else:
+        y_ll = float(header['yllcenter']) - cell_size / 2
+    y_ul = y_ll + n_rows * cell_size
+
+    x = x_ll + (np.arange(n_cols) + 0.5) * cell_size
+    y = y_ul - (np.arange(n_rows) + 0.5) * cell_size
+
+    spatial_ref = xr.DataArray(0, attrs={'GeoTransform': f'{x_ll} {cell_size} 0.0 {y_ul} 0.0 {-cell_size}'})
+
+    attrs = {'AREA_OR_POINT': 'Area', 'scale_factor': 1.0, 'add_offset': 0.0}
+    if 'nodata_value' in header:
+        attrs['_FillValue'] = float(header['nodata_value'])
+
+    return xr.DataArray(
+        values, dims=('y', 'x'),
+        coords={'band': 1, 'x': x, 'y': y, 'spatial_ref': spatial_ref}, attrs=attrs)
+# ----------------------------------------------------------------------------------------------------------------------
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 # method to read grid data
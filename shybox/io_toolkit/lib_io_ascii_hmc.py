@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import os
 import re
+import numpy as np
 import pandas as pd
 
 from pathlib import Path
@@ -47,6 +48,8 @@ LUT_DB_DEFAULT = {
 }
 # columns for domain registry
 LUT_DOMAIN_DEFAULT = ['X', 'Y', 'catchment_name', 'section_name', 'extra']
+# column types for domain registry (by position)
+SCHEMA_DOMAIN_DEFAULT = ['int64', 'int64', None, None, None]  # None: type inferred by pandas
 # ----------------------------------------------------------------------------------------------------------------------
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -125,6 +128,30 @@ def read_sections_db(
 # ----------------------------------------------------------------------------------------------------------------------
 
 # ----------------------------------------------------------------------------------------------------------------------
+# method to load the sections data from the binary cache (valid if it has the same mtime of the txt file)
+def _load_sections_cache(path: str, path_cache: str) -> (pd.DataFrame, None):
+    if not os.path.exists(path_cache) or os.stat(path_cache).st_mtime_ns != os.stat(path).st_mtime_ns:
+        return None
+    with np.load(path_cache, allow_pickle=False) as file_data:
+        data = pd.DataFrame(file_data['values'], columns=[str(col) for col in file_data['columns']])
+        data.index = pd.DatetimeIndex(file_data['time'])
+    return data
+
+
+# method to save the sections data to the binary cache (best effort, the folder could be read-only)
+@with_logger(var_name='logger_stream')
+def _save_sections_cache(path: str, path_cache: str, data: pd.DataFrame) -> None:
+    try:
+        file_stat = os.stat(path)
+        file_tmp = path_cache + '.part.npz'
+        np.savez(file_tmp, values=data.to_numpy(dtype=np.float64),
+                 time=data.index.values, columns=np.asarray(data.columns, dtype=str))
+        os.utime(file_tmp, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+        os.replace(file_tmp, path_cache)
+    except OSError as exc:
+        logger_stream.warning(f"Sections data cache not saved: {path_cache} ({exc})")
+
+
 # method to read sections data hmc (txt format)
 @with_logger(var_name='logger_stream')
 def read_sections_data(
@@ -134,24 +161,44 @@ def read_sections_data(
     datetime_format: str = "%Y%m%d%H%M",
     tz: str = None,
     column_names: list = None,
+    cache: bool = False,
 ) -> pd.DataFrame:
+    """
+    Read the hmc sections time-series (datetime + one column for each section) with the pandas c parser.
+    With cache, the parsed table is stored in a .npz sidecar and reloaded while the txt file is unchanged.
+    """
 
     # check file availability
     if not os.path.exists(path):
         logger_stream.error(f"File sections data not found: {path}")
 
-    # Load the raw file (no header)
-    raw = pd.read_csv(path, sep=r"\s+", header=None, engine="python")
-    if raw.shape[1] < 2:
-        logger_stream.error("Expected at least 2 columns: datetime + one or more section columns.")
+    # Load the cached table (if available) or the raw file (no header, c parser)
+    path_cache = str(path) + '.npz'
+    data = _load_sections_cache(path, path_cache) if cache else None
+    if data is None:
 
-    # Parse datetime
-    idx = pd.to_datetime(raw.iloc[:, 0].astype(str), format=datetime_format, errors="raise")
-    if tz is not None:
-        idx = idx.dt.tz_localize(tz)
+        raw = pd.read_csv(path, sep=r"\s+", header=None, engine="c", dtype={0: str})
+        if raw.shape[1] < 2:
+            logger_stream.error("Expected at least 2 columns: datetime + one or more section columns.")
+
+        # Parse datetime
+        idx = pd.DatetimeIndex(pd.to_datetime(raw.iloc[:, 0], format=datetime_format, errors="raise"))
+
+        # Slice section data and convert to numeric (only the columns not parsed as numbers)
+        data = raw.iloc[:, 1:]
+        cols_other = [col for col in data.columns if not pd.api.types.is_float_dtype(data[col])]
+        if cols_other:
+            data = data.copy()
+            data[cols_other] = data[cols_other].apply(pd.to_numeric, errors="coerce")
+        data = data.astype(np.float64)
+        data.index = idx
+
+        if cache:
+            _save_sections_cache(path, path_cache, data)
 
-    # Slice section data
-    data = raw.iloc[:, 1:].copy()
+    # Localize datetime
+    if tz is not None:
+        data.index = data.index.tz_localize(tz)
 
     # Name columns
     n_sections = data.shape[1]
@@ -164,12 +211,7 @@ def read_sections_data(
     else:
         data.columns = [f"{base_name}_{i:02d}" for i in range(1, n_sections + 1)]
 
-    # Convert all to numeric
-    data = data.apply(pd.to_numeric, errors="coerce")
     data.name = var_name
-
-    # Assign DateTimeIndex
-    data.index = idx
     data.index.name = "time"
 
     return data
@@ -190,10 +232,12 @@ def read_sections_registry(
     strict: bool = False,
     out_col: str = "tag",
     out_first: bool = False,
+    schema: Union[List[str], Dict[str, str], None] = None,
 ) -> pd.DataFrame:
     """
     Read a info_section-style TXT with flexible column naming and create a
     'catchment:section' tag using columns 2, 3, and 4 (where 3 and 4 are merged).
+    Column types follow the schema (by position or by column name; default SCHEMA_DOMAIN_DEFAULT).
     """
 
     # resolve column names to an exact list of 5
@@ -211,45 +255,51 @@ def read_sections_registry(
     if not path.exists():
         logger_stream.error(f"File sections hmc not found: {path}")
 
-    # open file and parse lines
-    records: List[dict] = []
+    # resolve column types (schema by position or by column name)
+    if isinstance(schema, dict):
+        dtypes = [schema.get(col, SCHEMA_DOMAIN_DEFAULT[i]) for i, col in enumerate(cols)]
+    elif isinstance(schema, list):
+        dtypes = (schema + SCHEMA_DOMAIN_DEFAULT[len(schema):])[:5]
+    else:
+        dtypes = SCHEMA_DOMAIN_DEFAULT[:]
+
+    # read all the lines at once (vectorized filtering and splitting)
     with path.open("r", encoding=encoding, errors=errors) as f:
-        for lineno, raw in enumerate(f, start=1):
-            line = raw.strip()
-            if skip_blank and not line:
-                continue
-            if comment_prefixes and any(line.lstrip().startswith(p) for p in comment_prefixes):
-                continue
-
-            # split into up to 5 parts; 5th is the full remainder (with spaces)
-            parts = line.split(maxsplit=4)
-            if len(parts) < 4:
-                if strict:
-                    logger_stream.error(f"Malformed line {lineno}: expected >=4 fields -> {raw!r}")
-                continue
-
-            try:
-                id1 = int(parts[0])
-                id2 = int(parts[1])
-            except ValueError as e:
-                if strict:
-                    logger_stream.error(f"Line {lineno}: IDs must be integers -> {raw!r}")
-                continue
-
-            name1 = parts[2]
-            name2 = parts[3]
-            extra = parts[4] if len(parts) >= 5 else None
-
-            records.append({
-                cols[0]: id1,
-                cols[1]: id2,
-                cols[2]: name1,
-                cols[3]: name2,
-                cols[4]: extra,
-            })
-
-    # create dataframe from records (list of dicts)
-    df = pd.DataFrame.from_records(records, columns=cols)
+        lines = pd.Series(f.read().splitlines(), dtype=object)
+    lines.index = lines.index + 1
+
+    text = lines.str.strip()
+    keep = pd.Series(True, index=text.index)
+    if skip_blank:
+        keep &= text != ""
+    if comment_prefixes:
+        keep &= ~text.str.startswith(tuple(comment_prefixes))
+    text = text[keep]
+
+    # split into up to 5 parts; 5th is the full remainder (with spaces)
+    parts = text.str.split(n=4, expand=True).reindex(columns=range(5)).astype(object)
+    parts_n = parts.notna().sum(axis=1)
+    malformed = parts_n < 4
+    if strict and malformed.any():
+        lineno = int(parts.index[malformed][0])
+        logger_stream.error(f"Malformed line {lineno}: expected >=4 fields -> {lines[lineno]!r}")
+    parts = parts[~malformed]
+
+    # ids must be integers
+    invalid = ~(parts[0].str.fullmatch(r"[+-]?\d+") & parts[1].str.fullmatch(r"[+-]?\d+"))
+    if strict and invalid.any():
+        lineno = int(parts.index[invalid][0])
+        logger_stream.error(f"Line {lineno}: IDs must be integers -> {lines[lineno]!r}")
+    parts = parts[~invalid]
+    ids = parts[[0, 1]].astype("int64")
+
+    # create dataframe (typed columns)
+    df = pd.DataFrame({
+        cols[0]: ids[0].to_numpy(), cols[1]: ids[1].to_numpy(),
+        cols[2]: parts[2].tolist(), cols[3]: parts[3].tolist(),
+        cols[4]: parts[4].astype(object).where(parts[4].notna(), None).tolist(),
+    }, columns=cols)
+    df = df.astype({col: dtype for col, dtype in zip(cols, dtypes) if dtype is not None})
 
     # create tag: col2 : (col3 + " " + col4) ---
     # ensure col4 exists and use NA-safe string ops
@@ -3,22 +3,19 @@ Library Features:
 
 Name:          lib_data_io_binary
 Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
-Date:          '20210408'
-Version:       '1.0.0'
+Date:          '20251128'
+Version:       '1.1.0'
 """
 #######################################################################################
 # Library
 import logging
 import os
-import struct
-
-from copy import deepcopy
 
 import numpy as np
 import pandas as pd
 import xarray as xr
 
-from tools.processing_tool_datasets_merger.lib_info_args import logger_name
+from shybox.default.lib_default_args import logger_name
 
 # Logging
 log_stream = logging.getLogger(logger_name)
@@ -28,14 +25,41 @@ import matplotlib.pylab as plt
 #######################################################################################
 
 
+# --------------------------------------------------------------------------------
+# Method to get the time steps selection (index, slice or [start, end) tuple)
+def get_time_selection(var_time_index, var_time_steps):
+
+    if var_time_index is None:
+        return 0, var_time_steps
+    if isinstance(var_time_index, (int, np.integer)):
+        var_time_index = slice(var_time_index, var_time_index + 1 if var_time_index != -1 else None)
+    elif isinstance(var_time_index, (list, tuple)):
+        var_time_index = slice(*var_time_index)
+    if not isinstance(var_time_index, slice) or var_time_index.step not in (None, 1):
+        log_stream.error(' ===> Time index must be an integer, a [start, end) tuple or a contiguous slice')
+        raise NotImplementedError('Case not implemented yet')
+
+    time_start, time_end, _ = var_time_index.indices(var_time_steps)
+    return time_start, max(time_end, time_start)
+# --------------------------------------------------------------------------------
+
+
 # --------------------------------------------------------------------------------
 # Method to read 2d variable in binary format (saved as 1d integer array)
 def read_data_binary(file_name, var_geo_x, var_geo_y, var_geo_attrs=None,
                      var_format='i', var_scale_factor=10,
-                     var_name=None, var_time=None, var_geo_1d=True, var_time_freq='H', var_time_steps_expected=1,
+                     var_name=None, var_time=None, var_geo_1d=True, var_time_freq='h', var_time_steps_expected=1,
                      coord_name_geo_x='west_east', coord_name_geo_y='south_north', coord_name_time='time',
                      dim_name_geo_x='west_east', dim_name_geo_y='south_north', dim_name_time='time',
-                     dims_order=None):
+                     dims_order=None, var_time_index=None, var_scale_lazy=False):
+    """
+    The file is memory-mapped as a (rows, cols, time) fortran-ordered cube (no copy of the values).
+    var_time_index selects the steps to read (integer, [start, end) tuple or slice): only their bytes are mapped.
+    The steps of the whole file are checked against var_time_steps_expected (None to accept the file steps);
+    without var_time the time coordinate holds the step indexes.
+    Scaling is applied in a single vectorized pass to float32 or, with var_scale_lazy, on access
+    (scale_factor attribute decoded by xarray).
+    """
 
     if dims_order is None:
         dims_order = [dim_name_geo_y, dim_name_geo_x, dim_name_time]
@@ -47,19 +71,43 @@ def read_data_binary(file_name, var_geo_x, var_geo_y, var_geo_attrs=None,
         cols = var_geo_x.shape[0]
         geo_n = rows * cols
 
-        # Open and read binary file [OLD]
-        file_handle = open(file_name, 'rb')
-        data_format = var_format * geo_n
-        data_stream = file_handle.read(-1)
-        var_data_1d = struct.unpack(data_format, data_stream)
-        file_handle.close()
-
-        var_data_1d = np.asarray(var_data_1d, dtype=np.float32)
-        var_data_1d = np.float32(var_data_1d / var_scale_factor)
-        var_n = var_data_1d.shape[0]
-
-        var_time_steps_cmp = int(var_n / geo_n)
-        var_data_3d = np.reshape(var_data_1d, (rows, cols, var_time_steps_cmp), order='F')
+        # Get the number of time steps in the file (the file must hold whole frames)
+        var_dtype = np.dtype(var_format)
+        var_frame = geo_n * var_dtype.itemsize
+        var_size = os.path.getsize(file_name)
+        if var_size % var_frame != 0:
+            log_stream.error(' ===> File ' + file_name + ' size [' + str(var_size) +
+                             '] is not a multiple of the frame size [' + str(var_frame) + ']')
+            raise ValueError('File size is not a multiple of the frame size')
+        var_time_steps_file = var_size // var_frame
+
+        # Check the expected steps on the whole file (before selecting the steps to read)
+        var_time_steps_check = var_time_steps_file
+        var_time_steps_single = False
+        if var_time_steps_expected is not None and var_time_steps_file != var_time_steps_expected:
+            if (var_time_steps_file == 1) and (var_time_steps_file < var_time_steps_expected):
+                log_stream.warning(' ===> File ' + file_name +
+                                   ' steps expected [' + str(var_time_steps_expected) +
+                                   '] and found [' + str(var_time_steps_file) + '] are different!')
+                # the single step is repeated for all the expected steps
+                var_time_steps_check, var_time_steps_single = var_time_steps_expected, True
+            else:
+                log_stream.error(' ===> File ' + file_name + ' format are not expected!')
+                raise NotImplementedError('Case not implemented yet')
+
+        # Memory-map the selected time steps (fortran order, zero-copy view)
+        time_start, time_end = get_time_selection(var_time_index, var_time_steps_check)
+        var_time_steps_cmp = time_end - time_start
+        if var_time_steps_cmp > 0 and var_time_steps_single:
+            # repeat the single step as a (read-only) broadcast view
+            var_data_3d = np.memmap(file_name, dtype=var_dtype, mode='r', shape=(rows, cols, 1), order='F')
+            var_data = np.broadcast_to(var_data_3d, (rows, cols, var_time_steps_cmp))
+        elif var_time_steps_cmp > 0:
+            var_data = np.memmap(file_name, dtype=var_dtype, mode='r',
+                                 offset=time_start * var_frame,
+                                 shape=(rows, cols, var_time_steps_cmp), order='F')
+        else:
+            var_data = np.zeros(shape=(rows, cols, 0), dtype=var_dtype, order='F')
 
         if var_geo_1d:
             var_geo_x_2d, var_geo_y_2d = np.meshgrid(var_geo_x, var_geo_y)
@@ -72,35 +120,12 @@ def read_data_binary(file_name, var_geo_x, var_geo_y, var_geo_attrs=None,
         if geo_y_lower > geo_y_upper:
             var_geo_y_2d = np.flipud(var_geo_y_2d)
 
-        var_dims = var_data_3d.shape
-        var_high = var_dims[0]
-        var_wide = var_dims[1]
-
-        if var_time_steps_cmp == var_time_steps_expected:
-
-            var_data = np.zeros(shape=[var_geo_x_2d.shape[0], var_geo_y_2d.shape[1], var_time_steps_cmp])
-            var_data[:, :, :] = np.nan
-            for step in np.arange(0, var_time_steps_cmp, 1):
-                var_data_step = var_data_3d[:, :, step]
-                var_data[:, :, step] = var_data_step
-
-        elif (var_time_steps_cmp == 1) and (var_time_steps_cmp < var_time_steps_expected):
-
-            log_stream.warning(' ===> File ' + file_name +
-                               ' steps expected [' + str(var_time_steps_expected) +
-                               '] and found [' + str(var_time_steps_cmp) + '] are different!')
-
-            var_data = np.zeros(shape=[var_geo_x_2d.shape[0], var_geo_y_2d.shape[1], var_time_steps_expected])
-            var_data[:, :, :] = np.nan
-            for step in np.arange(0, var_time_steps_expected, 1):
-                var_data_step = var_data_3d[:, :, 0]
-                var_data[:, :, step] = var_data_step
-
-            var_time_steps_cmp = deepcopy(var_time_steps_expected)
-
-        else:
-            log_stream.error(' ===> File ' + file_name + ' format are not expected!')
-            raise NotImplemented('Case not implemented yet')
+        # Apply the scale factor (lazy on access, or once for the whole cube)
+        var_attrs_scale = {}
+        if var_scale_lazy:
+            var_attrs_scale = {'scale_factor': 1.0 / var_scale_factor}
+        elif var_scale_factor != 1 or var_data.dtype != np.float32:
+            var_data = np.divide(var_data, var_scale_factor, dtype=np.float32)
 
     else:
         log_stream.warning(' ===> File ' + file_name + ' not available in loaded datasets!')
@@ -108,23 +133,37 @@ def read_data_binary(file_name, var_geo_x, var_geo_y, var_geo_attrs=None,
 
     if var_data is not None:
 
-        if isinstance(var_time, pd.Timestamp):
+        if var_time is None:
+
+            # step indexes (dates defined by the reader of the dataset)
+            var_time = np.arange(time_start, time_end)
+
+        elif isinstance(var_time, pd.Timestamp):
 
-            if var_time_steps_cmp == 1:
+            if var_time_index is not None:
+                var_time = pd.date_range(end=var_time, freq=var_time_freq, periods=var_time_steps_check)
+                var_time = var_time[time_start:time_end]
+            elif var_time_steps_cmp == 1:
                 var_time = pd.DatetimeIndex([var_time])
             elif var_time_steps_cmp > 1:
                 var_time = pd.date_range(end=var_time, freq=var_time_freq, periods=var_time_steps_cmp)
 
         elif isinstance(var_time, pd.DatetimeIndex):
-            pass
+            if var_time_index is not None and var_time.size == var_time_steps_check:
+                var_time = var_time[time_start:time_end]
         else:
             log_stream.error(' ===> Time format is not allowed. Expected Timestamp or Datetimeindex')
-            raise NotImplemented('Case not implemented yet')
+            raise NotImplementedError('Case not implemented yet')
 
-        var_da = xr.DataArray(var_data, name=var_name, dims=dims_order,
+        var_da = xr.DataArray(var_data, name=var_name, dims=[dim_name_geo_y, dim_name_geo_x, dim_name_time],
                               coords={coord_name_time: ([dim_name_time], var_time),
                                       coord_name_geo_x: ([dim_name_geo_x], var_geo_x_2d[0, :]),
                                       coord_name_geo_y: ([dim_name_geo_y], var_geo_y_2d[:, 0])})
+        if var_attrs_scale:
+            var_da.attrs = var_attrs_scale
+            var_da = xr.decode_cf(var_da.to_dataset(name=var_name or 'data'))[var_name or 'data']
+            var_da.name = var_name
+        var_da = var_da.transpose(*dims_order)
         if var_geo_attrs is not None:
             var_da.attrs = var_geo_attrs
 
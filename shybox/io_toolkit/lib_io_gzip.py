@@ -9,9 +9,28 @@ Version:       '1.0.0'
 
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
+import atexit
 import gzip
+import hashlib
 import shutil
+import subprocess
+import tempfile
+import threading
 import os
+
+import netCDF4
+import xarray as xr
+
+from concurrent.futures import ThreadPoolExecutor
+
+from shybox.default.lib_default_generic import zip_backend, zip_workers, zip_level
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (asynchronous compression queue)
+_COMPRESSION_POOL = None
+_COMPRESSION_JOBS = {}
+_COMPRESSION_LOCK = threading.Lock()
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -81,21 +100,90 @@ def uncompress_and_remove(input_file: str, output_file: str = None, remove_origi
 
 # ----------------------------------------------------------------------------------------------------------------------
 # method to compress a file to .gz and remove the uncompressed file
-def compress_and_remove(input_file, output_file: str = None, remove_original: bool = True):
+def compress_and_remove(input_file, output_file: str = None, remove_original: bool = True,
+                        compress_level: int = zip_level, compress_backend: str = zip_backend):
 
     # if output_file is not provided, use the input_file name with .gz extension
     if output_file is None:
         output_file = input_file + '.gz'
 
-    # compress the file
-    with open(input_file, 'rb') as f_in:
-        with gzip.open(output_file, 'wb') as f_out:
-            shutil.copyfileobj(f_in, f_out)
+    # compress the file (to a partial file, renamed when completed)
+    output_part = output_file + '.part'
+    if compress_backend in ['auto', 'pigz'] and shutil.which('pigz') is not None:
+        # multithreaded block compressor (gzip-compatible output)
+        with open(output_part, 'wb') as f_out:
+            subprocess.run(['pigz', '-c', f'-{compress_level}', input_file], stdout=f_out, check=True)
+    elif compress_backend in ['auto', 'gzip', 'pigz']:
+        with open(input_file, 'rb') as f_in:
+            with gzip.open(output_part, 'wb', compresslevel=compress_level) as f_out:
+                shutil.copyfileobj(f_in, f_out, length=4 * 1024 ** 2)
+    else:
+        raise NotImplementedError(f'Compression backend "{compress_backend}" not available')
+    os.replace(output_part, output_file)
 
     # remove the uncompressed file
     if remove_original:
         os.remove(input_file)
 
+    return output_file
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to set the workers of the compression pool
+def set_compression_workers(workers: int = zip_workers) -> None:
+    global _COMPRESSION_POOL
+    wait_compression()
+    with _COMPRESSION_LOCK:
+        if _COMPRESSION_POOL is not None:
+            _COMPRESSION_POOL.shutdown(wait=True)
+        _COMPRESSION_POOL = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compression')
+
+
+# method to queue the compression of a file (zlib releases the GIL, so the pool runs in parallel)
+def submit_compress_and_remove(input_file, output_file: str = None, remove_original: bool = True, **kwargs):
+    global _COMPRESSION_POOL
+
+    if output_file is None:
+        output_file = input_file + '.gz'
+
+    # wait for a pending job on the same file
+    wait_compression(output_file)
+
+    with _COMPRESSION_LOCK:
+        if _COMPRESSION_POOL is None:
+            _COMPRESSION_POOL = ThreadPoolExecutor(max_workers=zip_workers, thread_name_prefix='compression')
+        job = _COMPRESSION_POOL.submit(compress_and_remove, input_file, output_file, remove_original, **kwargs)
+        _COMPRESSION_JOBS[output_file] = job
+
+    return job
+
+
+# method to wait the queued compression jobs (all the jobs or the job of a given file)
+def wait_compression(output_file: str = None) -> list:
+
+    with _COMPRESSION_LOCK:
+        if output_file is None:
+            jobs = list(_COMPRESSION_JOBS.items())
+        elif output_file in _COMPRESSION_JOBS:
+            jobs = [(output_file, _COMPRESSION_JOBS[output_file])]
+        else:
+            jobs = []
+
+    # get the results (errors of the workers are raised here)
+    file_list = []
+    for job_file, job in jobs:
+        try:
+            file_list.append(job.result())
+        finally:
+            with _COMPRESSION_LOCK:
+                if _COMPRESSION_JOBS.get(job_file) is job:
+                    _COMPRESSION_JOBS.pop(job_file)
+
+    return file_list
+
+
+# flush the queue before exiting
+atexit.register(wait_compression)
 # ----------------------------------------------------------------------------------------------------------------------
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -131,3 +219,51 @@ def zip_file_name(file_name_uncompress: str, file_name_compress: str) -> bool:
     return True
 
 # ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the checksum of a file (streamed by chunks)
+def checksum_file_name(file_name: str, chunk_size: int = 4 * 1024 ** 2) -> str:
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_name, 'rb') as file_handle:
+        for file_chunk in iter(lambda: file_handle.read(chunk_size), b''):
+            file_hash.update(file_chunk)
+    return file_hash.hexdigest()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to uncompress a file into the decompressed cache folder (keyed by checksum)
+def uncompress_to_cache(input_file: str, cache_folder: str, uncompress_ext: str = '.nc') -> str:
+
+    os.makedirs(cache_folder, exist_ok=True)
+
+    file_checksum = checksum_file_name(input_file)
+    output_file = os.path.join(cache_folder, file_checksum + uncompress_ext)
+
+    # decompress only once (atomic rename to avoid partially written files)
+    if not os.path.exists(output_file):
+        with tempfile.NamedTemporaryFile(dir=cache_folder, suffix='.tmp', delete=False) as f_out:
+            with gzip.open(input_file, 'rb') as f_in:
+                shutil.copyfileobj(f_in, f_out, length=4 * 1024 ** 2)
+        os.replace(f_out.name, output_file)
+
+    return output_file
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to open a compressed netcdf file (in memory or through the decompressed cache)
+def open_compressed_dataset(input_file: str, cache_folder: str = None, **kwargs) -> xr.Dataset:
+
+    # on-disk decompressed cache (reused by the following reads of the same archive)
+    if cache_folder is not None:
+        return xr.open_dataset(uncompress_to_cache(input_file, cache_folder), **kwargs)
+
+    # in-memory decompression (no temporary file)
+    with gzip.open(input_file, 'rb') as f_in:
+        file_bytes = f_in.read()
+    file_handle = netCDF4.Dataset(os.path.basename(input_file), mode='r', memory=file_bytes)
+
+    return xr.open_dataset(xr.backends.NetCDF4DataStore(file_handle), **kwargs)
+# ----------------------------------------------------------------------------------------------------------------------
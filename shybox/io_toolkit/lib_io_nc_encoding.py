@@ -0,0 +1,157 @@
+"""
+Library Features:
+
+Name:          lib_io_nc_encoding
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251201'
+Version:       '1.0.0'
+"""
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import os
+import time as tm
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from copy import deepcopy
+
+from shybox.default.lib_default_args import nc_encoding_profiles
+from shybox.logging_toolkit.lib_logging_utils import with_logger
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the encoding profile (name of a default profile or dictionary with overrides)
+@with_logger(var_name='logger_stream')
+def get_nc_profile(nc_encoding: (str, dict) = None) -> (dict, None):
+    """
+    The profile is a name ("fast-write", "small-size", "model-read-optimized") or a dictionary as
+    {"profile": "small-size", "complevel": 4, "chunks": {"time": 12}}; the keys of the dictionary override the
+    named profile (the chunks are merged). None means no profile (writers keep their compression settings).
+    Quantization is opt-in: "least_significant_digit" as the digits of all the float variables or as a dictionary
+    of digits by variable name (e.g. {"air_temperature": 2}).
+    """
+
+    if nc_encoding is None:
+        return None
+
+    if isinstance(nc_encoding, str):
+        nc_encoding = {'profile': nc_encoding}
+    elif not isinstance(nc_encoding, dict):
+        logger_stream.error('NetCDF encoding must be defined by a profile name or a dictionary')
+        raise TypeError('NetCDF encoding must be defined by a profile name or a dictionary')
+
+    nc_settings = dict(nc_encoding)
+    profile_name = nc_settings.pop('profile', None)
+    if profile_name is not None and profile_name not in nc_encoding_profiles:
+        logger_stream.error(f'NetCDF encoding profile "{profile_name}" is not available. '
+                            f'Allowed: {", ".join(nc_encoding_profiles)}')
+        raise NotImplementedError(f'NetCDF encoding profile "{profile_name}" is not available')
+
+    nc_profile = deepcopy(nc_encoding_profiles[profile_name]) if profile_name is not None else {}
+    nc_profile.setdefault('chunks', {})
+    for nc_key, nc_value in nc_settings.items():
+        if nc_key == 'chunks' and isinstance(nc_value, dict):
+            nc_profile['chunks'].update(nc_value)
+        else:
+            nc_profile[nc_key] = nc_value
+
+    return nc_profile
+
+
+# method to get the chunk sizes of a variable (full size for the dimensions not defined in the profile)
+def get_nc_chunks(dims: (list, tuple), shape: (list, tuple), chunks: dict = None,
+                  dim_time: str = 'time') -> (tuple, None):
+
+    if not dims:
+        return None
+    chunks = chunks if chunks is not None else {}
+
+    chunk_sizes = []
+    for dim_name, dim_size in zip(dims, shape):
+        chunk_size = chunks.get('time') if dim_name == dim_time else None
+        chunk_size = chunks.get(dim_name, chunk_size)
+        chunk_size = dim_size if chunk_size is None else min(int(chunk_size), dim_size)
+        chunk_sizes.append(max(1, chunk_size))
+
+    return tuple(chunk_sizes)
+
+
+# method to get the options of a netcdf4 variable (zlib, complevel, shuffle, least_significant_digit)
+# (the quantization is applied only to the float variables, var_quantize, defined in the profile)
+def get_nc_var_options(nc_profile: dict = None, compression_flag: bool = True, compression_level: int = 5,
+                       var_quantize: bool = True, var_name: str = None) -> dict:
+
+    if nc_profile is None:
+        return dict(zlib=compression_flag, complevel=compression_level)
+
+    var_options = dict(zlib=bool(nc_profile.get('zlib', compression_flag)),
+                       complevel=int(nc_profile.get('complevel', compression_level)),
+                       shuffle=bool(nc_profile.get('shuffle', True)))
+    var_digits = nc_profile.get('least_significant_digit')
+    if isinstance(var_digits, dict):
+        var_digits = var_digits.get(var_name)
+    if var_quantize and var_digits is not None:
+        var_options['least_significant_digit'] = int(var_digits)
+
+    return var_options
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the xarray encoding of a dataset (to_netcdf with the netcdf4 engine)
+def get_nc_encoding(data: xr.Dataset, nc_encoding: (str, dict) = None, dim_time: str = 'time') -> (dict, None):
+
+    nc_profile = get_nc_profile(nc_encoding)
+    if nc_profile is None:
+        return None
+
+    encoding = {}
+    for var_name in data.data_vars:
+        var_data = data[var_name]
+        if var_data.ndim == 0:
+            continue
+        var_quantize = np.issubdtype(var_data.dtype, np.floating)
+        encoding[var_name] = get_nc_var_options(nc_profile, var_quantize=var_quantize, var_name=var_name)
+        encoding[var_name]['chunksizes'] = get_nc_chunks(
+            var_data.dims, var_data.shape, nc_profile['chunks'], dim_time=dim_time)
+
+    return encoding
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to benchmark the encoding profiles (write time versus file size)
+def benchmark_nc_encoding(data: xr.Dataset, folder: str, profiles: list = None, repeat: int = 3,
+                          dim_time: str = 'time', remove: bool = True) -> pd.DataFrame:
+
+    if isinstance(data, xr.DataArray):
+        data = data.to_dataset(name=data.name if data.name is not None else 'data')
+    profiles = profiles if profiles is not None else [None] + list(nc_encoding_profiles)
+    os.makedirs(folder, exist_ok=True)
+
+    size_ref, bench_rows = None, []
+    for profile_id, profile in enumerate(profiles):
+        profile_tag = profile if isinstance(profile, str) else (
+            'default' if profile is None else f'custom_{profile_id}')
+        path = os.path.join(folder, f'benchmark_{profile_tag}.nc')
+
+        encoding = get_nc_encoding(data, profile, dim_time=dim_time)
+        write_times = []
+        for _ in range(max(1, int(repeat))):
+            if os.path.exists(path):
+                os.remove(path)
+            time_start = tm.perf_counter()
+            data.to_netcdf(path, format='NETCDF4', engine='netcdf4', encoding=encoding)
+            write_times.append(tm.perf_counter() - time_start)
+
+        file_size = os.path.getsize(path)
+        size_ref = file_size if size_ref is None else size_ref
+        bench_rows.append({'profile': profile_tag, 'write_time_s': float(np.min(write_times)),
+                           'size_mb': file_size / 1024 ** 2, 'size_ratio': file_size / size_ref})
+        if remove:
+            os.remove(path)
+
+    return pd.DataFrame(bench_rows).set_index('profile')
+# ----------------------------------------------------------------------------------------------------------------------
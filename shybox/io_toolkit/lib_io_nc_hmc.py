@@ -20,8 +20,10 @@ from netCDF4 import Dataset, date2num, num2date
 from shybox.default.lib_default_args import file_conventions, file_title, file_institution, file_source, \
     file_history, file_references, file_comment, file_email, file_web_site, file_project_info, file_algorithm
 from shybox.default.lib_default_args import time_units, time_calendar
-from shybox.io_toolkit.lib_io_gzip import define_compress_filename, compress_and_remove
+from shybox.io_toolkit.lib_io_gzip import (define_compress_filename, compress_and_remove,
+                                           submit_compress_and_remove, wait_compression)
 from shybox.io_toolkit.lib_io_nc_generic import get_dims_by_object, da_to_dset
+from shybox.io_toolkit.lib_io_nc_encoding import get_nc_profile, get_nc_var_options
 
 from shybox.logging_toolkit.lib_logging_utils import with_logger
 
@@ -84,7 +86,7 @@ def write_ts_hmc(
         var_data_units : str = 'm3 s-1', var_data_dim: str = 'sections', var_data_type : str = 'float64',
         var_data_fill_value: (float, int) = -9999.0,  var_data_no_value: (float, int) = -9999.0,
         var_name_crs: str = 'crs', crs_attrs: dict = crs_attrs_default,
-        var_compression_flag : bool = True, var_compression_level: int = 5,
+        var_compression_flag : bool = True, var_compression_level: int = 5, nc_encoding: (str, dict) = None,
         debug_flag : bool = True, **kwargs)  -> None:
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -221,7 +223,9 @@ def write_ts_hmc(
     var_data_obj = file_handle.createVariable(
         varname=var_data_name, datatype=var_data_type, fill_value=var_data_fill_value,
         dimensions=(var_time_dim, var_data_dim),
-        zlib=var_compression_flag, complevel=var_compression_level)
+        **get_nc_var_options(get_nc_profile(nc_encoding), var_compression_flag, var_compression_level,
+                             var_quantize=np.issubdtype(np.dtype(var_data_type), np.floating),
+                             var_name=var_data_name))
     var_data_obj.units = var_data_units
     var_data_obj.no_data = var_data_no_value
 
@@ -262,16 +266,32 @@ def write_dataset_hmc(
         attrs_data: dict = None, attrs_system: dict = None, attrs_x: dict = None, attrs_y: dict = None,
         file_format: str = 'NETCDF4', time_format: str ='%Y%m%d%H%M',
         compression_flag: bool =True, compression_level: int = 5,
-        file_compression: bool =True, file_update: bool = True,
+        file_compression: bool =True, file_update: bool = True, file_compression_async: bool = False,
         var_system: str ='crs',
         var_time: str = 'time', var_x: str = 'longitude', var_y: str = 'latitude',
         dim_time: str = 'time', dim_x: str = 'west_east', dim_y: str = 'south_north',
-        type_time: str = 'float64', type_x: str = 'float64', type_y: str = 'float64',
+        type_time: str = 'float64', type_x: str = 'float64', type_y: str = 'float64', type_data: str = None,
+        chunk_time: int = 1, nc_encoding: (str, dict) = None,
         debug_geo: bool = False, debug_data: bool = False, **kwargs):
+    """
+    Variables are written in the HMC orientation (rows flipped) through a strided view of the data, one block of
+    chunk_time steps at a time; each block is copied in a buffer of the output type (type_data, or the "format"
+    of attrs_data, default "f4"), where the fill_value is set. The NetCDF chunks are aligned to the blocks, so the
+    memory used depends on chunk_time and not on the number of time steps (also for dask-backed datasets).
+    The nc_encoding profile (if any) replaces the compression settings and the chunk_time.
+    """
+
+    # manage encoding profile (compression, shuffle, quantization and time chunks)
+    nc_profile = get_nc_profile(nc_encoding)
+    geo_options = get_nc_var_options(nc_profile, compression_flag, compression_level, var_quantize=False)
+    if nc_profile is not None and nc_profile['chunks'].get('time') is not None:
+        chunk_time = nc_profile['chunks']['time']
 
     # manage file path
     path_unzip = path
     path_zip = define_compress_filename(path, remove_ext=False, uncompress_ext='.nc', compress_ext='.gz')
+    # wait a queued compression of the same file (if any)
+    wait_compression(path_zip)
     if file_update:
         if os.path.exists(path_zip):
             os.remove(path_zip)
@@ -318,7 +338,8 @@ def write_dataset_hmc(
         x, y = data[tmp_x].values, data[tmp_y].values
 
     if len(x.shape) == 1 and len(y.shape) == 1:
-        x, y = np.meshgrid(x, y)
+        # broadcast views (no meshgrid copies)
+        x, y = np.broadcast_to(x[np.newaxis, :], (y.size, x.size)), np.broadcast_to(y[:, np.newaxis], (y.size, x.size))
     elif len(x.shape) == 2 and len(y.shape) == 2:
         pass
     else:
@@ -329,8 +350,13 @@ def write_dataset_hmc(
 
     # Define time dimension
     if time is not None:
-        # define time reference
-        time_period = [np.array(time)]
+        # define time reference (time steps of the data for the multi-step cubes)
+        if isinstance(time, pd.DatetimeIndex):
+            time_period = list(time)
+        elif n_time > 1 and dim_time in data.coords:
+            time_period = list(pd.DatetimeIndex(data[dim_time].values))
+        else:
+            time_period = [np.array(time)]
         time_labels = []
         for time_step in time_period:
             time_tmp = pd.to_datetime(str(time_step)).strftime(time_format)
@@ -418,8 +444,7 @@ def write_dataset_hmc(
     # variable geo x
     set_scale_factor = False
     variable_x = handle.createVariable(
-        varname='longitude', dimensions=(dim_y, dim_x), datatype=type_x,
-        zlib=compression_flag, complevel=compression_level)
+        varname='longitude', dimensions=(dim_y, dim_x), datatype=type_x, **geo_options)
     if attrs_x is not None:
         for attr_key, attr_value in attrs_x.items():
             if attr_key == 'scale_factor':
@@ -432,7 +457,7 @@ def write_dataset_hmc(
             else:
                 variable_x.setncattr(attr_key.lower(), str(attr_value).lower())
 
-    variable_x[:, :] = np.transpose(np.rot90(x, -1))
+    variable_x[:, :] = x[::-1, :]
 
     if not set_scale_factor:
         variable_x.setncattr('scale_factor', 1)
@@ -440,8 +465,7 @@ def write_dataset_hmc(
     # variable geo y
     set_scale_factor = False
     variable_y = handle.createVariable(
-        varname='latitude', dimensions=(dim_y, dim_x), datatype=type_y,
-        zlib=compression_flag, complevel=compression_level)
+        varname='latitude', dimensions=(dim_y, dim_x), datatype=type_y, **geo_options)
     if attrs_y is not None:
         for attr_key, attr_value in attrs_y.items():
             if attr_key == 'scale_factor':
@@ -454,7 +478,7 @@ def write_dataset_hmc(
             else:
                 variable_y.setncattr(attr_key.lower(), str(attr_value).lower())
 
-    variable_y[:, :] = np.transpose(np.rot90(y, -1))
+    variable_y[:, :] = y[::-1, :]
 
     if not set_scale_factor:
         variable_y.setncattr('scale_factor', 1)
@@ -475,11 +499,12 @@ def write_dataset_hmc(
     # iterate over variables
     for variable_name in data.data_vars:
 
-        variable_data = data[variable_name].values
-        variable_dims = variable_data.ndim
+        # data object (numpy or dask array, read one block at a time)
+        variable_obj = data[variable_name].data
+        variable_dims = variable_obj.ndim
 
         # debug data
-        if debug_data: plot_data(variable_data, var_name=variable_name)
+        if debug_data: plot_data(data[variable_name].values, var_name=variable_name)
 
         attrs_variable = {}
         if variable_name in list(attrs_data.keys()):
@@ -488,6 +513,8 @@ def write_dataset_hmc(
         variable_format = 'f4'
         if 'format' in list(attrs_data.keys()):
             variable_format = attrs_data['format']
+        if type_data is not None:
+            variable_format = type_data
 
         fill_value = -9999.0
         if 'fill_value' in list(attrs_data.keys()):
@@ -496,30 +523,28 @@ def write_dataset_hmc(
         if 'scale_factor' in list(attrs_data.keys()):
             scale_factor = attrs_data['scale_factor']
 
-        variable_data[np.isnan(variable_data)] = fill_value
-        variable_data[variable_data <= fill_value] = fill_value
-
-        '''
-        import matplotlib
-        matplotlib.use('TkAgg')
-        import matplotlib.pylab as plt
-        plt.figure()
-        plt.imshow(variable_data); plt.colorbar()
-        plt.show()
-        '''
+        # buffer type (float formats are filled directly, other formats are cast by the netcdf library)
+        variable_type = np.dtype(variable_format)
+        # variable options (quantization only for the float formats)
+        var_options = get_nc_var_options(
+            nc_profile, compression_flag, compression_level,
+            var_quantize=np.issubdtype(variable_type, np.floating), var_name=variable_name)
+        if not np.issubdtype(variable_type, np.floating):
+            variable_type = np.result_type(variable_obj.dtype, np.float32)
 
         if variable_dims == 3:
+            chunk_step = max(1, min(int(chunk_time), n_time))
             var_handle = handle.createVariable(
                 varname=variable_name, datatype=variable_format, fill_value=fill_value,
-                dimensions=(dim_time, dim_y, dim_x),
-                zlib=compression_flag, complevel=compression_level)
+                dimensions=(dim_time, dim_y, dim_x), chunksizes=(chunk_step, n_rows, n_cols), **var_options)
         elif variable_dims == 2:
+            chunk_step = 1
             var_handle = handle.createVariable(
                 varname=variable_name, datatype=variable_format, fill_value=fill_value,
-                dimensions=(dim_y, dim_x),
-                zlib=compression_flag, complevel=compression_level)
+                dimensions=(dim_y, dim_x), chunksizes=(n_rows, n_cols), **var_options)
         else:
             logger_stream.error('Variable dimensions not expected. Case not implemented yet')
+            raise NotImplementedError('Case not implemented yet')
 
         set_scale_factor = False
         for attr_key, attr_value in attrs_variable.items():
@@ -538,47 +563,32 @@ def write_dataset_hmc(
                 var_handle.setncattr('scale_factor', scale_factor)
 
         if variable_dims == 3:
-
-            variable_tmp = np.zeros((n_time, n_rows, n_cols))
-            for i, t in enumerate(time.values):
-                tmp_data = variable_data[i, :, :]
-                tmp_data = np.transpose(np.rot90(tmp_data, -1))
-                variable_tmp[i, :, :] = tmp_data
-
-                '''
-                import matplotlib
-                matplotlib.use('TkAgg')
-                plt.figure()
-                plt.imshow(dset_data[variable_name].values[i, :, :])
-                plt.colorbar(); plt.clim(2, 20)
-                plt.figure()
-                plt.imshow(variable_data[i, :, :])
-                plt.colorbar(); plt.clim(2, 20)
-                plt.figure()
-                plt.imshow(tmp_data)
-                plt.colorbar(); plt.clim(2, 20)
-                plt.figure()
-                plt.imshow(variable_tmp[i, :, :])
-                plt.colorbar(); plt.clim(2, 20)
-                plt.show()
-                '''
-
-            variable_tmp[np.isnan(variable_tmp)] = fill_value
-            var_handle[:, :, :] = variable_tmp
+            # hmc orientation as a strided view of the cube (rows flipped), written block by block
+            variable_view = variable_obj[:, ::-1, :]
+            variable_tmp = np.empty((chunk_step, n_rows, n_cols), dtype=variable_type)
+            for i_start in range(0, n_time, chunk_step):
+                i_end = min(i_start + chunk_step, n_time)
+                block_tmp = variable_tmp[:i_end - i_start]
+                np.copyto(block_tmp, np.asarray(variable_view[i_start:i_end]), casting='unsafe')
+                block_tmp[np.isnan(block_tmp) | (block_tmp <= fill_value)] = fill_value
+                var_handle[i_start:i_end, :, :] = block_tmp
 
         elif variable_dims == 2:
-            variable_tmp = np.transpose(np.rot90(variable_data, -1))
-            variable_tmp[np.isnan(variable_tmp)] = fill_value
+            variable_tmp = np.empty((n_rows, n_cols), dtype=variable_type)
+            np.copyto(variable_tmp, np.asarray(variable_obj[::-1, :]), casting='unsafe')
+            variable_tmp[np.isnan(variable_tmp) | (variable_tmp <= fill_value)] = fill_value
             var_handle[:, :] = variable_tmp
-        else:
-            logger_stream.error('Data dimensions not expected. Case not implemented yet')
 
     # close file
     handle.close()
 
     # if needed compress the file
     if file_compression:
-        compress_and_remove(path_unzip, path_zip, remove_original=True)
+        if file_compression_async:
+            # queue the compression (the next time step is processed in the meantime)
+            submit_compress_and_remove(path_unzip, path_zip, remove_original=True)
+        else:
+            compress_and_remove(path_unzip, path_zip, remove_original=True)
 
 # ----------------------------------------------------------------------------------------------------------------------
 
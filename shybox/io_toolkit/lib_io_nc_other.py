@@ -9,11 +9,13 @@ Version:       '1.0.0'
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
 import os.path
+import numpy as np
 import xarray as xr
 import pandas as pd
 
 from copy import deepcopy
 
+from shybox.io_toolkit.lib_io_nc_encoding import get_nc_profile, get_nc_chunks, get_nc_var_options
 from shybox.logging_toolkit.lib_logging_utils import with_logger
 # ----------------------------------------------------------------------------------------------------------------------
 
@@ -25,13 +27,13 @@ def write_dataset_itwater(path: str, data: xr.Dataset, time: pd.DatetimeIndex, a
                           dim_time: str = 'nt', dim_x: str = 'lon', dim_y: str = 'lat',
                           dset_mode: str ='w', dset_engine: str = 'netcdf4',
                           dset_compression: int =5, dset_format: str ='NETCDF4',
-                          no_data = -9999, **kwargs) -> None:
+                          no_data = -9999, nc_encoding: (str, dict) = None, **kwargs) -> None:
 
     if os.path.exists(path):
         os.remove(path)
 
     data = data.rename({"longitude": dim_x, "latitude": dim_y, "time": dim_time})
-    encoded = dict(zlib=True, complevel=dset_compression)
+    nc_profile = get_nc_profile(nc_encoding)
 
     encoding = {}
     for var_name in data.data_vars:
@@ -43,7 +45,9 @@ def write_dataset_itwater(path: str, data: xr.Dataset, time: pd.DatetimeIndex, a
 
         var_data = data[var_name]
         if len(var_data.dims) > 0:
-            encoding[var_name] = deepcopy(encoded)
+            encoding[var_name] = get_nc_var_options(
+                nc_profile, compression_flag=True, compression_level=dset_compression,
+                var_quantize=np.issubdtype(var_data.dtype, np.floating), var_name=var_name)
 
         #if '_FillValue' not in list(dset_encoding[var_name].keys()):
         #    dset_encoding[var_name]['_FillValue'] = no_data
@@ -53,6 +57,14 @@ def write_dataset_itwater(path: str, data: xr.Dataset, time: pd.DatetimeIndex, a
 
     data = data.transpose(dim_time, dim_x, dim_y)
 
+    if nc_profile is not None:
+        for var_name in list(encoding.keys()):
+            if var_name == dim_time:
+                continue
+            var_data = data[var_name]
+            encoding[var_name]['chunksizes'] = get_nc_chunks(
+                var_data.dims, var_data.shape, nc_profile['chunks'], dim_time=dim_time)
+
     data.to_netcdf(path=path, format=dset_format, mode=dset_mode, engine=dset_engine, encoding=encoding)
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -19,7 +19,9 @@ from netCDF4 import Dataset, date2num
 from shybox.default.lib_default_args import file_conventions, file_title, file_institution, file_source, \
     file_history, file_references, file_comment, file_email, file_web_site, file_project_info, file_algorithm
 from shybox.default.lib_default_args import time_units, time_calendar
-from shybox.io_toolkit.lib_io_gzip import define_compress_filename, compress_and_remove
+from shybox.io_toolkit.lib_io_gzip import (define_compress_filename, compress_and_remove,
+                                           submit_compress_and_remove, wait_compression)
+from shybox.io_toolkit.lib_io_nc_encoding import get_nc_profile, get_nc_chunks, get_nc_var_options
 
 from shybox.logging_toolkit.lib_logging_utils import with_logger
 
@@ -33,17 +35,25 @@ def write_dataset_s3m(
         path, data, time: (pd.DatetimeIndex, pd.Timestamp) = None,
         attrs_data: dict = None, attrs_system: dict = None, attrs_x: dict = None, attrs_y: dict = None,
         file_format: str = 'NETCDF4', time_format: str ='%Y%m%d%H%M',
-        file_compression: bool = True, file_update: bool = True,
+        file_compression: bool = True, file_update: bool = True, file_compression_async: bool = False,
         compression_flag: bool = True, compression_level: int = 5,
         var_system: str = 'crs',
         var_time: str = 'time', var_x: str = 'X', var_y: str = 'Y',
         dim_time: str = 'time', dim_x: str = 'X', dim_y: str = 'Y',
         type_time: str = 'float64',
-        type_terrain: str = 'float64', type_x: str = 'float64', type_y: str = 'float64', **kwargs):
+        type_terrain: str = 'float64', type_x: str = 'float64', type_y: str = 'float64',
+        nc_encoding: (str, dict) = None, **kwargs):
+
+    # manage encoding profile (compression, shuffle, quantization and chunks)
+    nc_profile = get_nc_profile(nc_encoding)
+    geo_options = get_nc_var_options(nc_profile, compression_flag, compression_level, var_quantize=False)
+    var_chunks = nc_profile['chunks'] if nc_profile is not None else None
 
     # manage file path
     path_unzip = path
     path_zip = define_compress_filename(path, remove_ext=False, uncompress_ext='.nc', compress_ext='.gz')
+    # wait a queued compression of the same file (if any)
+    wait_compression(path_zip)
     if file_update:
         if os.path.exists(path_zip):
             os.remove(path_zip)
@@ -172,8 +182,7 @@ def write_dataset_s3m(
 
     # variable geo x
     variable_x = handle.createVariable(
-        varname='longitude', dimensions=(dim_y, dim_x), datatype=type_x,
-        zlib=compression_flag, complevel=compression_level, fill_value=-9999.0)
+        varname='longitude', dimensions=(dim_y, dim_x), datatype=type_x, fill_value=-9999.0, **geo_options)
 
     set_scale_factor = False, False
     if attrs_x is not None:
@@ -194,8 +203,7 @@ def write_dataset_s3m(
 
     # variable geo y
     variable_y = handle.createVariable(
-        varname='latitude', dimensions=(dim_y, dim_x), datatype=type_y,
-        zlib=compression_flag, complevel=compression_level)
+        varname='latitude', dimensions=(dim_y, dim_x), datatype=type_y, **geo_options)
 
     set_scale_factor = False
     if attrs_y is not None:
@@ -217,8 +225,7 @@ def write_dataset_s3m(
     # variable terrain
     if terrain is not None:
         variable_terrain = handle.createVariable(
-            varname='terrain', dimensions=(dim_y, dim_x), datatype=type_terrain,
-            zlib=compression_flag, complevel=compression_level, fill_value=-9999.0)
+            varname='terrain', dimensions=(dim_y, dim_x), datatype=type_terrain, fill_value=-9999.0, **geo_options)
 
         set_scale_factor = False
         if attrs_x is not None:
@@ -273,6 +280,15 @@ def write_dataset_s3m(
         variable_data[np.isnan(variable_data)] = fill_value
         variable_data[variable_data <= fill_value] = fill_value
 
+        # variable options (quantization only for the float formats, chunks only if defined by the profile)
+        var_options = get_nc_var_options(
+            nc_profile, compression_flag, compression_level,
+            var_quantize=np.issubdtype(np.dtype(variable_format), np.floating), var_name=variable_name)
+        if var_chunks is not None:
+            var_options['chunksizes'] = get_nc_chunks(
+                (dim_time, dim_y, dim_x)[-variable_dims:], (n_time, n_rows, n_cols)[-variable_dims:],
+                var_chunks, dim_time)
+
         '''
         import matplotlib
         matplotlib.use('TkAgg')
@@ -285,13 +301,11 @@ def write_dataset_s3m(
         if variable_dims == 3:
             var_handle = handle.createVariable(
                 varname=variable_name, datatype=variable_format, fill_value=fill_value,
-                dimensions=(dim_time, dim_y, dim_x),
-                zlib=compression_flag, complevel=compression_level)
+                dimensions=(dim_time, dim_y, dim_x), **var_options)
         elif variable_dims == 2:
             var_handle = handle.createVariable(
                 varname=variable_name, datatype=variable_format, fill_value=fill_value,
-                dimensions=(dim_y, dim_x),
-                zlib=compression_flag, complevel=compression_level)
+                dimensions=(dim_y, dim_x), **var_options)
         else:
             raise NotImplementedError('Case not implemented yet')
 
@@ -352,6 +366,10 @@ def write_dataset_s3m(
 
     # if needed compress the file
     if file_compression:
-        compress_and_remove(path_unzip, path_zip, remove_original=True)
+        if file_compression_async:
+            # queue the compression (the next time step is processed in the meantime)
+            submit_compress_and_remove(path_unzip, path_zip, remove_original=True)
+        else:
+            compress_and_remove(path_unzip, path_zip, remove_original=True)
 
 # ----------------------------------------------------------------------------------------------------------------------
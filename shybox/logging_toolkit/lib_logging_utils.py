@@ -10,11 +10,17 @@ Version:       '1.0.0'
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
 import logging
+import contextvars
 from functools import wraps
 
 from shybox.logging_toolkit.logging_handler import LoggingManager
 # ----------------------------------------------------------------------------------------------------------------------
 
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (logger of the running decorated call, private to each thread/context)
+_LOGGER_CONTEXT = contextvars.ContextVar('shybox_logger', default=None)
+# ----------------------------------------------------------------------------------------------------------------------
+
 # ----------------------------------------------------------------------------------------------------------------------
 # helper to get default log
 def _get_default_log():
@@ -35,6 +41,9 @@ def with_logger(var_name: str = "log"):
     Decorator that makes a logger variable (default name 'log') available
     inside the decorated function, without passing it as a parameter.
     If LoggingManager is not active, falls back to standard logging.getLogger().
+    The variable is a proxy installed once in the module globals; the logger of
+    each call is kept in a context variable, so concurrent calls (threads) do not
+    overwrite or remove the logger of each other.
     """
 
     def decorator(func):
@@ -46,20 +55,40 @@ def with_logger(var_name: str = "log"):
                 logger = logging.getLogger("default")
 
             func_globals = func.__globals__
-            original = func_globals.get(var_name, None)
+            if not isinstance(func_globals.get(var_name, None), _LoggerProxy):
+                # keep a module logger (if any) as fallback outside the decorated calls
+                func_globals[var_name] = _LoggerProxy(func_globals.get(var_name, None))
+
+            token = _LOGGER_CONTEXT.set(logger)
             try:
-                func_globals[var_name] = logger
                 return func(*args, **kwargs)
             finally:
                 # Restore state
-                if original is None:
-                    func_globals.pop(var_name, None)
-                else:
-                    func_globals[var_name] = original
+                _LOGGER_CONTEXT.reset(token)
         return wrapper
     return decorator
 # ----------------------------------------------------------------------------------------------------------------------
 
+# ----------------------------------------------------------------------------------------------------------------------
+# class to resolve the logger of the running decorated call (module fallback or default logger otherwise)
+class _LoggerProxy:
+
+    def __init__(self, fallback=None) -> None:
+        self._fallback = fallback
+
+    def _get_logger(self):
+        logger = _LOGGER_CONTEXT.get()
+        if logger is None:
+            logger = self._fallback if self._fallback is not None else _get_default_log()
+        return logger
+
+    def __getattr__(self, name):
+        return getattr(self._get_logger(), name)
+
+    def __repr__(self):
+        return f'_LoggerProxy({self._get_logger()!r})'
+# ----------------------------------------------------------------------------------------------------------------------
+
 # ----------------------------------------------------------------------------------------------------------------------
 # global helper to get logger
 def get_log() -> logging.Logger:
@@ -0,0 +1,233 @@
+"""
+Library Features:
+
+Name:          lib_orchestrator_executor
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251125'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import os
+import time
+import threading
+import traceback
+import multiprocessing as mp
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable
+
+from shybox.logging_toolkit.lib_logging_utils import with_logger
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (executor types and worker function of the process pool)
+EXECUTOR_TYPES = ['serial', 'thread', 'process']
+# executors of the orchestrator time steps (the steps share mutable datasets and process containers, so the
+# thread pool is not allowed; the forked workers of the process pool get their own copy of the state)
+STEP_EXECUTOR_TYPES = ['serial', 'process']
+
+_WORKER_FX = None
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to keep the writes of the time steps in order (step n writes after the steps 0..n-1 are completed)
+class StepOrder:
+
+    def __init__(self, n_steps: int, shared: bool = False) -> None:
+        # shared objects are inherited by the forked workers of the process pool
+        if shared:
+            ctx = mp.get_context('fork')
+            self._cond = ctx.Condition()
+            self._next = ctx.Value('i', 0, lock=False)
+            self._done = ctx.Array('b', max(n_steps, 1), lock=False)
+        else:
+            self._cond = threading.Condition()
+            self._next = None
+            self._done = [False] * max(n_steps, 1)
+        self._next_local = 0
+
+    def _get_next(self) -> int:
+        return self._next.value if self._next is not None else self._next_local
+
+    def _set_next(self, value: int) -> None:
+        if self._next is not None:
+            self._next.value = value
+        else:
+            self._next_local = value
+
+    # method to wait until all the previous steps are completed
+    def wait_turn(self, step_id: (int, None)) -> None:
+        if step_id is None:
+            return
+        with self._cond:
+            while self._get_next() < step_id:
+                self._cond.wait()
+
+    # method to mark a step as completed (and release the following steps)
+    def done(self, step_id: (int, None)) -> None:
+        if step_id is None:
+            return
+        with self._cond:
+            self._done[step_id] = True
+            step_next = self._get_next()
+            while step_next < len(self._done) and self._done[step_next]:
+                step_next += 1
+            self._set_next(step_next)
+            self._cond.notify_all()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the number of workers
+def get_workers(workers: (int, None) = None, n_steps: int = None) -> int:
+    if workers is None or workers <= 0:
+        workers = os.cpu_count() or 1
+    if n_steps is not None:
+        workers = min(workers, max(n_steps, 1))
+    return int(workers)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to run a single step and collect its report (status, elapsed time, error and result of the step)
+def run_step(fx_step: Callable, step_id: int, step_obj) -> dict:
+
+    step_report = {'id': step_id, 'step': step_obj, 'status': 'done', 'elapsed': None, 'result': None,
+                   'error': None, 'traceback': None, 'pid': os.getpid(), 'thread': threading.current_thread().name}
+
+    time_start = time.perf_counter()
+    try:
+        # the result is returned to the parent process (picklable objects, e.g. the statistics of the worker)
+        step_report['result'] = fx_step(step_obj, step_id)
+    except BaseException as exc:
+        step_report['status'] = 'failed'
+        step_report['error'] = f'{type(exc).__name__}: {exc}'
+        step_report['traceback'] = traceback.format_exc()
+    finally:
+        step_report['elapsed'] = time.perf_counter() - time_start
+
+    return step_report
+
+
+# method to run a single step in a forked worker (the step function is inherited, not pickled)
+def _run_step_worker(step_id: int, step_obj) -> dict:
+    return run_step(_WORKER_FX, step_id, step_obj)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to run the steps with the selected executor (reports are returned in the steps order)
+@with_logger(var_name='logger_stream')
+def run_steps(fx_step: Callable, steps: list,
+              executor: str = 'serial', workers: (int, None) = None, stop_on_error: bool = True) -> list:
+
+    global _WORKER_FX
+
+    if executor not in EXECUTOR_TYPES:
+        logger_stream.error(f'Executor "{executor}" is not available. Allowed: {EXECUTOR_TYPES}')
+        raise NotImplementedError(f'Executor "{executor}" is not available')
+
+    if executor == 'process' and 'fork' not in mp.get_all_start_methods():
+        logger_stream.warning('Executor "process" needs the "fork" start method; the "serial" executor is used')
+        executor = 'serial'
+
+    # serial execution (errors stop the loop as in the step by step run)
+    if executor == 'serial':
+        step_collections = []
+        for step_id, step_obj in enumerate(steps):
+            step_report = run_step(fx_step, step_id, step_obj)
+            step_collections.append(step_report)
+            if step_report['status'] == 'failed' and stop_on_error:
+                break
+        return step_collections
+
+    workers = get_workers(workers, len(steps))
+
+    if executor == 'thread':
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='step') as pool:
+            step_futures = [pool.submit(run_step, fx_step, step_id, step_obj)
+                            for step_id, step_obj in enumerate(steps)]
+            step_collections = [step_future.result() for step_future in step_futures]
+    else:
+        _WORKER_FX = fx_step
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('fork')) as pool:
+                step_futures = [pool.submit(_run_step_worker, step_id, step_obj)
+                                for step_id, step_obj in enumerate(steps)]
+                step_collections = [step_future.result() for step_future in step_futures]
+        finally:
+            _WORKER_FX = None
+
+    return step_collections
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to sort the nodes of a graph (parents before children, ties in the graph order)
+def _sort_graph(graph: dict) -> (list, list):
+
+    nodes_sorted, nodes_done = [], set()
+    while len(nodes_sorted) < len(graph):
+        nodes_ready = [node for node, parents in graph.items()
+                       if node not in nodes_done and all(parent in nodes_done for parent in parents)]
+        if not nodes_ready:
+            return nodes_sorted, [node for node in graph if node not in nodes_done]
+        nodes_sorted.extend(nodes_ready)
+        nodes_done.update(nodes_ready)
+
+    return nodes_sorted, []
+
+
+# method to find the nodes of a graph involved in a cycle (empty if the graph is acyclic)
+def find_graph_cycle(graph: dict) -> list:
+    return _sort_graph(graph)[1]
+
+
+# method to sort the nodes of a graph (errors if the graph has a cycle)
+@with_logger(var_name='logger_stream')
+def sort_graph(graph: dict) -> list:
+
+    nodes_sorted, nodes_cycle = _sort_graph(graph)
+    if nodes_cycle:
+        logger_stream.error(f'Dependencies graph has a cycle between the nodes {nodes_cycle}')
+        raise RuntimeError(f'Dependencies graph has a cycle between the nodes {nodes_cycle}')
+
+    return nodes_sorted
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to run the nodes of a graph in a thread pool (a node starts when all its parents are completed)
+def run_graph(fx_node: Callable, graph: dict, workers: (int, None) = None) -> dict:
+
+    # check the graph (cycles) and get the submission order
+    nodes_order = sort_graph(graph)
+    workers = get_workers(workers, len(nodes_order))
+
+    nodes_result, nodes_running = {}, {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='variable') as pool:
+        while len(nodes_result) < len(nodes_order):
+
+            # submit the ready nodes (in the graph order)
+            for node in nodes_order:
+                if node in nodes_result or node in nodes_running.values():
+                    continue
+                if all(parent in nodes_result for parent in graph[node]):
+                    nodes_running[pool.submit(fx_node, node)] = node
+
+            # collect the completed nodes (errors cancel the pending nodes)
+            nodes_completed, _ = wait(list(nodes_running), return_when=FIRST_COMPLETED)
+            for node_future in nodes_completed:
+                node = nodes_running.pop(node_future)
+                try:
+                    nodes_result[node] = node_future.result()
+                except BaseException:
+                    for node_pending in nodes_running:
+                        node_pending.cancel()
+                    raise
+
+    return nodes_result
+# ----------------------------------------------------------------------------------------------------------------------
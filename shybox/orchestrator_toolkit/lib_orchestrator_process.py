@@ -10,9 +10,12 @@ Version:       '1.0.0'
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
 import datetime as dt
+import threading
+import weakref
 from copy import deepcopy
 from typing import Callable
 from functools import partial
+from contextlib import nullcontext
 
 import numpy as np
 import pandas as pd
@@ -22,11 +25,18 @@ from shybox.generic_toolkit.lib_utils_geo import match_coords_to_reference
 from shybox.generic_toolkit.lib_utils_debug import plot_data
 
 from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+from shybox.processing_toolkit.lib_proc_sparse_grid import SparseGrid, to_grid
 from shybox.logging_toolkit.logging_handler import LoggingManager
 
 from shybox.logging_toolkit.lib_logging_utils import with_logger
 # ----------------------------------------------------------------------------------------------------------------------
 
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (locks of the datasets read by concurrent variable chains)
+_DATA_LOCKS = weakref.WeakKeyDictionary()
+_DATA_LOCKS_GUARD = threading.Lock()
+# ----------------------------------------------------------------------------------------------------------------------
+
 # ----------------------------------------------------------------------------------------------------------------------
 # class to handle the process
 class ProcessorContainer:
@@ -90,6 +100,16 @@ class ProcessorContainer:
         # set delimiter
         self.variable_delimiter = '#'
 
+        # set profiler (assigned by the orchestrator)
+        self.profiler = None
+
+        # set sparse state (sparse input/output of the function, sparse output kept for the next process)
+        self.sparse_in = getattr(function, 'input_type', None) == 'sparse'
+        self.sparse_out = getattr(function, 'output_type', None) == 'sparse'
+        self.sparse_keep = False
+        # set output state (temporary output created by the orchestrator)
+        self.out_temp = False
+
         # set dump state
         self.dump_state = False
         # set debug state
@@ -100,8 +120,22 @@ class ProcessorContainer:
     def __repr__(self):
         return f'ProcessorContainer({self.fx_name, self.reference, self.tag, self.workflow})'
 
+    # method to profile a phase of the process (no cost if the profiler is not active)
+    def profile(self, phase: str, variable: str = None, time=None):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.measure(self.fx_name, variable, time, phase=phase)
+
     # method to run the process
-    def run(self, time: (dt.datetime, str, pd.Timestamp), **kwargs) -> (None, None):
+    def run(self, time: (dt.datetime, str, pd.Timestamp, pd.DatetimeIndex), **kwargs) -> (None, None):
+
+        # check period information (the whole period is read and processed in one pass)
+        time_period = None
+        if isinstance(time, pd.DatetimeIndex):
+            if len(time) == 0:
+                self.logger.error('Time period is defined by an empty DatetimeIndex')
+                raise ValueError('Time period is defined by an empty DatetimeIndex')
+            time_period, time = time, time[0]
 
         # check time information
         if isinstance(time, pd.Timestamp):
@@ -120,6 +154,11 @@ class ProcessorContainer:
         if isinstance(time, list):
             if len(time) == 1: time = time[0]
 
+        # get the sparse data of the previous process (used only by the sparse processes)
+        data_sparse = kwargs.pop('data_sparse', None)
+        if not self.sparse_in:
+            data_sparse = None
+
         # get information about id and variable(s)
         fx_id = kwargs['id']
         fx_variable_name, fx_variable_wf = kwargs['reference'].split(':')
@@ -242,6 +281,8 @@ class ProcessorContainer:
                 time_str = f"from {time[0]} to {time[-1]}"
         else:
             time_str = str(time)
+        if time_period is not None:
+            time_str = f"from {time_period[0]} to {time_period[-1]}"
 
         # info process start
         self.logger.info_up(
@@ -251,8 +292,15 @@ class ProcessorContainer:
         if fx_id != 0:
             kwargs['memory_active'] = False
 
-        # get the data (using the class signature)
-        if isinstance(data_raw, list):
+        # get the data (using the class signature or the sparse data of the previous process)
+        if data_sparse is not None:
+
+            # sparse data passed by the previous process (nothing to read)
+            fx_data, fx_deps, fx_other = data_sparse, [], {}
+            # create metadata
+            fx_metadata = {'fx_variable': data_sparse.name}
+
+        elif isinstance(data_raw, list):
 
             # normalize data to list of DataLocal (if needed)
             data_list = _normalize_local_data(data_raw)
@@ -290,10 +338,12 @@ class ProcessorContainer:
                 # manage variable mapping
                 kwargs['variable'] = str_var_tmp
 
-                # update logger (for messages consistency)
-                data_tmp.logger = self.logger.compare(data_tmp.logger)
-                # read data
-                fx_tmp = data_tmp.get_data(time=time_tmp, name=str_var_tmp, **kwargs)
+                # read data (the dataset state is shared by the chains reading the same object)
+                with _get_data_lock(data_tmp), self.profile('read', fx_variable_trace, time_tmp):
+                    # update logger (for messages consistency)
+                    data_tmp.logger = self.logger.compare(data_tmp.logger)
+                    fx_tmp = data_tmp.get_data(
+                        time=time_period if time_period is not None else time_tmp, name=str_var_tmp, **kwargs)
                 fx_deps.append(str_var_tmp)
 
                 # convert to DataArray if single variable
@@ -330,10 +380,12 @@ class ProcessorContainer:
             # manage variable mapping
             kwargs['variable'] = var_name
 
-            # update logger (for messages consistency)
-            data_raw.logger = self.logger.compare(data_raw.logger)
-            # get data
-            fx_data = data_raw.get_data(time=time, name=var_name, **kwargs)
+            # get data (the dataset state is shared by the chains reading the same object)
+            with _get_data_lock(data_raw), self.profile('read', fx_variable_trace, time):
+                # update logger (for messages consistency)
+                data_raw.logger = self.logger.compare(data_raw.logger)
+                fx_data = data_raw.get_data(
+                    time=time_period if time_period is not None else time, name=var_name, **kwargs)
             fx_deps = []
 
             # convert to DataArray if single variable
@@ -383,7 +435,7 @@ class ProcessorContainer:
 
         # collect and prepare function arguments
         fx_args = {arg_name: arg_value for arg_name, arg_value in self.fx_args.items()}
-        fx_args['time'] = time
+        fx_args['time'] = time_period if time_period is not None else time
         fx_args['ref'] = self.fx_static['ref']
 
         # organize the function data based on deps_vars mapping
@@ -410,7 +462,19 @@ class ProcessorContainer:
                 fx_args = {**fx_args, **fx_other}
 
         # run function to process data
-        fx_save = self.fx_obj(data=fx_data, **fx_args)
+        with self.profile('compute', fx_variable_trace, time):
+            fx_save = self.fx_obj(data=fx_data, **fx_args)
+
+        # check the sparse output (kept for the next sparse process or expanded before writing)
+        if isinstance(fx_save, SparseGrid):
+            if self.sparse_keep and not self.dump_state:
+                fx_save.name = fx_variable_wf
+                _set_name_and_attrs(fx_save, fx_variable_wf, fx_variable_wf, fx_variable_name)
+                fx_save.attrs["variable_names"] = [fx_variable_wf]
+                # info process end
+                self.logger.info_down(f"Run :: {self.fx_name} - {time_str} - {fx_variable_trace} ... DONE")
+                return fx_save, fx_memory
+            fx_save = to_grid(fx_save)
         fx_metadata['fx_variable'] = _sync_variable_name(fx_save, fx_metadata['fx_variable'])
 
         # define the variable to control the workflow of processes (grid and time-series datasets)
@@ -506,8 +570,10 @@ class ProcessorContainer:
             # info dump variable start
             self.logger.info_up(f"Dump :: {self.fx_name} - {time_str} - {fx_variable_trace} ... ")
 
-            # save the data
-            self.out_obj.write_data(fx_save, time, metadata=fx_metadata, **kwargs)
+            # save the data (period mode writes one step at a time)
+            for time_step, fx_save_step in _split_by_period(fx_save, time, time_period):
+                with self.profile('write', fx_variable_trace, time_step):
+                    self.out_obj.write_data(fx_save_step, time_step, metadata=fx_metadata, **kwargs)
 
             # arrange data to keep the data array format
             if isinstance(fx_save, xr.DataArray):
@@ -565,6 +631,9 @@ class ProcessorContainer:
                         self.logger.info_up(f'Variable {key} ... ')
                         if obj_raw is not None:
 
+                            # expand the sparse data (kept by the sparse processes) to the full grid
+                            obj_raw = to_grid(obj_raw)
+
                             if isinstance(obj_raw, pd.DataFrame):
                                 obj_match = obj_raw
                             elif isinstance(obj_raw, xr.DataArray):
@@ -628,10 +697,12 @@ class ProcessorContainer:
                 # save the data
                 if not len(collections_variables) == 0:
 
-                    # write collections
-                    self.out_obj.write_data(
-                        collections_obj, time,
-                        metadata=collections_metadata, **kwargs)
+                    # write collections (period mode writes one step at a time)
+                    for time_step, collections_step in _split_by_period(collections_obj, time, time_period):
+                        with self.profile('write', fx_variable_trace, time_step):
+                            self.out_obj.write_data(
+                                collections_step, time_step,
+                                metadata=collections_metadata, **kwargs)
 
                     # info dump end
                     self.logger.info_down(f"Dump :: write_data - {time_str} - collections ... DONE")
@@ -656,6 +727,24 @@ class ProcessorContainer:
 
 # ----------------------------------------------------------------------------------------------------------------------
 # helpers
+def _get_data_lock(obj):
+    with _DATA_LOCKS_GUARD:
+        lock = _DATA_LOCKS.get(obj)
+        if lock is None:
+            lock = _DATA_LOCKS[obj] = threading.RLock()
+    return lock
+
+def _split_by_period(obj, time, time_period: pd.DatetimeIndex = None):
+    # single step (or data without time dimension)
+    if time_period is None or not isinstance(obj, (xr.Dataset, xr.DataArray)) or 'time' not in obj.dims:
+        yield time, obj
+        return
+    # period: split the (time, y, x) data into the time steps
+    obj_times = pd.DatetimeIndex(obj['time'].values)
+    for time_step in time_period:
+        if time_step in obj_times:
+            yield time_step, obj.sel(time=time_step)
+
 def _get_memory_data(obj):
     if hasattr(obj, "memory_data"):
         return obj.memory_data
@@ -0,0 +1,174 @@
+"""
+Class Features
+
+Name:          lib_orchestrator_profiler
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251126'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import csv
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # pragma: no cover (not available on windows)
+    resource = None
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (fields of the profile records)
+PROFILE_FIELDS = ['time', 'variable', 'process', 'phase',
+                  'wall_s', 'cpu_s', 'rss_peak_delta_mb', 'read_bytes', 'write_bytes']
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the peak resident set size of the process (MB)
+def get_rss_peak() -> (float, None):
+    if resource is None:
+        return None
+    # linux reports kilobytes, macos bytes
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss_peak / 1024 ** 2 if os.uname().sysname == 'Darwin' else rss_peak / 1024
+
+
+# method to get the bytes read and written by the process
+def get_io_bytes() -> (tuple, None):
+    try:
+        with open('/proc/self/io', 'r') as file_handle:
+            io_info = dict(line.split(':', 1) for line in file_handle.read().splitlines() if ':' in line)
+        return int(io_info['rchar']), int(io_info['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to profile the processes of the orchestrator
+class ProcessProfiler:
+    """
+    Collect wall time, CPU time, peak RSS delta and bytes read/written for each process, variable and time step.
+
+    When the profiler is not active, measure() returns a shared null context and nothing is recorded.
+    CPU time, RSS and I/O counters are process-wide: with parallel steps or variables the records overlap.
+    """
+
+    def __init__(self, active: bool = False) -> None:
+
+        self.active = active
+
+        self.records = []
+        self._lock = threading.Lock()
+        self._null = nullcontext()
+
+    def __repr__(self):
+        return f'ProcessProfiler(active={self.active}, records={len(self.records)})'
+
+    # method to measure a block of code (process, variable and time step)
+    def measure(self, process: str, variable: str = None, time_step=None, phase: str = 'total'):
+        if not self.active:
+            return self._null
+        return self._measure(process, variable, time_step, phase)
+
+    @contextmanager
+    def _measure(self, process: str, variable: str, time_step, phase: str):
+
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        rss_start, io_start = get_rss_peak(), get_io_bytes()
+        try:
+            yield
+        finally:
+            wall_end, cpu_end = time.perf_counter(), time.process_time()
+            rss_end, io_end = get_rss_peak(), get_io_bytes()
+
+            record = {
+                'time': str(time_step) if time_step is not None else None,
+                'variable': variable, 'process': process, 'phase': phase,
+                'wall_s': wall_end - wall_start, 'cpu_s': cpu_end - cpu_start,
+                'rss_peak_delta_mb': (rss_end - rss_start) if rss_start is not None else None,
+                'read_bytes': (io_end[0] - io_start[0]) if io_start and io_end else None,
+                'write_bytes': (io_end[1] - io_start[1]) if io_start and io_end else None,
+            }
+            with self._lock:
+                self.records.append(record)
+
+    # method to add the records collected by another profiler (e.g. in the forked workers of the time steps)
+    def add_records(self, records: list) -> None:
+        if not records:
+            return
+        with self._lock:
+            self.records.extend(records)
+
+    # method to clear the records
+    def clear(self) -> None:
+        with self._lock:
+            self.records = []
+
+    # method to summarize the records (grouped by the selected fields)
+    def summary(self, group_by: (list, tuple) = ('process', 'phase'), phase: str = None) -> list:
+
+        summary_obj = {}
+        for record in self.records:
+            if phase is not None and record['phase'] != phase:
+                continue
+            key = tuple(record[field] for field in group_by)
+            if key not in summary_obj:
+                summary_obj[key] = {**dict(zip(group_by, key)), 'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                    'rss_peak_delta_mb': 0.0, 'read_bytes': 0, 'write_bytes': 0}
+            summary_row = summary_obj[key]
+            summary_row['calls'] += 1
+            for field in ['wall_s', 'cpu_s', 'rss_peak_delta_mb', 'read_bytes', 'write_bytes']:
+                if record[field] is not None:
+                    summary_row[field] += record[field]
+
+        return sorted(summary_obj.values(), key=lambda row: row['wall_s'], reverse=True)
+
+    # method to log the summary table
+    def log_summary(self, logger, group_by: (list, tuple) = ('process', 'phase'), phase: str = None) -> list:
+
+        summary_rows = self.summary(group_by=group_by, phase=phase)
+        if not summary_rows:
+            return summary_rows
+
+        table_header = list(group_by) + ['calls', 'wall [s]', 'cpu [s]', 'rss peak [MB]', 'read [MB]', 'write [MB]']
+        table_rows = [
+            [str(row[field]) for field in group_by] +
+            [str(row['calls']), f'{row["wall_s"]:.3f}', f'{row["cpu_s"]:.3f}', f'{row["rss_peak_delta_mb"]:.1f}',
+             f'{row["read_bytes"] / 1024 ** 2:.1f}', f'{row["write_bytes"] / 1024 ** 2:.1f}']
+            for row in summary_rows]
+
+        table_width = [max(len(str(item)) for item in column) for column in zip(table_header, *table_rows)]
+        logger.info('Profile :: ' + ' | '.join(item.ljust(width) for item, width in zip(table_header, table_width)))
+        for table_row in table_rows:
+            logger.info('Profile :: ' + ' | '.join(item.ljust(width) for item, width in zip(table_row, table_width)))
+
+        return summary_rows
+
+    # method to export the records (json or csv, selected by the file extension)
+    def export(self, file_name: str) -> str:
+
+        folder_name = os.path.dirname(file_name)
+        if folder_name:
+            os.makedirs(folder_name, exist_ok=True)
+
+        if file_name.endswith('.json'):
+            with open(file_name, 'w') as file_handle:
+                json.dump({'records': self.records, 'summary': self.summary()}, file_handle, indent=2)
+        elif file_name.endswith('.csv'):
+            with open(file_name, 'w', newline='') as file_handle:
+                file_writer = csv.DictWriter(file_handle, fieldnames=PROFILE_FIELDS)
+                file_writer.writeheader()
+                file_writer.writerows(self.records)
+        else:
+            raise NotImplementedError(f'Profile file "{file_name}" must be a json or csv file')
+
+        return file_name
+# ----------------------------------------------------------------------------------------------------------------------
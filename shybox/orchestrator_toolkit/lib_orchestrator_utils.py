@@ -10,6 +10,7 @@ Version:       '1.0.0'
 # libraries
 import functools
 import warnings
+import numpy as np
 import pandas as pd
 import xarray as xr
 
@@ -17,8 +18,11 @@ import rioxarray as rxr
 import tempfile
 import os
 
-from osgeo import gdal
+from osgeo import gdal, gdal_array
 from typing import Iterable
+
+from shybox.dataset_toolkit.dataset_handler_cache import materialize_data
+from shybox.processing_toolkit.lib_proc_sparse_grid import SparseGrid, to_sparse, to_grid, get_sparse_mask
 # ----------------------------------------------------------------------------------------------------------------------
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -42,16 +46,25 @@ except Exception:  # pragma: no cover
 
 # ----------------------------------------------------------------------------------------------------------------------
 # method to decorate processing functions
-def as_process(input_type: str = 'xarray', output_type: str = 'xarray', **decorator_attrs):
+def as_process(input_type: str = 'xarray', output_type: str = 'xarray', writes_inplace: bool = False,
+               **decorator_attrs):
     """
     Decorate a processing function that has signature like:
         func(data, *args, **kwargs)
 
     Conventions:
-      - input_type:  'pandas' | 'xarray' | 'gdal' | 'file'
+      - input_type:  'pandas' | 'xarray' | 'gdal' | 'file' | 'sparse'
       - output_type: 'pandas' | 'xarray' | 'gdal' | 'file' | 'tif' | 'tiff' |
                      'table' | 'csv' | 'pandas' | 'shape' | 'dict' | 'geojson' |
-                     'text' | 'txt'
+                     'text' | 'txt' | 'sparse'
+
+    With input_type 'sparse' the data arrays on the reference grid are passed as SparseGrid objects (active
+    cells of the reference domain only). With output_type 'sparse' the returned SparseGrid objects are kept as
+    they are (the next sparse process uses them without expanding); the other processes get the SparseGrid
+    inputs back as data arrays on the full grid.
+
+    Processes that modify their inputs in place must declare writes_inplace=True: the cached (read-only)
+    buffers of the inputs are materialized as private copies before the call.
     """
     def decorator(func):
 
@@ -78,15 +91,25 @@ def as_process(input_type: str = 'xarray', output_type: str = 'xarray', **decora
                 return path
 
             # Convert the incoming `data` according to input_type
-            if input_type not in ('pandas', 'xarray', 'gdal', 'file'):
+            if input_type not in ('pandas', 'xarray', 'gdal', 'file', 'sparse'):
                 warnings.warn(f"Unknown input_type '{input_type}', leaving data as-is.")
 
+            # get the domain mask of the reference (active cells for the sparse input)
+            sparse_mask = None
+            if input_type == 'sparse':
+                sparse_mask = get_sparse_mask(kwargs.get('ref', None), kwargs.get('ref_value', -9999.0))
+
             def _convert_single(obj):
+                # sparse grids (from a sparse process) are expanded for the processes working on the full grid
+                if input_type != 'sparse':
+                    obj = to_grid(obj)
                 if input_type == 'gdal':
                     return _to_gdal(obj)
                 elif input_type == 'file':
                     # If caller passed a file path, we want xarray obj here:
                     return _from_file(obj)
+                elif input_type == 'sparse' and sparse_mask is not None:
+                    return to_sparse(obj, sparse_mask)
                 else:
                     return obj  # 'xarray' passthrough
 
@@ -99,30 +122,37 @@ def as_process(input_type: str = 'xarray', output_type: str = 'xarray', **decora
                 normalized_data = _convert_single(data)
 
             # ------------- CALL the wrapped function ------------------------
-            try:
-                if isinstance(normalized_data, dict):
+            def _call(call_data, call_kwargs):
+                if isinstance(call_data, dict):
 
                     # dict: merge with kwargs (dict takes precedence)
-                    merged_kwargs = {**kwargs, **normalized_data}
-                    result = func(*args, **merged_kwargs)
+                    merged_kwargs = {**call_kwargs, **call_data}
+                    return func(*args, **merged_kwargs)
 
-                elif isinstance(normalized_data, (list, tuple)):
+                elif isinstance(call_data, (list, tuple)):
                     # IMPORTANT: pass list/tuple as ONE arg (do not splat)
-                    result = func(normalized_data, *args, **kwargs)
+                    return func(call_data, *args, **call_kwargs)
 
-                elif isinstance(normalized_data, pd.DataFrame):
-                    result = func(normalized_data, *args, **kwargs)
+                elif isinstance(call_data, pd.DataFrame):
+                    return func(call_data, *args, **call_kwargs)
 
-                elif isinstance(normalized_data, pd.Series):
-                    result = func(normalized_data, *args, **kwargs)
+                elif isinstance(call_data, pd.Series):
+                    return func(call_data, *args, **call_kwargs)
 
                 elif (
-                    isinstance(normalized_data, (xr.DataArray, xr.Dataset))
-                    or (gdal and isinstance(normalized_data, gdal.Dataset))
+                    isinstance(call_data, (xr.DataArray, xr.Dataset, SparseGrid))
+                    or (gdal and isinstance(call_data, gdal.Dataset))
                 ):
-                    result = func(normalized_data, *args, **kwargs)
+                    return func(call_data, *args, **call_kwargs)
                 else:
-                    raise TypeError(f'Unsupported data type: {type(normalized_data)}')
+                    raise TypeError(f'Unsupported data type: {type(call_data)}')
+
+            # copy-on-write: the processes writing in place get private copies of the cached (read-only) inputs
+            if writes_inplace:
+                normalized_data, kwargs = materialize_data(normalized_data), materialize_data(kwargs)
+
+            try:
+                result = _call(normalized_data, kwargs)
             finally:
                 # If we created temp files for input ('file' path generation etc.), decide if you want to keep or remove.
                 # In your original code you removed the input when input_type == 'file', but that was ambiguous.
@@ -135,7 +165,12 @@ def as_process(input_type: str = 'xarray', output_type: str = 'xarray', **decora
 
             # ------------- convert OUTPUT to the requested type -------------
             # Keep naming consistent: we interpret output_type as the format you WANT to return.
-            if output_type == 'xarray':
+            if output_type == 'sparse':
+                # keep the sparse grids (expanded at the writer or by the next non-sparse process)
+                pass
+            elif output_type == 'xarray':
+                # If result is sparse, bring it back to the full grid
+                result = to_grid(result)
                 # If result is GDAL/path, bring it back to xarray
                 if gdal and isinstance(result, gdal.Dataset):
                     result = gdal_to_xarray(result)
@@ -162,7 +197,7 @@ def as_process(input_type: str = 'xarray', output_type: str = 'xarray', **decora
         # ------------- output_ext attribute ---------------------------------
         # Map the declared output_type to a sensible file extension
         _ext_map = {
-            'tif': 'tif', 'tiff': 'tif', 'gdal': 'tif', 'xarray': 'tif', 'file': 'tif',
+            'tif': 'tif', 'tiff': 'tif', 'gdal': 'tif', 'xarray': 'tif', 'file': 'tif', 'sparse': 'tif',
             'table': 'csv', 'csv': 'csv', 'pandas': 'csv',
             'shape': 'json', 'dict': 'json', 'geojson': 'json',
             'text': 'txt', 'txt': 'txt'
@@ -170,6 +205,9 @@ def as_process(input_type: str = 'xarray', output_type: str = 'xarray', **decora
         setattr(wrapper, 'output_ext', _ext_map.get(output_type, 'txt'))
 
         # attach extra attributes
+        setattr(wrapper, 'writes_inplace', writes_inplace)
+        setattr(wrapper, 'input_type', input_type)
+        setattr(wrapper, 'output_type', output_type)
         for key, value in decorator_attrs.items():
             setattr(wrapper, key, value)
 
@@ -185,7 +223,7 @@ def as_process(input_type: str = 'xarray', output_type: str = 'xarray', **decora
 # methods to decorate other methods
 def with_list_input(func):
     def wrapper(data, *args, **kwargs):
-        if isinstance(data, Iterable) and not isinstance(data, str) and not isinstance(data, xr.DataArray):
+        if isinstance(data, Iterable) and not isinstance(data, (str, xr.DataArray, xr.Dataset)):
             return [func(i, *args, **kwargs) for i in data]
         else:
             return func(data, *args, **kwargs)
@@ -215,36 +253,111 @@ def xarray_to_file(data_array: xr.DataArray) -> str:
 # ----------------------------------------------------------------------------------------------------------------------
 
 # ----------------------------------------------------------------------------------------------------------------------
-# method to read data from file (xarray)
-@with_list_input
-def xarray_to_gdal(data_array: xr.DataArray) -> gdal.Dataset:
-    temp_file = xarray_to_file(data_array)
-
-    # Open the temporary file with GDAL
-    gdal_dataset = gdal.Open(temp_file)
-    # Optionally, delete the temporary file after opening it with GDAL
-    os.remove(temp_file)
-
-    return gdal_dataset
+# class to keep the gdal dataset alive while its band buffer is used by numpy (zero-copy view)
+class _GdalArrayHolder:
+    def __init__(self, array: np.ndarray, dataset: gdal.Dataset) -> None:
+        self.array, self.dataset = array, dataset
+        self.__array_interface__ = array.__array_interface__
 # ----------------------------------------------------------------------------------------------------------------------
 
 # ----------------------------------------------------------------------------------------------------------------------
-# method to convert data to file (xarray)
+# method to convert data to a gdal dataset in memory (xarray, no temporary files)
 @with_list_input
-def gdal_to_xarray(dataset: gdal.Dataset) -> xr.DataArray:
-    # Create a temporary file
-    temp_file = tempfile.NamedTemporaryFile(suffix='.tif', delete=False)
-    temp_file.close()
+def xarray_to_gdal(data_array: (xr.DataArray, xr.Dataset)) -> gdal.Dataset:
+
+    # organize the data as (band, y, x)
+    if isinstance(data_array, xr.Dataset):
+        data_array = data_array.to_array(dim='band')
+    x_dim, y_dim = data_array.rio.x_dim, data_array.rio.y_dim
+    band_dims = [dim for dim in data_array.dims if dim not in (y_dim, x_dim)]
+    if len(band_dims) > 1:
+        raise ValueError(f'Data with dimensions {data_array.dims} cannot be converted to a gdal dataset')
+
+    data_values = data_array.transpose(*band_dims, y_dim, x_dim).values
+    if data_values.ndim == 2:
+        data_values = data_values[np.newaxis, :, :]
+    if data_values.dtype == bool:
+        data_values = data_values.astype(np.uint8)
+    data_values = np.ascontiguousarray(data_values)
+
+    # wrap the numpy buffer as a gdal dataset (no copy) or copy it in a MEM dataset
+    try:
+        gdal_dataset = gdal_array.OpenArray(data_values)
+    except Exception:
+        gdal_dataset = None
+    if gdal_dataset is None:
+        n_bands, n_rows, n_cols = data_values.shape
+        gdal_dataset = gdal.GetDriverByName('MEM').Create(
+            '', n_cols, n_rows, n_bands, gdal_array.NumericTypeCodeToGDALTypeCode(data_values.dtype))
+        for band_id in range(n_bands):
+            gdal_dataset.GetRasterBand(band_id + 1).WriteArray(data_values[band_id])
+
+    # set the georeference
+    gdal_dataset.SetGeoTransform(data_array.rio.transform(recalc=True).to_gdal())
+    if data_array.rio.crs is not None:
+        gdal_dataset.SetProjection(data_array.rio.crs.to_wkt())
+
+    # set the no data value
+    no_data = data_array.rio.nodata
+    if no_data is None:
+        no_data = data_array.attrs.get('_FillValue', data_array.encoding.get('_FillValue', None))
+    if no_data is not None and (np.issubdtype(data_values.dtype, np.floating) or not np.isnan(no_data)):
+        for band_id in range(gdal_dataset.RasterCount):
+            gdal_dataset.GetRasterBand(band_id + 1).SetNoDataValue(float(no_data))
 
-    # Save the Dataset to the temporary file
-    driver = gdal.GetDriverByName('GTiff')
-    driver.CreateCopy(temp_file.name, dataset, options=['COMPRESS=LZW'])
+    return gdal_dataset
+# ----------------------------------------------------------------------------------------------------------------------
 
-    # Open the temporary file with xarray
-    data_array = rxr.open_rasterio(temp_file.name)
+# ----------------------------------------------------------------------------------------------------------------------
+# method to read the band values of a gdal dataset (view of the memory buffer if available)
+def _read_gdal_band(dataset: gdal.Dataset, band_id: int) -> np.ndarray:
+
+    gdal_band = dataset.GetRasterBand(band_id)
+    if dataset.GetDriver().ShortName in ('MEM', 'NUMPY'):
+        try:
+            band_view = gdal_band.GetVirtualMemAutoArray(gdal.GF_Read)
+            return np.asarray(_GdalArrayHolder(band_view, dataset))
+        except Exception:
+            pass
+
+    return gdal_band.ReadAsArray()
+# ----------------------------------------------------------------------------------------------------------------------
 
-    # Optionally, delete the temporary file after opening it with GDAL
-    os.remove(temp_file.name)
+# ----------------------------------------------------------------------------------------------------------------------
+# method to convert a gdal dataset in memory to data (xarray, no temporary files)
+@with_list_input
+def gdal_to_xarray(dataset: (gdal.Dataset, str)) -> xr.DataArray:
+
+    if isinstance(dataset, (str, bytes)):
+        dataset = gdal.Open(dataset.decode() if isinstance(dataset, bytes) else dataset)
+
+    # get the band values (a single band is not copied)
+    n_bands, n_cols, n_rows = dataset.RasterCount, dataset.RasterXSize, dataset.RasterYSize
+    if n_bands == 1:
+        data_values = _read_gdal_band(dataset, 1)[np.newaxis, :, :]
+    else:
+        data_values = np.stack([_read_gdal_band(dataset, band_id + 1) for band_id in range(n_bands)])
+
+    # get the coordinates (pixel centers, as in rioxarray)
+    geo_transform = dataset.GetGeoTransform()
+    geo_x = geo_transform[0] + (np.arange(n_cols) + 0.5) * geo_transform[1]
+    geo_y = geo_transform[3] + (np.arange(n_rows) + 0.5) * geo_transform[5]
+
+    data_array = xr.DataArray(
+        data_values, dims=('band', 'y', 'x'),
+        coords={'band': np.arange(1, n_bands + 1), 'y': geo_y, 'x': geo_x})
+
+    # set the attributes and the georeference (same layout of rioxarray.open_rasterio)
+    data_array.attrs['AREA_OR_POINT'] = dataset.GetMetadataItem('AREA_OR_POINT') or 'Area'
+    no_data = dataset.GetRasterBand(1).GetNoDataValue()
+    if no_data is not None:
+        data_array.attrs['_FillValue'] = no_data
+    data_array.attrs['scale_factor'], data_array.attrs['add_offset'] = 1.0, 0.0
+
+    data_projection = dataset.GetProjection()
+    if data_projection:
+        data_array = data_array.rio.write_crs(data_projection)
+    data_array = data_array.rio.write_transform(data_array.rio.transform(recalc=True))
 
     return data_array
 # ----------------------------------------------------------------------------------------------------------------------
@@ -9,6 +9,7 @@ from __future__ import annotations
 
 import os
 import shutil
+import multiprocessing as mp
 import tempfile
 from copy import deepcopy
 from collections import defaultdict
@@ -24,9 +25,15 @@ from shybox.time_toolkit.lib_utils_time import convert_time_format, normalize_to
 
 from shybox.orchestrator_toolkit.lib_orchestrator_utils import PROCESSES
 from shybox.orchestrator_toolkit.lib_orchestrator_process import ProcessorContainer
+from shybox.orchestrator_toolkit.lib_orchestrator_executor import (
+    StepOrder, run_steps, run_graph, find_graph_cycle, STEP_EXECUTOR_TYPES)
+from shybox.orchestrator_toolkit.lib_orchestrator_profiler import ProcessProfiler
 
 from shybox.dataset_toolkit.dataset_handler_mem import DataMem
 from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+from shybox.dataset_toolkit.dataset_handler_cache import get_dataset_cache
+from shybox.processing_toolkit.lib_proc_sparse_grid import SparseGrid
+from shybox.io_toolkit.lib_io_gzip import wait_compression
 
 from shybox.logging_toolkit.logging_handler import LoggingManager
 from shybox.logging_toolkit.lib_logging_utils import with_logger
@@ -76,6 +83,47 @@ def group_process(proc_list, proc_tag="reference"):
             logger_stream.error(f"Invalid proc_tag '{proc_tag}'. Must be 'reference', 'workflow' or 'tag'.")
     return dict(proc_group)
 
+# method to flatten the data objects of a process (single object, list or dict of objects)
+def flat_data(data_obj) -> list:
+    if data_obj is None:
+        return []
+    elif isinstance(data_obj, dict):
+        return [data for value in data_obj.values() for data in flat_data(value)]
+    elif isinstance(data_obj, (list, tuple)):
+        return [data for value in data_obj for data in flat_data(value)]
+    return [data_obj]
+
+# method to get the keys of the data objects (the object itself and, for files, the location pattern)
+def get_data_keys(data_obj) -> set:
+    data_keys = set()
+    for data in flat_data(data_obj):
+        data_keys.add(('obj', id(data)))
+        if isinstance(data, DataLocal) and getattr(data, 'loc_pattern', None) is not None:
+            data_keys.add(('file', data.loc_pattern))
+    return data_keys
+
+# method to get the dependencies graph of the process groups (a consumer waits for the producers of its inputs)
+def get_process_graph(proc_group: dict, proc_producers: dict = None) -> dict:
+
+    # producers are the groups themselves if not defined
+    proc_producers = proc_group if proc_producers is None else proc_producers
+
+    # get the output data of each producer (all the processes of the group)
+    group_out = {}
+    for proc_var, proc_list in proc_producers.items():
+        group_out[proc_var] = set().union(*[get_data_keys(proc_obj.out_obj) for proc_obj in proc_list])
+
+    # link each group to the other groups producing its input data or its dependencies
+    proc_graph = {}
+    for proc_var, proc_list in proc_group.items():
+        group_in = set().union(
+            *[get_data_keys(proc_obj.in_obj) | get_data_keys(proc_obj.in_deps) for proc_obj in proc_list])
+        proc_graph[proc_var] = [
+            var_other for var_other, data_other in group_out.items()
+            if var_other != proc_var and group_in & data_other]
+
+    return proc_graph
+
 # method to check compatibility between data and fx dicts
 @with_logger(var_name='logger_stream')
 def ensure_variables(data_collections, fx_collections, mode='strict'):
@@ -143,6 +191,12 @@ class OrchestratorBase:
         "intermediate_output": "Mem",  # "Mem" or "Tmp"
         "break_on_missing_tiles": False,  # legacy naming; grid uses it, TS may ignore
         "tmp_dir": None,
+        "executor": "serial",  # "serial" or "process" (time steps execution)
+        "workers": None,  # number of workers of the process pool (None = cpu count)
+        "variable_executor": "serial",  # "serial" or "thread" (variable chains execution)
+        "variable_workers": None,  # number of workers of the variable chains (None = cpu count)
+        "profile": False,  # profile the processes (wall/cpu time, peak rss, bytes read/written)
+        "profile_file": None,  # export of the profile records (json or csv)
     }
 
     def __init__(
@@ -185,6 +239,13 @@ class OrchestratorBase:
         self.memory_active = True
         self.mapper = mapper  # injected by builder (Grid/TS)
 
+        self.step_order = None
+        self.step_report = []
+        # memory and dataset cache counters of the forked workers of the time steps
+        self.step_stats = {'views': 0, 'copies': 0, 'bytes_saved': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+        self.profiler = ProcessProfiler(active=bool(self.options.get('profile', False)))
+
     # -------------------------------
     # Hooks (override in subclasses)
     # -------------------------------
@@ -229,6 +290,63 @@ class OrchestratorBase:
             except Exception as e:
                 print(f'Error cleaning up temporary directory: {e}')
 
+    # method to get the memory cache usage of the input datasets and the dataset cache counters (this process)
+    def get_memory_stats(self) -> dict:
+
+        data_bucket = []
+        for proc_obj in self.processes:
+            for data_obj in as_list(proc_obj.in_obj)[0]:
+                if hasattr(data_obj, 'memory_stats') and not any(data_obj is obj for obj in data_bucket):
+                    data_bucket.append(data_obj)
+
+        memory_stats = {'views': 0, 'copies': 0, 'bytes_saved': 0}
+        for data_obj in data_bucket:
+            for key, value in data_obj.memory_stats.items():
+                if key in memory_stats:
+                    memory_stats[key] += value
+
+        cache_stats = get_dataset_cache().stats()
+        memory_stats.update({key: cache_stats[key] for key in ['hits', 'misses', 'evictions']})
+
+        return memory_stats
+
+    # method to log the memory cache usage of the input datasets
+    def log_memory_stats(self) -> dict:
+
+        # counters of this process and of the forked workers of the time steps
+        memory_stats = self.get_memory_stats()
+        step_stats = getattr(self, 'step_stats', {})
+        for key in memory_stats:
+            memory_stats[key] += step_stats.get(key, 0)
+
+        self.logger.info(
+            f'Memory cache :: {memory_stats["bytes_saved"] / 1024 ** 2:.1f} MB saved '
+            f'(views: {memory_stats["views"]}, copies: {memory_stats["copies"]})')
+
+        cache_stats = dict(get_dataset_cache().stats(), **{
+            key: memory_stats[key] for key in ['hits', 'misses', 'evictions']})
+        self.logger.info(
+            f'Dataset cache :: {cache_stats["nbytes"] / 1024 ** 2:.1f} MB stored in {cache_stats["entries"]} entries '
+            f'(hits: {cache_stats["hits"]}, misses: {cache_stats["misses"]}, evictions: {cache_stats["evictions"]})')
+
+        return memory_stats
+
+    # method to log and export the profile of the processes
+    def log_profile(self) -> list:
+
+        if not self.profiler.active:
+            return []
+
+        profile_summary = self.profiler.log_summary(self.logger, group_by=('process', 'phase'))
+        self.profiler.log_summary(self.logger, group_by=('variable',), phase='total')
+
+        profile_file = self.options.get('profile_file', None)
+        if profile_file is not None:
+            self.profiler.export(profile_file)
+            self.logger.info(f'Profile :: records saved in "{profile_file}"')
+
+        return profile_summary
+
     # create the output object
     def make_output(self, in_obj: DataLocal, out_obj: DataLocal = None,
                     function = None, message: bool = True, **kwargs) -> DataLocal:
@@ -402,6 +520,12 @@ class OrchestratorBase:
             in_deps=deps_input, out_deps=None,
             args = kwargs,
             out_obj = this_output, out_opts=self.options, logger=self.logger, tag=process_var_reference,)
+        this_process.profiler = self.profiler
+
+        # keep the sparse output of the previous process (intermediate output) for this sparse process
+        if not process_init and this_process.sparse_in and not deps_input:
+            process_previous.sparse_keep = process_previous.sparse_out and process_previous.out_temp
+        this_process.out_temp = not isinstance(process_output, DataLocal)
 
         # check if break point is required
         if this_process.break_point:
@@ -481,31 +605,135 @@ class OrchestratorBase:
             if group_type == 'by_time':
                 time_steps = [time_steps]
                 self.memory_active = False
+            elif group_type == 'by_period':
+                # whole period in one pass (processes get the (time, y, x) cube of all the steps)
+                time_steps = [time_steps]
+
+        # get the executor of the time steps (run kwargs override the orchestrator options)
+        executor = kwargs.pop('executor', self.options.get('executor', 'serial')) or 'serial'
+        workers = kwargs.pop('workers', self.options.get('workers', None))
+        if executor not in STEP_EXECUTOR_TYPES:
+            # the steps share the datasets and the process containers, so they can not run in threads
+            self.logger.error(f'Time steps executor "{executor}" is not available. Allowed: {STEP_EXECUTOR_TYPES}')
+            raise ValueError(f'Time steps executor "{executor}" is not available. Allowed: {STEP_EXECUTOR_TYPES}')
+        if executor == 'process' and 'fork' not in mp.get_all_start_methods():
+            self.logger.warning('Time steps executor "process" needs the "fork" start method; the steps run serially')
+            executor = 'serial'
+        if len(time_steps) == 1:
+            executor = 'serial'
+
+        if executor == 'serial':
+
+            # iterate over time steps
+            for ts in time_steps:
+
+                # info time start
+                self.logger.info_up(f'Time "{ts}" ...')
+                # run time step
+                self.run_single_ts(time=ts, **kwargs)
+                # info time end
+                self.logger.info_down(f'Time "{ts}" ... DONE')
 
-        # iterate over time steps
-        for ts in time_steps:
+        else:
+            # run the time steps in parallel
+            self.run_parallel_ts(time_steps, executor=executor, workers=workers, **kwargs)
+
+        # wait the queued compression of the output files
+        wait_compression()
 
-            # info time start
-            self.logger.info_up(f'Time "{ts}" ...')
-            # run time step
-            self.run_single_ts(time=ts, **kwargs)
-            # info time end
-            self.logger.info_down(f'Time "{ts}" ... DONE')
+        # info memory cache usage
+        self.log_memory_stats()
+
+        # info profile report
+        self.log_profile()
 
         # info orchestrator end
         self.logger.info_down('Run orchestrator ... DONE')
 
         return None
 
+    # method to run the time steps in parallel (forked process pool, each step works on its own copy of the state)
+    def run_parallel_ts(self, time_steps, executor: str = 'process', workers: int = None, **kwargs) -> list:
+
+        # info parallel start
+        self.logger.info_up(f'Time steps :: run {len(time_steps)} steps with executor "{executor}" ...')
+
+        # the memory of the datasets is bound to a single time step (shared dataset cache is used instead)
+        memory_active, self.memory_active = self.memory_active, False
+        # the writes of the outputs follow the order of the time steps
+        self.step_order = StepOrder(len(time_steps), shared=True)
+
+        # the profile records and the counters of the forked workers are returned with the step report
+        pid_parent = os.getpid()
+
+        def _run_step(ts, step_id):
+            in_worker = os.getpid() != pid_parent
+            if in_worker:
+                n_records, stats_start = len(self.profiler.records), self.get_memory_stats()
+            try:
+                self.run_single_ts(time=ts, step_id=step_id, clean=False, **kwargs)
+                # forked workers do not run the exit handlers
+                wait_compression()
+            finally:
+                self.step_order.done(step_id)
+            if not in_worker:
+                return None
+            stats_end = self.get_memory_stats()
+            return {'profile': self.profiler.records[n_records:],
+                    'stats': {key: stats_end[key] - stats_start[key] for key in stats_end}}
+
+        try:
+            self.step_report = run_steps(_run_step, list(time_steps), executor=executor, workers=workers)
+        finally:
+            self.memory_active = memory_active
+            self.step_order = None
+            self.clean_up()
+
+        # merge the profile records and the counters of the workers (in time order)
+        for step_report in self.step_report:
+            step_result = step_report.get('result')
+            if step_result is None:
+                continue
+            self.profiler.add_records(step_result['profile'])
+            for key, value in step_result['stats'].items():
+                self.step_stats[key] = self.step_stats.get(key, 0) + value
+
+        # info steps report (in time order)
+        step_errors = []
+        for step_report in self.step_report:
+            if step_report['status'] == 'done':
+                self.logger.info(f'Time "{step_report["step"]}" ... DONE ({step_report["elapsed"]:.2f} s)')
+            else:
+                self.logger.error(
+                    f'Time "{step_report["step"]}" ... FAILED ({step_report["elapsed"]:.2f} s) :: '
+                    f'{step_report["error"]}')
+                self.logger.debug(step_report['traceback'])
+                step_errors.append(step_report)
+
+        # info parallel end
+        self.logger.info_down(f'Time steps :: run {len(time_steps)} steps with executor "{executor}" ... DONE')
+
+        # raise the errors of the failed steps
+        if step_errors:
+            self.logger.error(f'Time steps :: {len(step_errors)} of {len(time_steps)} steps failed')
+            raise RuntimeError(
+                f'{len(step_errors)} of {len(time_steps)} time steps failed. First error at time '
+                f'"{step_errors[0]["step"]}":\n{step_errors[0]["traceback"]}')
+
+        return self.step_report
+
     # method to run single time step
-    def run_single_ts(self, time: Union[pd.Timestamp, str, pd.DatetimeIndex], **kwargs) -> None:
+    def run_single_ts(self, time: Union[pd.Timestamp, str, pd.DatetimeIndex],
+                      step_id: int = None, clean: bool = True, **kwargs) -> None:
 
         # time formatting
         if isinstance(time, str):
             time = convert_time_format(time, 'str_to_stamp')
         elif isinstance(time, pd.DatetimeIndex):
-            tmp = [convert_time_format(ts, 'str_to_stamp') for ts in time]
-            time = deepcopy(tmp)
+            # period mode keeps the index (the processes run once over the whole period)
+            if kwargs.get('group', None) != 'by_period':
+                tmp = [convert_time_format(ts, 'str_to_stamp') for ts in time]
+                time = deepcopy(tmp)
         elif isinstance(time, pd.Timestamp):
             pass
         else:
@@ -514,7 +742,7 @@ class OrchestratorBase:
 
         # run all processes if no breakpoints
         if len(self.break_points) == 0:
-            self._run_processes(self.processes, time, **kwargs)
+            self._run_processes(self.processes, time, step_id=step_id, **kwargs)
         else:
             # proceed in chunks: run until the breakpoint, then stop
             i = 0
@@ -525,7 +753,7 @@ class OrchestratorBase:
                     processes_to_run.append(self.processes[i])
                 else:
                     # run the processes until the breakpoint
-                    self._run_processes(processes_to_run, time, **kwargs)
+                    self._run_processes(processes_to_run, time, step_id=step_id, **kwargs)
                     # then run the breakpoint by itself
                     self.processes[i].run(time, **kwargs)
 
@@ -534,13 +762,14 @@ class OrchestratorBase:
 
                 i += 1
             # run the remaining processes
-            self._run_processes(processes_to_run, time, **kwargs)
+            self._run_processes(processes_to_run, time, step_id=step_id, **kwargs)
 
-        # clean up the temporary directory
-        self.clean_up()
+        # clean up the temporary directory (parallel steps clean up at the end of the run)
+        if clean:
+            self.clean_up()
 
     # method to iterate over process(es)
-    def _run_processes(self, processes, time: dt.datetime, **kwargs) -> None:
+    def _run_processes(self, processes, time: dt.datetime, step_id: int = None, **kwargs) -> None:
 
         # return if no processes
         if not processes: return None
@@ -548,107 +777,173 @@ class OrchestratorBase:
         # group process by variable
         proc_group = group_process(processes)
 
-        # iterate over all variable groups
-        proc_memory, proc_ws = None, {}
+        # get the executor of the variables (independent variable chains run at the same time)
+        executor = kwargs.pop('variable_executor', self.options.get('variable_executor', 'serial')) or 'serial'
+        workers = kwargs.pop('variable_workers', self.options.get('variable_workers', None))
+        with self.profiler.measure('time_step', None, time, phase='step'):
+            if executor != 'serial' and len(proc_group) > 1:
+                if self._run_processes_parallel(
+                        proc_group, time, step_id=step_id, executor=executor, workers=workers, **kwargs):
+                    return None
+
+            # iterate over all variable groups
+            proc_memory, proc_ws = None, {}
+            for proc_var, proc_list in proc_group.items():
+                proc_memory, _ = self._run_chain(
+                    proc_var, proc_list, time, proc_ws=proc_ws, proc_memory=proc_memory, step_id=step_id, **kwargs)
+
+    # method to run the variable chains following the dependencies (dump processes run at the end)
+    def _run_processes_parallel(self, proc_group: dict, time: dt.datetime, step_id: int = None,
+                                executor: str = 'thread', workers: int = None, **kwargs) -> bool:
+
+        if executor != 'thread':
+            self.logger.warning(f'Variable executor "{executor}" is not supported; the "thread" executor is used')
+
+        # split the chain of each variable (processes) and its dump processes (collections)
+        proc_chain, proc_tail = {}, {}
         for proc_var, proc_list in proc_group.items():
+            proc_id = next((idx for idx, proc_obj in enumerate(proc_list) if proc_obj.dump_state), len(proc_list))
+            proc_chain[proc_var], proc_tail[proc_var] = proc_list[:proc_id], proc_list[proc_id:]
+
+        # get the dependencies between the variables (outputs of the producers to inputs of the consumers)
+        proc_graph = get_process_graph(proc_chain)
 
-            # VARIABLE BLOCK START
-            self.logger.info_up(f'Variable "{proc_var}" ...')
+        # the chains can not wait for a dump process (run at the end) or for each other (cycle)
+        proc_graph_tail = get_process_graph(proc_chain, proc_producers=proc_tail)
+        if any(proc_graph_tail.values()):
+            self.logger.warning('Variable chains depend on dumped collections; the chains run serially')
+            return False
+        if find_graph_cycle(proc_graph):
+            self.logger.warning('Variable chains have cyclic dependencies; the chains run serially')
+            return False
 
-            # get the variable mapping
-            proc_vars_map = self.mapper.get_pairs(name=proc_var, type='reference')
+        # run the chains (the workspace is shared, each chain writes the results of its own variable)
+        proc_ws_chain = {}
+        proc_results = run_graph(
+            lambda proc_var: self._run_chain(
+                proc_var, proc_chain[proc_var], time, proc_ws=proc_ws_chain, step_id=step_id, **kwargs),
+            proc_graph, workers=workers)
 
-            # iterate over all processes for this variable
-            proc_result, proc_return, proc_wf_current = None, [], None
-            proc_current, proc_previous = None, None
-            for proc_id, proc_obj in enumerate(proc_list):
+        # run the dump processes (in the variables order, the collections grow as in the serial run)
+        proc_ws = {}
+        for proc_var, proc_list in proc_group.items():
+            proc_memory, proc_return = proc_results[proc_var]
+            if proc_var in proc_ws_chain:
+                proc_ws[proc_var] = proc_ws_chain[proc_var]
+            if proc_tail[proc_var]:
+                self._run_chain(
+                    proc_var, proc_tail[proc_var], time, proc_ws=proc_ws, proc_memory=proc_memory,
+                    proc_start=len(proc_chain[proc_var]), proc_return=proc_return, step_id=step_id, **kwargs)
 
-                # PROCESS BLOCK START
-                self.logger.info_up(f'Process "{proc_obj.fx_name}" ...')
+        return True
 
-                # check process dump state
-                proc_dump = proc_obj.dump_state
+    # method to run the process(es) of a variable
+    def _run_chain(self, proc_var: str, proc_list: list, time: dt.datetime, proc_ws: dict, proc_memory=None,
+                   proc_start: int = 0, proc_return: list = None, step_id: int = None, **kwargs) -> (Any, list):
 
-                try:
-                    # if previous process returned None → skip
-                    if proc_id > 0 and proc_return[proc_id - 1] is None:
-                        self.logger.warning(
-                            f'Process "{proc_obj.fx_name}" ... SKIPPED. Previous process was NoneType'
-                        )
-                        proc_return.append(None)
-                        continue
-
-                    # previous workflow name
-                    proc_previous = proc_current
-                    proc_wf_previous = proc_result.name if proc_result is not None else None
-
-                    # organize kwargs
-                    local_kwargs = dict(kwargs)
-                    local_kwargs.update({
-                        'id': proc_id,
-                        'collections': proc_ws,
-                        #'workflow': proc_wf_previous,
-                        'workflow': proc_previous,
-                        'memory_active': self.memory_active,
-                        **proc_vars_map
-                    })
-
-                    # inject memory if available
-                    if proc_memory is not None:
-                        local_kwargs.setdefault('memory', {})
-                        #if proc_wf_previous not in local_kwargs['memory']:
-                        if proc_previous not in local_kwargs['memory']:
-                            #local_kwargs['memory'][proc_wf_previous] = proc_memory
-                            local_kwargs['memory'][proc_previous] = proc_memory
-
-                    # run process
-                    proc_result, proc_memory = proc_obj.run(time, **local_kwargs)
-                    proc_current = proc_var
-
-                    # determine current workflow name
-                    if proc_result is not None:
-                        if isinstance(proc_result, xr.DataArray):
-                            proc_wf_current = proc_result.name
-                        elif isinstance(proc_result, xr.Dataset):
-                            proc_wf_current = list(proc_result.data_vars.keys())
-                        else:
-                            self.logger.error('Process output must be a DataArray.')
-                            raise ValueError('Process output must be a DataArray.')
-                    else:
-                        proc_wf_current = proc_vars_map['workflow']
+        # return if no processes
+        if not proc_list: return proc_memory, proc_return
+
+        # VARIABLE BLOCK START
+        self.logger.info_up(f'Variable "{proc_var}" ...')
 
-                    if not proc_dump:
+        # get the variable mapping
+        proc_vars_map = self.mapper.get_pairs(name=proc_var, type='reference')
 
-                        # store process result
-                        proc_return.append(proc_result)
+        # iterate over all processes for this variable (a resumed chain starts from proc_start)
+        proc_result, proc_return = None, list(proc_return) if proc_return is not None else []
+        proc_wf_current = None
+        proc_current, proc_previous = (proc_var if proc_start > 0 else None), None
+        for proc_id, proc_obj in enumerate(proc_list, start=proc_start):
 
-                        # DETAIL: if skipped / empty
-                        if proc_result is None:
-                            self.logger.warning(
-                                f'Process "{proc_obj.fx_name}" ... SKIPPED. Data not available'
-                            )
+            # PROCESS BLOCK START
+            self.logger.info_up(f'Process "{proc_obj.fx_name}" ...')
 
-                        # assign current workflow to workspace
-                        proc_ws[proc_current] = proc_return[-1]
+            # check process dump state
+            proc_dump = proc_obj.dump_state
 
+            try:
+                # if previous process returned None → skip
+                if proc_id > 0 and proc_return[proc_id - 1] is None:
+                    self.logger.warning(
+                        f'Process "{proc_obj.fx_name}" ... SKIPPED. Previous process was NoneType'
+                    )
+                    proc_return.append(None)
+                    continue
+
+                # previous workflow name
+                proc_previous = proc_current
+                proc_wf_previous = proc_result.name if proc_result is not None else None
+
+                # organize kwargs
+                local_kwargs = dict(kwargs)
+                local_kwargs.update({
+                    'id': proc_id,
+                    'collections': proc_ws,
+                    #'workflow': proc_wf_previous,
+                    'workflow': proc_previous,
+                    'memory_active': self.memory_active,
+                    **proc_vars_map
+                })
+
+                # pass the sparse data of the previous process (kept only for the sparse processes)
+                if proc_id > 0 and isinstance(proc_return[proc_id - 1], SparseGrid):
+                    local_kwargs['data_sparse'] = proc_return[proc_id - 1]
+
+                # inject memory if available
+                if proc_memory is not None:
+                    local_kwargs.setdefault('memory', {})
+                    #if proc_wf_previous not in local_kwargs['memory']:
+                    if proc_previous not in local_kwargs['memory']:
+                        #local_kwargs['memory'][proc_wf_previous] = proc_memory
+                        local_kwargs['memory'][proc_previous] = proc_memory
+
+                # wait the previous time steps before dumping (parallel steps write in time order)
+                if proc_dump and self.step_order is not None:
+                    self.step_order.wait_turn(step_id)
+
+                # run process
+                with self.profiler.measure(proc_obj.fx_name, proc_var, time):
+                    proc_result, proc_memory = proc_obj.run(time, **local_kwargs)
+                proc_current = proc_var
+
+                # determine current workflow name
+                if proc_result is not None:
+                    if isinstance(proc_result, xr.DataArray):
+                        proc_wf_current = proc_result.name
+                    elif isinstance(proc_result, xr.Dataset):
+                        proc_wf_current = list(proc_result.data_vars.keys())
+                    elif isinstance(proc_result, SparseGrid):
+                        proc_wf_current = proc_result.name
                     else:
-                        # dump state active the data in memory is cleared (empty dict)
-                        proc_ws.pop(proc_current, None)
+                        self.logger.error('Process output must be a DataArray.')
+                        raise ValueError('Process output must be a DataArray.')
+                else:
+                    proc_wf_current = proc_vars_map['workflow']
 
-                finally:
-                    # PROCESS BLOCK END
-                    self.logger.info_down(f'Process "{proc_obj.fx_name}" ... DONE')
+                if not proc_dump:
 
-            # VARIABLE BLOCK END
-            self.logger.info_down(f'Variable "{proc_var}" ... DONE')
+                    # store process result
+                    proc_return.append(proc_result)
 
-            # Normalize proc_wf_current
-            if isinstance(proc_wf_current, list):
-                proc_wf_tmp = ":".join(str(wf) for wf in proc_wf_current)
-            else:
-                proc_wf_tmp = str(proc_wf_current)
+                    # DETAIL: if skipped / empty
+                    if proc_result is None:
+                        self.logger.warning(
+                            f'Process "{proc_obj.fx_name}" ... SKIPPED. Data not available'
+                        )
+
+                    # assign current workflow to workspace
+                    proc_ws[proc_current] = proc_return[-1]
+
+                else:
+                    # dump state active the data in memory is cleared (empty dict)
+                    proc_ws.pop(proc_current, None)
+
+            finally:
+                # PROCESS BLOCK END
+                self.logger.info_down(f'Process "{proc_obj.fx_name}" ... DONE')
+
+        # VARIABLE BLOCK END
+        self.logger.info_down(f'Variable "{proc_var}" ... DONE')
 
-            # re-assign current workflow to workspace
-            proc_wf_current = proc_wf_tmp
-            #proc_ws[proc_wf_current] = proc_return[-1]
-            #proc_ws[proc_current] = proc_return[-1]
+        return proc_memory, proc_return
@@ -0,0 +1,207 @@
+"""
+Library Features:
+
+Name:          lib_proc_compute_meteo
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251127'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import numpy as np
+import xarray as xr
+
+from shybox.orchestrator_toolkit.lib_orchestrator_utils import as_process
+from shybox.logging_toolkit.lib_logging_utils import with_logger
+from shybox.processing_toolkit.lib_proc_domain_mask import get_domain_mask
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# define constants
+KELVIN_OFFSET = 273.15
+MAGNUS_A, MAGNUS_B = 17.67, 243.5
+
+UNITS_KELVIN = ('k', 'kelvin', '')
+UNITS_CELSIUS = ('c', 'degc', 'celsius')
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the offset to convert the temperature to celsius (from the units attribute, default kelvin)
+def _get_celsius_offset(da: xr.DataArray, units_attr: str = 'units') -> float:
+    units = (da.attrs.get(units_attr, '') or '').lower()
+    return 0.0 if units in UNITS_CELSIUS else KELVIN_OFFSET
+
+
+# method to get the values of a data array as a float32 (n_lead, n_cells) view
+def _get_flat_values(da: xr.DataArray, n_cells: int) -> np.ndarray:
+    return np.asarray(da.values, dtype=np.float32).reshape(-1, n_cells)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to derive the meteo fields with numpy (in-place operations on the float32 output buffers)
+def _derive_meteo_numpy(t, td, u, v, mask, t_offset, td_offset, t_shift, clip, no_data, out_t, out_rh, out_ws):
+
+    if out_rh is not None:
+        # rh = 100 * exp(a*td_c/(td_c+b) - a*t_c/(t_c+b)) = 100 * exp(a*b/(t_c+b) - a*b/(td_c+b))
+        buf = np.empty_like(out_rh)
+        np.subtract(t, t_offset - MAGNUS_B, out=buf)
+        np.divide(MAGNUS_B, buf, out=buf)
+        np.subtract(td, td_offset - MAGNUS_B, out=out_rh)
+        np.divide(MAGNUS_B, out_rh, out=out_rh)
+        np.subtract(buf, out_rh, out=out_rh)
+        np.multiply(out_rh, MAGNUS_A, out=out_rh)
+        np.exp(out_rh, out=out_rh)
+        np.multiply(out_rh, 100.0, out=out_rh)
+        if clip:
+            np.clip(out_rh, 0.0, 100.0, out=out_rh)
+        out_rh[:, mask] = no_data
+
+    if out_ws is not None:
+        np.hypot(u, v, out=out_ws)
+        out_ws[:, mask] = no_data
+
+    if out_t is not None:
+        np.add(t, t_shift, out=out_t)
+        out_t[:, mask] = no_data
+
+
+# method to derive the meteo fields with numba (single loop over the cells)
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _derive_meteo_kernel(t, td, u, v, mask, t_offset, td_offset, t_shift, clip, no_data,
+                             do_t, do_rh, do_ws, out_t, out_rh, out_ws, n_lead):
+        for i in numba.prange(mask.size):
+            if mask[i]:
+                for k in range(n_lead):
+                    if do_t:
+                        out_t[k, i] = no_data
+                    if do_rh:
+                        out_rh[k, i] = no_data
+                    if do_ws:
+                        out_ws[k, i] = no_data
+                continue
+            for k in range(n_lead):
+                if do_rh:
+                    td_c = td[k, i] - td_offset
+                    t_c = t[k, i] - t_offset
+                    rh = 100.0 * np.exp(MAGNUS_A * td_c / (td_c + MAGNUS_B) - MAGNUS_A * t_c / (t_c + MAGNUS_B))
+                    if clip:
+                        rh = min(max(rh, 0.0), 100.0)
+                    out_rh[k, i] = rh
+                if do_ws:
+                    out_ws[k, i] = np.sqrt(u[k, i] * u[k, i] + v[k, i] * v[k, i])
+                if do_t:
+                    out_t[k, i] = t[k, i] + t_shift
+else:
+    _derive_meteo_kernel = None
+
+
+def _derive_meteo_numba(t, td, u, v, mask, t_offset, td_offset, t_shift, clip, no_data, out_t, out_rh, out_ws):
+    dummy = np.empty((1, 1), dtype=np.float32)
+    n_lead = [out for out in (out_t, out_rh, out_ws) if out is not None][0].shape[0]
+    _derive_meteo_kernel(
+        t if t is not None else dummy, td if td is not None else dummy,
+        u if u is not None else dummy, v if v is not None else dummy,
+        mask, np.float32(t_offset), np.float32(td_offset), np.float32(t_shift), clip, np.float32(no_data),
+        out_t is not None, out_rh is not None, out_ws is not None,
+        out_t if out_t is not None else dummy, out_rh if out_rh is not None else dummy,
+        out_ws if out_ws is not None else dummy, n_lead)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to derive air temperature, relative humidity and wind speed in a single pass
+@as_process(input_type='xarray', output_type='xarray')
+@with_logger(var_name='logger_stream')
+def compute_data_meteo(
+        t: xr.DataArray = None, td: xr.DataArray = None,
+        u: xr.DataArray = None, v: xr.DataArray = None,
+        ref: xr.DataArray = None, ref_value: (float, int) = -9999.0, mask_mode: str = 'lazy',
+        mask_no_data: (float, int) = None, to_celsius: bool = True, clip: bool = True,
+        engine: str = 'auto', units_attr: str = 'units',
+        name_t: str = 'air_temperature', name_rh: str = 'relative_humidity', name_ws: str = 'wind_speed',
+        **kwargs) -> xr.Dataset:
+    """
+    Fused version of convert_temperature_units, compute_data_rh and compute_data_wind_speed.
+
+    Each output is derived when its inputs are available (t -> temperature, t + td -> relative humidity,
+    u + v -> wind speed). The outputs are float32 buffers filled in one pass and masked with the terrain mask
+    of ref (shared by all the variables); the engine is "numba" (if installed), "numpy" or "auto".
+    The returned dataset keeps the grid coordinates of the inputs (ready for write_dataset_hmc).
+    """
+
+    if engine not in ('auto', 'numba', 'numpy'):
+        logger_stream.error(f'Engine "{engine}" is not available. Allowed: auto, numba, numpy')
+        raise NotImplementedError(f'Engine "{engine}" is not available')
+    if engine == 'numba' and _derive_meteo_kernel is None:
+        logger_stream.warning('Engine "numba" is not installed; the "numpy" engine is used')
+    use_numba = engine in ('auto', 'numba') and _derive_meteo_kernel is not None
+
+    do_t, do_rh, do_ws = t is not None, t is not None and td is not None, u is not None and v is not None
+    if not (do_t or do_ws):
+        logger_stream.error('Meteo derive needs at least the air temperature or the wind components')
+        raise RuntimeError('Meteo derive needs at least the air temperature or the wind components')
+
+    # reference data array (grid coordinates and shape of the outputs)
+    da_tmpl = t if do_t else u
+    shape = da_tmpl.shape
+    n_cells = int(np.prod(shape[-2:]))
+
+    # shared terrain mask (no masking if the reference is on another grid)
+    mask = np.zeros(n_cells, dtype=bool)
+    if ref is not None:
+        if tuple(ref.shape) == tuple(shape[-2:]):
+            mask = ~get_domain_mask(ref, ref_value=ref_value, mask_mode=mask_mode).valid.ravel()
+        else:
+            logger_stream.warning(
+                f'Reference shape {tuple(ref.shape)} does not match the data shape {tuple(shape[-2:])}; '
+                f'terrain mask not applied')
+    no_data = np.nan if mask_no_data is None else float(mask_no_data)
+
+    # temperature units (conversion offset as in convert_temperature_units)
+    t_offset = _get_celsius_offset(t, units_attr) if do_t else KELVIN_OFFSET
+    td_offset = _get_celsius_offset(td, units_attr) if do_rh else KELVIN_OFFSET
+    t_shift, t_units = 0.0, None
+    if do_t:
+        units = (t.attrs.get(units_attr, '') or '').lower()
+        t_units = t.attrs.get(units_attr)
+        if to_celsius and units in UNITS_KELVIN:
+            t_shift, t_units = -KELVIN_OFFSET, 'C'
+        elif not to_celsius and units in UNITS_CELSIUS + ('',):
+            t_shift, t_units = KELVIN_OFFSET, 'K'
+
+    # inputs (float32 views) and preallocated outputs
+    t_arr = _get_flat_values(t, n_cells) if do_t else None
+    td_arr = _get_flat_values(td, n_cells) if do_rh else None
+    u_arr = _get_flat_values(u, n_cells) if do_ws else None
+    v_arr = _get_flat_values(v, n_cells) if do_ws else None
+    n_lead = (t_arr if do_t else u_arr).shape[0]
+
+    out_t = np.empty((n_lead, n_cells), dtype=np.float32) if do_t else None
+    out_rh = np.empty((n_lead, n_cells), dtype=np.float32) if do_rh else None
+    out_ws = np.empty((n_lead, n_cells), dtype=np.float32) if do_ws else None
+
+    fx_derive = _derive_meteo_numba if use_numba else _derive_meteo_numpy
+    fx_derive(t_arr, td_arr, u_arr, v_arr, mask, t_offset, td_offset, t_shift, clip, no_data,
+              out_t, out_rh, out_ws)
+
+    # organize the dataset (same dims and coords of the inputs)
+    dset = xr.Dataset(coords=da_tmpl.coords)
+    if do_t:
+        dset[name_t] = xr.DataArray(out_t.reshape(shape), dims=da_tmpl.dims, coords=da_tmpl.coords,
+                                    attrs={**t.attrs, units_attr: t_units, 'long_name': 'Air temperature'})
+    if do_rh:
+        dset[name_rh] = xr.DataArray(out_rh.reshape(shape), dims=da_tmpl.dims, coords=da_tmpl.coords,
+                                     attrs={units_attr: '%', 'long_name': 'Relative Humidity'})
+    if do_ws:
+        dset[name_ws] = xr.DataArray(out_ws.reshape(u.shape), dims=u.dims, coords=u.coords,
+                                     attrs={units_attr: 'm s-1', 'long_name': 'Wind speed'})
+
+    return dset
+# ----------------------------------------------------------------------------------------------------------------------
@@ -4,18 +4,21 @@ Library Features:
 Name:          lib_proc_compute_radiation
 Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
 Date:          '20251121'
-Version:       '1.2.0'
+Version:       '1.3.0'
 """
 
 # ----------------------------------------------------------------------------------------------------------------------
 # libraries
 import logging
+import hashlib
+import threading
 
 import pandas as pd
 import numpy as np
 import xarray as xr
 
 from shybox.io_toolkit.lib_io_utils import create_darray
+from shybox.processing_toolkit.lib_proc_lut import get_lut
 from shybox.orchestrator_toolkit.lib_orchestrator_utils import as_process
 
 import matplotlib
@@ -33,6 +36,12 @@ lookup_table_cf_default = {
 }
 # ----------------------------------------------------------------------------------------------------------------------
 
+# ----------------------------------------------------------------------------------------------------------------------
+# cache of the per-grid astronomic terms (keyed by the grid hash)
+_ASTRONOMIC_GRID_CACHE = {}
+_ASTRONOMIC_GRID_LOCK = threading.Lock()
+# ----------------------------------------------------------------------------------------------------------------------
+
 # ----------------------------------------------------------------------------------------------------------------------
 # method to compute incoming radiation (from accumulated ssrd/strd)
 @as_process(input_type='xarray', output_type='xarray')
@@ -174,66 +183,39 @@ def compute_data_incoming_radiation(
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-# method to compute look-up table for a single 2D rain field
+# method to compute look-up table for a 2D or 3D rain field
 def apply_cloud_factor_lut(var_data_in,
                            lookup_table=None,
                            var_in='Rain',
-                           var_out='CloudFactor'):
+                           var_out='CloudFactor',
+                           out=None):
     """
-    Apply a rain→cloud-factor LUT to a 2D field.
+    Apply a rain→cloud-factor LUT to a 2D or 3D field.
 
     Parameters
     ----------
-    var_data_in : 2D ndarray (y, x)
-        Rain field for a single timestep.
+    var_data_in : ndarray (y, x) or (time, y, x)
+        Rain field.
     lookup_table : dict, optional
         LUT with ranges + output values. If None, use lookup_table_cf_default.
     var_in : str
         Key name of input variable in the LUT.
     var_out : str
         Key name of output variable in the LUT.
+    out : ndarray (float32), optional
+        Output buffer with the shape of var_data_in.
 
     Returns
     -------
-    var_data_out : 2D ndarray (y, x)
-        Cloud factor for the given timestep.
+    var_data_out : ndarray (y, x) or (time, y, x)
+        Cloud factor (float32, NaN where rain is NaN).
     """
     if lookup_table is None:
         lookup_table = lookup_table_cf_default
 
-    var_data_in = np.float32(var_data_in)
-    var_idx_nan = np.argwhere(np.isnan(var_data_in))
-
-    var_data_out = np.zeros(var_data_in.shape, dtype=np.float32)
-
-    for lu_table_key, lu_table_value in lookup_table.items():
-        lu_var_in = lu_table_value[var_in]
-        lu_var_out = lu_table_value[var_out]
-
-        if len(lu_var_in) == 2 and len(lu_var_out) == 1:
-            lu_var_in_min = lu_var_in[0]
-            lu_var_in_max = lu_var_in[1]
-            lu_value_out = lu_var_out[0]
-
-            if (lu_var_in_min is not None) and (lu_var_in_max is not None):
-                mask = ((var_data_in >= lu_var_in_min) &
-                        (var_data_in <  lu_var_in_max))
-            elif (lu_var_in_min is not None) and (lu_var_in_max is None):
-                mask = (var_data_in >= lu_var_in_min)
-            elif (lu_var_in_min is None) and (lu_var_in_max is not None):
-                mask = (var_data_in <= lu_var_in_max)
-            else:
-                log_stream.error(' ===> LookUp condition not available')
-                raise NotImplementedError('LookUp condition not available')
-
-            var_data_out[mask] = lu_value_out
-        else:
-            log_stream.error(' ===> LookUp variable range not available')
-            raise NotImplementedError('LookUp variable range not available')
-
-    # restore NaNs
-    if var_idx_nan.size > 0:
-        var_data_out[var_idx_nan[:, 0], var_idx_nan[:, 1]] = np.nan
+    # compiled LUT (sorted edges + values) applied with one searchsorted pass
+    lut_obj = get_lut(lookup_table, var_in, var_out)
+    var_data_out = lut_obj.apply(np.asarray(var_data_in, dtype=np.float32), out=out)
 
     return var_data_out
 # ----------------------------------------------------------------------------------------------------------------------
@@ -241,16 +223,18 @@ def apply_cloud_factor_lut(var_data_in,
 
 # ----------------------------------------------------------------------------------------------------------------------
 # method to compute cloud attenuation factor using time series of rain
-def compute_cloud_factor(data_rain, lookup_table_cf=None):
+def compute_cloud_factor(data_rain, lookup_table_cf=None, out=None):
     """
     Compute cloud attenuation factor from rain.
 
     Parameters
     ----------
-    data_rain : 3D ndarray (time, y, x)
+    data_rain : 2D ndarray (y, x) or 3D ndarray (time, y, x)
         Rain field.
     lookup_table_cf : dict, optional
         LUT; if None, use lookup_table_cf_default.
+    out : ndarray (float32), optional
+        Output buffer (same shape of data_rain).
 
     Returns
     -------
@@ -260,11 +244,8 @@ def compute_cloud_factor(data_rain, lookup_table_cf=None):
     if lookup_table_cf is None:
         lookup_table_cf = lookup_table_cf_default
 
-    ny, nx = data_rain.shape
-
-    data_cf = np.full((ny, nx), np.nan, dtype=np.float32)
     data_cf = apply_cloud_factor_lut(
-        data_rain, lookup_table_cf, 'Rain', 'CloudFactor'
+        data_rain, lookup_table_cf, 'Rain', 'CloudFactor', out=out
     )
 
     return data_cf
@@ -415,6 +396,119 @@ def exec_astronomic_radiation(
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the per-grid astronomic terms (computed once per grid and cached)
+def get_astronomic_grid(geo_x, geo_y, geo_z=None) -> dict:
+    """
+    Static terms of the FAO astronomic radiation for a grid (2D arrays):
+    sin/cos of latitude, solar time offset (0.06667 * (lz - lm), hours) and clear-sky factor.
+    """
+    grid_hash = hashlib.blake2b(digest_size=12)
+    for geo_arr in (geo_x, geo_y, geo_z):
+        if geo_arr is None:
+            grid_hash.update(b'none')
+            continue
+        geo_arr = np.ascontiguousarray(geo_arr, dtype=np.float64)
+        grid_hash.update(str(geo_arr.shape).encode())
+        grid_hash.update(geo_arr.tobytes())
+    grid_key = grid_hash.hexdigest()
+
+    with _ASTRONOMIC_GRID_LOCK:
+        if grid_key in _ASTRONOMIC_GRID_CACHE:
+            return _ASTRONOMIC_GRID_CACHE[grid_key]
+
+    geo_lz, geo_lm, geo_phi, param_gsc, param_as, param_bs = define_parameters(geo_x, geo_y)
+
+    grid_terms = {
+        'sin_phi': np.sin(geo_phi), 'cos_phi': np.cos(geo_phi),
+        'time_offset': 0.06667 * (geo_lz - geo_lm),
+        'cs_factor': param_as if geo_z is None else param_as + param_bs * geo_z,
+        'param_gsc': param_gsc, 'shape': np.shape(geo_phi)}
+
+    with _ASTRONOMIC_GRID_LOCK:
+        _ASTRONOMIC_GRID_CACHE[grid_key] = grid_terms
+
+    return grid_terms
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute astronomic radiation for a period (by FAO algorithm, batched over time)
+def exec_astronomic_radiation_batch(
+    var_data_cf,   # (time, y, x) or None
+    time,          # pd.DatetimeIndex (end of the intervals)
+    grid_terms,    # see get_astronomic_grid
+    time_delta=pd.Timedelta('1h'),
+    time_chunk=24,
+    return_mode="both"  # "both", "ar", "k"
+):
+    """
+    FAO astronomic radiation for all the intervals of a period in one broadcasted computation.
+
+    The solar geometry is computed per time step (vectors), the grid terms are cached per grid and the
+    (time, y, x) cube is filled by chunks of time steps (float32 output, float64 chunk temporaries).
+    Same formulation of exec_astronomic_radiation.
+    """
+    if isinstance(time_delta, str):
+        time_delta = pd.Timedelta(time_delta)
+
+    time = pd.DatetimeIndex(time)
+    seconds_delta = time_delta.total_seconds()
+    dt_mid_hours = seconds_delta / 3600.0
+    minutes_input_step = seconds_delta / 60.0
+
+    # solar geometry at the midpoint of the intervals (time,)
+    time_mid = time - time_delta / 2
+    hour_mid = np.asarray(time_mid.hour + time_mid.minute / 60.0 + time_mid.second / 3600.0, dtype=np.float64)
+    doy_mid = np.asarray(time_mid.dayofyear, dtype=np.float64)
+
+    ird = 1.0 + 0.033 * np.cos(2 * np.pi / 365.0 * doy_mid)
+    b = 2 * np.pi * (doy_mid - 81) / 364.0
+    solar_corr = 0.1645 * np.sin(2 * b) - 0.1255 * np.cos(b) - 0.025 * np.sin(b)
+    solar_decl = 0.4093 * np.sin(2 * np.pi / 365.0 * doy_mid - 1.405)
+
+    # interval terms: omega_end - omega_start is constant and
+    # sin(omega_end) - sin(omega_start) = 2 * sin(pi * dt / 24) * cos(omega_mid)
+    omega_width = np.pi * dt_mid_hours / 12.0
+    omega_sin = 2.0 * np.sin(np.pi * dt_mid_hours / 24.0)
+    ar_factor = 12.0 * minutes_input_step / np.pi * grid_terms['param_gsc'] * ird * 1e6 / seconds_delta
+
+    sin_phi, cos_phi = grid_terms['sin_phi'], grid_terms['cos_phi']
+    time_offset, cs_factor = grid_terms['time_offset'], grid_terms['cs_factor']
+
+    n_time, shape_grid = time.size, tuple(grid_terms['shape'])
+    var_model_ar = np.empty((n_time,) + shape_grid, dtype=np.float32)
+    var_model_k = np.empty((n_time,) + shape_grid, dtype=np.float32) if return_mode != 'ar' else None
+
+    for idx_start in range(0, n_time, max(int(time_chunk), 1)):
+        idx = slice(idx_start, min(idx_start + max(int(time_chunk), 1), n_time))
+        col = (slice(None), np.newaxis, np.newaxis)
+
+        omega_mid = np.pi / 12.0 * (hour_mid[idx][col] + time_offset + solar_corr[idx][col] - 12.0)
+        chunk_ar = ar_factor[idx][col] * (
+            omega_width * sin_phi * np.sin(solar_decl[idx])[col]
+            + omega_sin * cos_phi * np.cos(solar_decl[idx])[col] * np.cos(omega_mid))
+        np.maximum(chunk_ar, 0.0, out=chunk_ar)
+
+        if var_data_cf is not None:
+            chunk_ar[np.isnan(var_data_cf[idx])] = np.nan
+        var_model_ar[idx] = chunk_ar
+
+        if var_model_k is not None:
+            var_model_k[idx] = var_data_cf[idx] * cs_factor * var_model_ar[idx]
+
+    return_mode = return_mode.lower()
+    if return_mode == "ar":
+        return var_model_ar
+    elif return_mode == "k":
+        return var_model_k
+    elif return_mode == "both":
+        return var_model_ar, var_model_k
+    else:
+        raise ValueError("return_mode must be 'both', 'ar', or 'k'")
+# ----------------------------------------------------------------------------------------------------------------------
+
+
 # ----------------------------------------------------------------------------------------------------------------------
 # XARRAY PROCESS WRAPPER (same style as your other compute_data_* processes)
 @as_process(input_type='xarray', output_type='xarray')
@@ -500,7 +594,16 @@ def compute_data_astronomic_radiation(
     else:
         out_dtype = float
 
-    # 1) Cloud factor from rain (all numpy, shape (y, x))
+    # time series of rain (all the steps are computed together, shape (time, y, x))
+    time_dim = 'time'
+    if time_dim in rain.dims:
+        rain = rain.transpose(time_dim, ...)
+        if time_dim in rain.coords:
+            time = pd.DatetimeIndex(rain[time_dim].values)
+        else:
+            time = pd.DatetimeIndex(time if isinstance(time, (list, pd.DatetimeIndex)) else [time])
+
+    # 1) Cloud factor from rain (all numpy, shape (y, x) or (time, y, x))
     rain_np = np.asarray(rain.values, dtype=np.float32)
     data_cf = compute_cloud_factor(rain_np, lookup_table_cf=lookup_table_cf)
 
@@ -557,24 +660,25 @@ def compute_data_astronomic_radiation(
             f"longitude.shape={geo_x_values.shape}, latitude.shape={geo_y_values.shape}"
         )
 
-    # 3) Define FAO parameters
-    geo_lz, geo_lm, geo_phi, param_gsc, param_as, param_bs = define_parameters(
-        geo_x_values, geo_y_values
-    )
+    # 3) Define FAO parameters (per-grid terms cached)
+    grid_terms = get_astronomic_grid(geo_x_values, geo_y_values, geo_z_values)
 
-    # 4) FAO astronomic radiation core
-    var_model_ar, var_model_k = exec_astronomic_radiation(
-        var_data_cf=data_cf,  # (y, x)
-        geo_z=geo_z_values,  # (y, x)
-        time=time,
-        time_delta=time_delta,
-        geo_lz=geo_lz,
-        geo_lm=geo_lm,
-        geo_phi=geo_phi,
-        param_gsc=param_gsc,
-        param_as=param_as,
-        param_bs=param_bs
-    )
+    # 4) FAO astronomic radiation core (batched over the time steps)
+    if data_cf.ndim == 3:
+        var_model_ar, var_model_k = exec_astronomic_radiation_batch(
+            var_data_cf=data_cf,  # (time, y, x)
+            time=time,
+            grid_terms=grid_terms,
+            time_delta=time_delta
+        )
+    else:
+        var_model_ar, var_model_k = exec_astronomic_radiation_batch(
+            var_data_cf=data_cf[np.newaxis, :, :],  # (1, y, x)
+            time=pd.DatetimeIndex([pd.Timestamp(time)]),
+            grid_terms=grid_terms,
+            time_delta=time_delta
+        )
+        var_model_ar, var_model_k = var_model_ar[0], var_model_k[0]
 
     # 5) Wrap back to xarray
     if var_name_ar is None:
@@ -0,0 +1,198 @@
+"""
+Library Features:
+
+Name:          lib_proc_domain_mask
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251128'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import os
+import threading
+import weakref
+
+import numpy as np
+import xarray as xr
+
+from shybox.logging_toolkit.lib_logging_utils import with_logger
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (domain masks cache, by reference object)
+# (reentrant lock: the weakref callback can run from a garbage collection triggered while the lock is held)
+_MASK_CACHE = {}
+_MASK_LOCK = threading.RLock()
+
+MASK_MODES = ['lazy', 'strict', 'union']
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the domain mask (valid cells of the reference grid)
+class DomainMask:
+    """
+    Domain mask of a reference (terrain) grid.
+
+    The valid cells are stored as a flat index (and its complement), a bounding box and a packed bitmask.
+    Grids are handled as numpy (..., y, x) buffers: apply() masks them in place, compress() extracts the
+    valid cells as (..., n_valid) values and expand() rebuilds the full grids.
+    """
+
+    def __init__(self, valid: np.ndarray) -> None:
+
+        valid = np.asarray(valid, dtype=bool)
+        self.shape = tuple(int(n) for n in valid.shape)
+        self.size = int(valid.size)
+
+        self.index = np.flatnonzero(valid)                      # flat index of the valid cells
+        self.index_nodata = np.flatnonzero(~valid.ravel())      # flat index of the no-data cells
+        self.bits = np.packbits(valid.ravel())                  # packed bitmask (1 bit for each cell)
+
+        if self.index.size > 0:
+            rows, cols = np.unravel_index(self.index[[0, -1]], self.shape)
+            cols_valid = np.flatnonzero(valid.any(axis=0))
+            self.bbox = (int(rows[0]), int(rows[1]) + 1, int(cols_valid[0]), int(cols_valid[-1]) + 1)
+        else:
+            self.bbox = (0, 0, 0, 0)
+
+    def __repr__(self):
+        return f'DomainMask(shape={self.shape}, valid={self.n_valid}, bbox={self.bbox})'
+
+    @property
+    def n_valid(self) -> int:
+        return int(self.index.size)
+
+    # method to get the 2D valid mask (unpacked from the bitmask)
+    @property
+    def valid(self) -> np.ndarray:
+        return np.unpackbits(self.bits, count=self.size).astype(bool).reshape(self.shape)
+
+    # method to get the slices of the bounding box (rows, cols)
+    @property
+    def bbox_slices(self) -> (slice, slice):
+        return slice(self.bbox[0], self.bbox[1]), slice(self.bbox[2], self.bbox[3])
+
+    # method to get a (..., n_cells) view of a grid buffer
+    def _get_flat(self, data: np.ndarray) -> np.ndarray:
+        if tuple(data.shape[-2:]) != self.shape:
+            raise ValueError(f'Grid shape {tuple(data.shape[-2:])} does not match the domain shape {self.shape}')
+        return data.reshape(data.shape[:-2] + (self.size,))
+
+    # method to mask a (..., y, x) buffer in place (no-data cells set to no_data)
+    def apply(self, data: np.ndarray, no_data=np.nan) -> np.ndarray:
+        data_flat = self._get_flat(data)
+        if np.shares_memory(data_flat, data):
+            data_flat[..., self.index_nodata] = no_data
+        else:
+            data[..., ~self.valid] = no_data
+        return data
+
+    # method to compress a (..., y, x) buffer to the valid cells (..., n_valid)
+    def compress(self, data: np.ndarray) -> np.ndarray:
+        return np.take(self._get_flat(np.asarray(data)), self.index, axis=-1)
+
+    # method to expand the values of the valid cells (..., n_valid) to the full grid (..., y, x)
+    def expand(self, values: np.ndarray, fill_value=np.nan, dtype=None) -> np.ndarray:
+        values = np.asarray(values)
+        dtype = dtype if dtype is not None else np.result_type(values.dtype, np.asarray(fill_value).dtype)
+        data = np.full(values.shape[:-1] + (self.size,), fill_value, dtype=dtype)
+        data[..., self.index] = values
+        return data.reshape(values.shape[:-1] + self.shape)
+
+    # method to save the mask to disk (packed bitmask)
+    def save(self, file_name: str) -> None:
+        folder_name = os.path.dirname(file_name)
+        if folder_name:
+            os.makedirs(folder_name, exist_ok=True)
+        file_tmp = file_name + '.part.npz'
+        np.savez(file_tmp, bits=self.bits, shape=np.asarray(self.shape))
+        os.replace(file_tmp, file_name)
+
+    # method to load the mask from disk
+    @classmethod
+    def load(cls, file_name: str) -> 'DomainMask':
+        with np.load(file_name) as file_data:
+            shape = tuple(int(n) for n in file_data['shape'])
+            valid = np.unpackbits(file_data['bits'], count=int(np.prod(shape))).astype(bool)
+        return cls(valid.reshape(shape))
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the no-data cells of a reference grid
+@with_logger(var_name='logger_stream')
+def compute_nodata(ref_arr: np.ndarray, ref_value: (float, int) = -9999.0, mask_mode: str = 'lazy') -> np.ndarray:
+    """
+    Modes: "lazy" (ref_value cells, NaN cells if ref_value is not found), "strict" (ref_value cells, error if
+    ref_value is not found) and "union" (ref_value and NaN cells).
+    """
+
+    if mask_mode not in MASK_MODES:
+        logger_stream.error('Unknown mask_mode "' + str(mask_mode) + '" specified.')
+        raise NotImplementedError('Unknown mask_mode "' + str(mask_mode) + '" specified.')
+
+    ref_nan = np.isnan(ref_arr) if np.issubdtype(ref_arr.dtype, np.floating) else np.zeros(ref_arr.shape, bool)
+    if ref_value is None or np.isnan(ref_value):
+        return ref_nan
+
+    nodata = ref_arr == ref_value
+    if mask_mode == 'union':
+        return nodata | ref_nan
+    if nodata.any():
+        return nodata
+
+    # reference value not found in the reference array
+    if mask_mode == 'lazy':
+        logger_stream.warning(
+            'Reference value "' + str(ref_value) + '" not found in reference array; using NaN mask instead.')
+        return ref_nan
+    logger_stream.error(
+        'Reference value "' + str(ref_value) + '" not found in reference array; cannot proceed in strict mode.')
+    raise RuntimeError(
+        'Reference value "' + str(ref_value) + '" not found in reference array; cannot proceed in strict mode.')
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the domain mask of a reference grid (built once for each reference object and mode)
+def get_domain_mask(ref: (xr.DataArray, np.ndarray), ref_value: (float, int) = -9999.0,
+                    mask_mode: str = 'lazy') -> DomainMask:
+
+    mask_key = (str(ref_value), mask_mode)
+    with _MASK_LOCK:
+        ref_entry = _MASK_CACHE.get(id(ref))
+        if ref_entry is not None and ref_entry[0]() is ref and mask_key in ref_entry[1]:
+            return ref_entry[1][mask_key]
+
+    ref_arr = np.asarray(ref.values if isinstance(ref, xr.DataArray) else ref)
+    mask_obj = DomainMask(~compute_nodata(ref_arr, ref_value=ref_value, mask_mode=mask_mode))
+
+    # the reference (terrain) does not change during the run; entries are dropped with the reference object
+    try:
+        ref_weak = weakref.ref(ref, lambda _, ref_id=id(ref): _drop_domain_mask(ref_id))
+    except TypeError:
+        return mask_obj
+    with _MASK_LOCK:
+        ref_entry = _MASK_CACHE.get(id(ref))
+        if ref_entry is None or ref_entry[0]() is not ref:
+            ref_entry = _MASK_CACHE[id(ref)] = (ref_weak, {})
+        ref_entry[1][mask_key] = mask_obj
+
+    return mask_obj
+
+
+# method to drop the domain masks of a reference object
+def _drop_domain_mask(ref_id: int) -> None:
+    with _MASK_LOCK:
+        ref_entry = _MASK_CACHE.get(ref_id)
+        if ref_entry is not None and ref_entry[0]() is None:
+            _MASK_CACHE.pop(ref_id, None)
+
+
+# method to clear the domain masks cache
+def clear_domain_mask() -> None:
+    with _MASK_LOCK:
+        _MASK_CACHE.clear()
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,125 @@
+"""
+Library Features:
+
+Name:          lib_proc_lut
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251127'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import json
+import threading
+
+import numpy as np
+
+from shybox.logging_toolkit.lib_logging_utils import with_logger
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (compiled lookup tables cache)
+_LUT_CACHE = {}
+_LUT_LOCK = threading.Lock()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle a compiled threshold lookup table (sorted bin edges and values)
+class ThresholdLUT:
+    """
+    Compiled threshold lookup table.
+
+    The edges split the real line in 2 * n_edges + 1 regions: the open intervals between the edges and the
+    edges themselves. Each region has one output value, so the table is applied with a single searchsorted
+    pass, whatever the number of ranges; NaNs are kept as NaNs.
+    """
+
+    def __init__(self, edges: np.ndarray, values: np.ndarray) -> None:
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def __repr__(self):
+        return f'ThresholdLUT(edges={self.edges.tolist()}, values={self.values.tolist()})'
+
+    # method to apply the table to a 2D (y, x) or 3D (time, y, x) field
+    def apply(self, data: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+
+        data = np.asarray(data)
+        if out is None:
+            out = np.empty(data.shape, dtype=np.float32)
+        elif out.shape != data.shape:
+            raise ValueError(f'Output buffer shape {out.shape} does not match the data shape {data.shape}')
+
+        # region index: 2*i for the interval before edges[i], 2*i+1 for edges[i] itself
+        idx = np.searchsorted(self.edges, data, side='left')
+        idx_edge = np.minimum(idx, self.edges.size - 1)
+        region = 2 * idx + (self.edges[idx_edge] == data)
+
+        np.take(self.values, region, out=out)
+        out[np.isnan(data)] = np.nan
+
+        return out
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compile a lookup table defined by ranges ({key: {var_in: [min, max], var_out: [value]}})
+@with_logger(var_name='logger_stream')
+def compile_lut(lookup_table: dict, var_in: str, var_out: str, default_value: float = 0.0) -> ThresholdLUT:
+    """
+    Ranges follow the original masks (entries applied in order, later entries win):
+    [min, max) if both limits are set, >= min if max is None, <= max if min is None.
+    Values outside all the ranges get default_value.
+    """
+
+    ranges = []
+    for lu_table_key, lu_table_value in lookup_table.items():
+        lu_var_in, lu_var_out = lu_table_value[var_in], lu_table_value[var_out]
+        if len(lu_var_in) != 2 or len(lu_var_out) != 1:
+            logger_stream.error(' ===> LookUp variable range not available')
+            raise NotImplementedError('LookUp variable range not available')
+        lu_var_in_min, lu_var_in_max = lu_var_in
+        if lu_var_in_min is None and lu_var_in_max is None:
+            logger_stream.error(' ===> LookUp condition not available')
+            raise NotImplementedError('LookUp condition not available')
+        ranges.append((lu_var_in_min, lu_var_in_max, lu_var_out[0]))
+
+    edges = np.unique([limit for lu_min, lu_max, _ in ranges for limit in (lu_min, lu_max) if limit is not None])
+    edges = edges.astype(np.float64)
+
+    # representative value of each region (the edges and the midpoints of the intervals)
+    points = np.empty(2 * edges.size + 1, dtype=np.float64)
+    points[1::2] = edges
+    points[0], points[-1] = edges[0] - 1.0, edges[-1] + 1.0
+    points[2:-1:2] = (edges[:-1] + edges[1:]) / 2.0
+
+    values = np.full(points.shape, default_value, dtype=np.float64)
+    for lu_min, lu_max, lu_value in ranges:
+        if lu_min is not None and lu_max is not None:
+            mask = (points >= lu_min) & (points < lu_max)
+        elif lu_min is not None:
+            mask = points >= lu_min
+        else:
+            mask = points <= lu_max
+        values[mask] = lu_value
+
+    return ThresholdLUT(edges=edges, values=values)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get a compiled lookup table (cached by the table definition)
+def get_lut(lookup_table: dict, var_in: str, var_out: str, default_value: float = 0.0) -> ThresholdLUT:
+
+    lut_key = json.dumps([lookup_table, var_in, var_out, default_value], sort_keys=True, default=str)
+    with _LUT_LOCK:
+        if lut_key in _LUT_CACHE:
+            return _LUT_CACHE[lut_key]
+
+    lut_obj = compile_lut(lookup_table, var_in, var_out, default_value=default_value)
+    with _LUT_LOCK:
+        _LUT_CACHE[lut_key] = lut_obj
+
+    return lut_obj
+# ----------------------------------------------------------------------------------------------------------------------
@@ -3,8 +3,8 @@ Library Features:
 
 Name:          lib_proc_mask
 Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
-Date:          '20250203'
-Version:       '1.0.0'
+Date:          '20251128'
+Version:       '1.1.0'
 """
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -17,6 +17,7 @@ import xarray as xr
 from shybox.io_toolkit.lib_io_utils import create_darray
 from shybox.orchestrator_toolkit.lib_orchestrator_utils import as_process
 from shybox.logging_toolkit.lib_logging_utils import with_logger
+from shybox.processing_toolkit.lib_proc_domain_mask import get_domain_mask
 
 import matplotlib
 import matplotlib.pyplot as plt
@@ -37,45 +38,31 @@ def mask_data_by_ref(
                 logger_stream.error('Change the no_data value or the grid format')
                 raise RuntimeError('Change the no_data value or the grid format')
 
+    data_cast = False
     if mask_format is not None:
         if mask_format == 'integer':
-            data = data.astype(int)
+            data, data_cast = data.astype(int), True
         elif mask_format == 'float':
-            data = data.astype(float)
+            data, data_cast = data.astype(float), True
         else:
             logger_stream.error('Change the mask_format value or the grid format')
             raise NotImplemented('Mask type "' + mask_format + '"not implemented yet')
 
-    # array to check
-    ref_arr = ref.values
-
-    # Check if ref_value exists in the array (handle NaN safely)
-    if np.isnan(ref_value):
-        # ref_value itself is NaN → directly use isnan
-        mask = np.isnan(ref_arr)
-    else:
-        count = np.count_nonzero(ref_arr == ref_value)
-
-        if count > 0:
-            # Normal case: ref_value is present
-            mask = ref_arr == ref_value
-        else:
-            # Fallback: ref_value not present → try using NaN mask
-            if mask_mode == 'lazy':
-                logger_stream.warning(
-                    'Reference value "' + str(ref_value) + '" not found in reference array; using NaN mask instead.')
-                mask = np.isnan(ref_arr)
-            elif mask_mode == 'strict':
-                logger_stream.error(
-                    'Reference value "' + str(ref_value) + '" not found in reference array; cannot proceed in strict mode.')
-                raise RuntimeError(
-                    'Reference value "' + str(ref_value) + '" not found in reference array; cannot proceed in strict mode.')
-            else:
-                logger_stream.error('Unknown mask_mode "' + str(mask_mode) + '" specified.')
-                raise NotImplemented('Unknown mask_mode "' + str(mask_mode) + '" specified.')
-
-    # Apply mask
-    data = xr.where(mask, mask_no_data, data)
+    if mask_mode not in ['lazy', 'strict']:
+        logger_stream.error('Unknown mask_mode "' + str(mask_mode) + '" specified.')
+        raise NotImplementedError('Unknown mask_mode "' + str(mask_mode) + '" specified.')
+
+    # get the domain mask (computed once for each reference grid, value and mode)
+    domain_mask = get_domain_mask(ref, ref_value=ref_value, mask_mode=mask_mode)
+
+    # apply mask in place (on a private buffer, the input values can be shared)
+    mask_no_data = np.nan if mask_no_data is None else mask_no_data
+    data_values = data.values
+    data_dtype = np.result_type(data_values.dtype, mask_no_data)
+    if not data_cast or data_values.dtype != data_dtype or not data_values.flags.writeable:
+        data_values = data_values.astype(data_dtype)
+    domain_mask.apply(data_values, no_data=mask_no_data)
+    data = data.copy(deep=False, data=data_values)
 
     """ debug plot
     plt.figure()
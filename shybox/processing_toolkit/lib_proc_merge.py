@@ -17,11 +17,10 @@ import xarray as xr
 import numpy as np
 import pandas as pd
 
-from pyresample.geometry import GridDefinition
-from pyresample.kd_tree import resample_nearest, resample_gauss, resample_custom#
 from repurpose.resample import resample_to_grid
 
-from shybox.io_toolkit.lib_io_utils import create_darray
+from shybox.processing_toolkit.lib_proc_resample_weights import get_weights, get_grid_values, create_grid_darray
+from shybox.processing_toolkit.lib_proc_domain_mask import get_domain_mask
 from shybox.orchestrator_toolkit.lib_orchestrator_utils import as_process
 from shybox.logging_toolkit.lib_logging_utils import with_logger
 from shybox.generic_toolkit.lib_utils_debug import plot_data, dump_data2nc
@@ -29,8 +28,8 @@ from shybox.generic_toolkit.lib_utils_debug import plot_data, dump_data2nc
 
 
 # ----------------------------------------------------------------------------------------------------------------------
-# method to merge data by time
-@as_process(input_type='xarray', output_type='xarray')
+# method to merge data by time (the step values and the reference values are modified in place)
+@as_process(input_type='xarray', output_type='xarray', writes_inplace=True)
 @with_logger(var_name='logger_stream')
 def merge_data_by_time(
         data: (xr.DataArray, list), ref: xr.DataArray,
@@ -128,6 +127,7 @@ def merge_data_by_ref(
         max_distance: int = 18000,
         neighbours: int = 8,
         fill_value = np.nan,
+        weights_cache: str = None,
         debug: bool = False,
         **kwargs):
 
@@ -160,20 +160,21 @@ def merge_data_by_ref(
         )
         ref_no_data = dset_no_data
 
-    # organize reference data & mask
-    ref_data = ref.values.astype(np.float64)
-    ref_data[ref_data == ref_no_data] = np.nan
-    ref_nan = np.isnan(ref_data)
+    # organize reference mask (no-data and NaN cells, computed once for each reference grid)
+    domain_mask = get_domain_mask(ref, ref_value=ref_no_data, mask_mode='union')
 
     ref_x_1d, ref_y_1d = ref[var_geo_x].values, ref[var_geo_y].values
     ref_x_2d, ref_y_2d = np.meshgrid(ref_x_1d, ref_y_1d)
-    ref_grid = GridDefinition(lons=ref_x_2d, lats=ref_y_2d)
+
+    # check resampling method
+    if method not in ['nn', 'gauss', 'idw']:
+        logger_stream.error(f'Resampling method "{method}" is not available')
+        raise NotImplementedError(f'Resampling method "{method}" is not available')
 
     # merge/resample per variable
     var_obj = []
     for var_name in var_list:
-        var_attrs = None
-        var_merge = np.full_like(ref_data, np.nan, dtype=np.float64)
+        var_attrs, var_merge, var_lead, var_src = None, None, [], None
 
         for ds in ds_list:
             if var_name not in ds.data_vars:
@@ -183,46 +184,24 @@ def merge_data_by_ref(
             if var_attrs is None:
                 var_attrs = dict(da_in.attrs)
 
-            var_data = da_in.values.astype(np.float64)
+            # grid values as (y, x) or (time, y, x) (all the steps are resampled together)
+            var_lead, var_data = get_grid_values(da_in, var_geo_x, var_geo_y)
+            var_data = var_data.astype(np.float64)
+            if var_merge is None:
+                var_merge = np.full(var_data.shape[:-2] + domain_mask.shape, np.nan, dtype=np.float64)
+                var_src = da_in
             var_data[var_data == var_no_data] = np.nan  # mask source nodata before resampling
 
-            var_x_1d = ds[var_geo_x].values
-            var_y_1d = ds[var_geo_y].values
-            var_x_2d, var_y_2d = np.meshgrid(var_x_1d, var_y_1d)
-            var_grid = GridDefinition(lons=var_x_2d, lats=var_y_2d)
-
-            if method == 'nn':
-                var_resample = resample_nearest(
-                    var_grid, var_data, ref_grid,
-                    radius_of_influence=max_distance,
-                    fill_value=fill_value
-                )
-
-            elif method == 'gauss':
-                var_resample = resample_gauss(
-                    var_grid, var_data, ref_grid,
-                    radius_of_influence=max_distance,
-                    neighbours=neighbours,
-                    sigmas=250000,
-                    fill_value=fill_value
-                )
-            elif method == 'idw':
-                weight_fx = lambda r: 1 / (r ** 2)
-                var_resample = resample_custom(
-                    var_grid, var_data, ref_grid,
-                    radius_of_influence=max_distance,
-                    neighbours=neighbours,
-                    weight_funcs=weight_fx,
-                    fill_value=fill_value
-                )
-            else:
-                logger_stream.error(f'Resampling method "{method}" is not available')
-                raise NotImplementedError(f'Resampling method "{method}" is not available')
+            # get the resampling weights (neighbour search computed once per grids and method)
+            weights_obj = get_weights(
+                ds[var_geo_x].values, ds[var_geo_y].values, ref_x_1d, ref_y_1d,
+                method=method, max_distance=max_distance, neighbours=neighbours, cache_folder=weights_cache)
+            var_resample = weights_obj.apply(var_data, fill_value=fill_value)
 
             # sanitize resampled values and honor reference mask
             if np.isfinite(var_no_data):
                 var_resample[var_resample == var_no_data] = np.nan
-            var_resample[ref_nan] = np.nan
+            domain_mask.apply(var_resample, no_data=np.nan)
 
             # merge: overwrite where finite
             mask_finite = np.isfinite(var_resample)
@@ -235,15 +214,15 @@ def merge_data_by_ref(
                 plot_data(var_merge, title=f'Merged data: {var_name}')
 
         # keep ref NaNs as NaN
-        var_merge[ref_nan] = np.nan
+        domain_mask.apply(var_merge, no_data=np.nan)
 
         # debug plot (merge data)
         if debug:
             plot_data(var_merge, title=f'Merged data: {var_name}')
 
         # build output DataArray aligned to ref grid
-        var_da = create_darray(
-            var_merge, ref_x_2d[0, :], ref_y_2d[:, 0], name=var_name,
+        var_da = create_grid_darray(
+            var_merge, var_src, var_lead, ref_x_2d[0, :], ref_y_2d[:, 0], name=var_name,
             coord_name_x=coord_name_x, coord_name_y=coord_name_y,
             dim_name_x=dim_name_x, dim_name_y=dim_name_y
         )
@@ -0,0 +1,244 @@
+"""
+Library Features:
+
+Name:          lib_proc_resample_weights
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251120'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import hashlib
+import os
+import threading
+
+import numpy as np
+import xarray as xr
+
+from pyresample.geometry import GridDefinition
+from pyresample.kd_tree import get_neighbour_info
+
+from shybox.io_toolkit.lib_io_utils import create_darray
+from shybox.logging_toolkit.lib_logging_utils import with_logger
+# ----------------------------------------------------------------------------------------------------------------------
+
+# ----------------------------------------------------------------------------------------------------------------------
+# globals variables (resampling weights cache)
+_WEIGHTS_CACHE = {}
+_WEIGHTS_LOCK = threading.Lock()
+
+# default sigma of the gaussian weights (as used by the resample_gauss calls)
+SIGMA_DEFAULT = 250000
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the resampling weights (neighbour indices and normalized weights)
+class ResampleWeights:
+
+    def __init__(self, index: np.ndarray, weight: np.ndarray, valid: np.ndarray, shape_out: tuple) -> None:
+        self.index = index              # (n_out, neighbours) flat indices on the source grid
+        self.weight = weight            # (n_out, neighbours) normalized weights (0 for missing neighbours)
+        self.valid = valid              # (n_out,) target cells with at least one neighbour
+        self.shape_out = tuple(int(n) for n in shape_out)
+
+    def __repr__(self):
+        return f'ResampleWeights(shape_out={self.shape_out}, neighbours={self.index.shape[1]})'
+
+    # method to apply the weights to a 2D (y, x) or 3D (time, y, x) field
+    def apply(self, data: np.ndarray, fill_value=np.nan) -> np.ndarray:
+
+        data = np.asarray(data)
+        lead_shape = data.shape[:-2]
+        data_flat = data.reshape(lead_shape + (-1,))
+
+        if self.index.shape[1] == 1:
+            values = data_flat[..., self.index[:, 0]]
+        else:
+            # missing neighbours are zeroed (avoid nan * 0 on the placeholder index)
+            values = np.where(self.weight > 0, data_flat[..., self.index], 0.0)
+            values = np.einsum('...nk,nk->...n', values, self.weight)
+
+        values = values.astype(np.result_type(values.dtype, np.asarray(fill_value).dtype), copy=False)
+        values[..., ~self.valid] = fill_value
+
+        return values.reshape(lead_shape + self.shape_out)
+
+    # method to save the weights to disk
+    def save(self, file_name: str) -> None:
+        folder_name = os.path.dirname(file_name)
+        if folder_name:
+            os.makedirs(folder_name, exist_ok=True)
+        file_tmp = file_name + '.part.npz'
+        np.savez(file_tmp, index=self.index, weight=self.weight, valid=self.valid,
+                 shape_out=np.asarray(self.shape_out))
+        os.replace(file_tmp, file_name)
+
+    # method to load the weights from disk
+    @classmethod
+    def load(cls, file_name: str) -> 'ResampleWeights':
+        with np.load(file_name) as file_data:
+            return cls(index=file_data['index'], weight=file_data['weight'], valid=file_data['valid'],
+                       shape_out=tuple(file_data['shape_out']))
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the hash of a grid (1D or 2D coordinates)
+def hash_grid(geo_x: np.ndarray, geo_y: np.ndarray) -> str:
+    grid_hash = hashlib.blake2b(digest_size=12)
+    for geo_arr in (geo_x, geo_y):
+        geo_arr = np.ascontiguousarray(geo_arr, dtype=np.float64)
+        grid_hash.update(str(geo_arr.shape).encode())
+        grid_hash.update(geo_arr.tobytes())
+    return grid_hash.hexdigest()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to create the 2D grid coordinates
+def _to_grid_2d(geo_x: np.ndarray, geo_y: np.ndarray) -> (np.ndarray, np.ndarray):
+    if geo_x.ndim == 1 and geo_y.ndim == 1:
+        return np.meshgrid(geo_x, geo_y)
+    return geo_x, geo_y
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to compute the resampling weights (kd-tree neighbour search done once)
+@with_logger(var_name='logger_stream')
+def compute_weights(src_x: np.ndarray, src_y: np.ndarray, dst_x: np.ndarray, dst_y: np.ndarray,
+                    method: str = 'nn', max_distance: float = 18000, neighbours: int = 8,
+                    sigma: float = SIGMA_DEFAULT) -> ResampleWeights:
+
+    src_x_2d, src_y_2d = _to_grid_2d(src_x, src_y)
+    dst_x_2d, dst_y_2d = _to_grid_2d(dst_x, dst_y)
+
+    src_grid = GridDefinition(lons=src_x_2d, lats=src_y_2d)
+    dst_grid = GridDefinition(lons=dst_x_2d, lats=dst_y_2d)
+
+    if method == 'nn':
+        neighbours = 1
+    elif method not in ['gauss', 'idw']:
+        logger_stream.error(f'Resampling method "{method}" is not available')
+        raise NotImplementedError(f'Resampling method "{method}" is not available')
+
+    valid_in, valid_out, index_arr, dist_arr = get_neighbour_info(
+        src_grid, dst_grid, radius_of_influence=max_distance, neighbours=neighbours)
+
+    if index_arr.ndim == 1:
+        index_arr, dist_arr = index_arr[:, np.newaxis], dist_arr[:, np.newaxis]
+
+    # map the neighbour indices (on the valid input points) to the flat source grid
+    src_idx = np.flatnonzero(np.asarray(valid_in).ravel())
+    missing = index_arr >= src_idx.size
+    index_arr = src_idx[np.where(missing, 0, index_arr)]
+
+    # compute the weights of the neighbours (missing neighbours have 0 weight)
+    dist_arr = np.where(missing, 1.0, dist_arr)
+    if method == 'nn':
+        weight_arr = np.ones_like(dist_arr)
+    elif method == 'gauss':
+        weight_arr = np.exp(-dist_arr ** 2 / sigma ** 2)
+    else:
+        with np.errstate(divide='ignore'):
+            weight_arr = 1.0 / dist_arr ** 2
+        # exact matches take the value of the coincident point
+        exact = np.isinf(weight_arr).any(axis=1)
+        weight_arr[exact] = np.isinf(weight_arr[exact]).astype(np.float64)
+    weight_arr[missing] = 0.0
+
+    weight_norm = weight_arr.sum(axis=1)
+    valid_arr = weight_norm > 0
+    weight_arr[valid_arr] /= weight_norm[valid_arr, np.newaxis]
+
+    # expand from the valid output points to the whole target grid
+    valid_out = np.asarray(valid_out).ravel()
+    n_out, n_nb = valid_out.size, index_arr.shape[1]
+
+    index = np.zeros((n_out, n_nb), dtype=np.int64)
+    weight = np.zeros((n_out, n_nb), dtype=np.float64)
+    valid = np.zeros(n_out, dtype=bool)
+    index[valid_out], weight[valid_out], valid[valid_out] = index_arr, weight_arr, valid_arr
+
+    return ResampleWeights(index=index, weight=weight, valid=valid, shape_out=dst_x_2d.shape)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the resampling weights (from memory, from disk or computed)
+def get_weights(src_x: np.ndarray, src_y: np.ndarray, dst_x: np.ndarray, dst_y: np.ndarray,
+                method: str = 'nn', max_distance: float = 18000, neighbours: int = 8,
+                sigma: float = SIGMA_DEFAULT, cache_folder: str = None) -> ResampleWeights:
+
+    if method == 'nn':
+        neighbours = 1
+    weights_key = '_'.join([
+        hash_grid(src_x, src_y), hash_grid(dst_x, dst_y), str(method), str(max_distance), str(neighbours)]
+        + ([str(sigma)] if method == 'gauss' else []))
+
+    with _WEIGHTS_LOCK:
+        if weights_key in _WEIGHTS_CACHE:
+            return _WEIGHTS_CACHE[weights_key]
+
+    weights_file = None
+    if cache_folder is not None:
+        weights_file = os.path.join(cache_folder, f'weights_{weights_key}.npz')
+
+    if weights_file is not None and os.path.exists(weights_file):
+        weights_obj = ResampleWeights.load(weights_file)
+    else:
+        weights_obj = compute_weights(
+            src_x, src_y, dst_x, dst_y,
+            method=method, max_distance=max_distance, neighbours=neighbours, sigma=sigma)
+        if weights_file is not None:
+            weights_obj.save(weights_file)
+
+    with _WEIGHTS_LOCK:
+        _WEIGHTS_CACHE[weights_key] = weights_obj
+
+    return weights_obj
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to clear the resampling weights cache (memory only)
+def clear_weights() -> None:
+    with _WEIGHTS_LOCK:
+        _WEIGHTS_CACHE.clear()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to get the grid values of a data array as (..., y, x) (leading dims e.g. time are kept)
+def get_grid_values(da: xr.DataArray, var_geo_x: str = 'longitude', var_geo_y: str = 'latitude') \
+        -> (list, np.ndarray):
+    geo_dims = list(dict.fromkeys(da[var_geo_y].dims + da[var_geo_x].dims))
+    lead_dims = [dim for dim in da.dims if dim not in geo_dims]
+    return lead_dims, da.transpose(*lead_dims, *geo_dims).values
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to create the data array of the resampled values (2D or with leading dims e.g. time)
+def create_grid_darray(values: np.ndarray, da_src: xr.DataArray, lead_dims: list,
+                       geo_x: np.ndarray, geo_y: np.ndarray, name: str = None,
+                       coord_name_x: str = 'longitude', coord_name_y: str = 'latitude',
+                       dim_name_x: str = 'longitude', dim_name_y: str = 'latitude') -> xr.DataArray:
+
+    if not lead_dims:
+        return create_darray(
+            values, geo_x, geo_y, name=name,
+            coord_name_x=coord_name_x, coord_name_y=coord_name_y, dim_name_x=dim_name_x, dim_name_y=dim_name_y)
+
+    if geo_x.ndim == 2:
+        geo_x = geo_x[0, :]
+    if geo_y.ndim == 2:
+        geo_y = geo_y[:, 0]
+
+    coords = {dim: da_src[dim].values for dim in lead_dims if dim in da_src.coords}
+    coords.update({coord_name_x: (dim_name_x, geo_x), coord_name_y: (dim_name_y, geo_y)})
+
+    return xr.DataArray(values, dims=list(lead_dims) + [dim_name_y, dim_name_x], coords=coords, name=name)
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,127 @@
+"""
+Library Features:
+
+Name:          lib_proc_sparse_grid
+Author(s):     Fabio Delogu (fabio.delogu@cimafoundation.org)
+Date:          '20251128'
+Version:       '1.0.0'
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# libraries
+import numpy as np
+import xarray as xr
+
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+from shybox.processing_toolkit.lib_proc_domain_mask import DomainMask, get_domain_mask
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# class to handle the values of the active cells of a domain grid
+class SparseGrid(NDArrayOperatorsMixin):
+    """
+    Grid values stored on the active (valid) cells of the domain only, as (..., n_valid) arrays.
+
+    The full grid (dims, coords of the data array) is kept as a template to rebuild the data array at the I/O
+    boundaries. Numpy ufuncs and arithmetic operators work on the active values and return sparse grids.
+    """
+
+    def __init__(self, values: np.ndarray, mask: DomainMask, dims: (list, tuple), coords: dict = None,
+                 attrs: dict = None, name: str = None) -> None:
+
+        self.values = np.asarray(values)
+        self.mask = mask
+        self.dims = tuple(dims)
+        self.coords = coords if coords is not None else {}
+        self.attrs = dict(attrs) if attrs is not None else {}
+        self.name = name
+
+        if self.values.shape[-1] != mask.n_valid:
+            raise ValueError(f'Sparse values have {self.values.shape[-1]} cells, domain has {mask.n_valid} cells')
+
+    def __repr__(self):
+        return f'SparseGrid(name={self.name}, shape={self.shape}, active={self.mask.n_valid}, dtype={self.dtype})'
+
+    @property
+    def shape(self) -> tuple:
+        return self.values.shape[:-1] + self.mask.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    # method to create a sparse grid with the same template and other values
+    def copy(self, data: np.ndarray = None) -> 'SparseGrid':
+        values = self.values.copy() if data is None else data
+        return SparseGrid(values, self.mask, self.dims, self.coords, self.attrs, self.name)
+
+    # method to cast the active values
+    def astype(self, dtype) -> 'SparseGrid':
+        return self.copy(data=self.values.astype(dtype))
+
+    # method to apply the numpy ufuncs on the active values
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(obj.values if isinstance(obj, SparseGrid) else obj for obj in inputs)
+        if 'out' in kwargs:
+            kwargs['out'] = tuple(obj.values if isinstance(obj, SparseGrid) else obj for obj in kwargs['out'])
+        result = getattr(ufunc, method)(*inputs, **kwargs)
+        if isinstance(result, tuple):
+            return tuple(self.copy(data=obj) for obj in result)
+        if method == 'at' or not isinstance(result, np.ndarray) or result.shape[-1:] != self.values.shape[-1:]:
+            return result
+        return self.copy(data=result)
+
+    # method to create a sparse grid from a data array (grid as (..., y, x))
+    @classmethod
+    def from_darray(cls, da: xr.DataArray, mask: DomainMask, dtype=None) -> 'SparseGrid':
+        values = mask.compress(da.values)
+        if dtype is not None:
+            values = values.astype(dtype, copy=False)
+        return cls(values, mask, da.dims, {key: da.coords[key] for key in da.coords}, da.attrs, da.name)
+
+    # method to rebuild the data array of the full grid (inactive cells set to fill_value)
+    def to_darray(self, fill_value=np.nan) -> xr.DataArray:
+        values = self.mask.expand(self.values, fill_value=fill_value)
+        return xr.DataArray(values, dims=self.dims, coords=self.coords, attrs=self.attrs, name=self.name)
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# method to convert the data array(s) on the domain grid to sparse grids (other objects are returned as they are)
+def to_sparse(obj, mask: DomainMask):
+    if isinstance(obj, SparseGrid):
+        return obj if obj.mask is mask else to_sparse(obj.to_darray(), mask)
+    if isinstance(obj, xr.DataArray):
+        if obj.ndim >= 2 and tuple(obj.shape[-2:]) == mask.shape:
+            return SparseGrid.from_darray(obj, mask)
+        return obj
+    if isinstance(obj, dict):
+        return {key: to_sparse(value, mask) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(to_sparse(value, mask) for value in obj)
+    return obj
+
+
+# method to convert the sparse grid(s) back to data arrays (other objects are returned as they are)
+def to_grid(obj, fill_value=np.nan):
+    if isinstance(obj, SparseGrid):
+        return obj.to_darray(fill_value=fill_value)
+    if isinstance(obj, dict):
+        return {key: to_grid(value, fill_value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(to_grid(value, fill_value) for value in obj)
+    return obj
+
+
+# method to get the domain mask used by the sparse processes (from the process reference)
+def get_sparse_mask(ref: xr.DataArray = None, ref_value: (float, int) = -9999.0) -> (DomainMask, None):
+    if ref is None:
+        return None
+    return get_domain_mask(ref, ref_value=ref_value, mask_mode='lazy')
+# ----------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from shybox.logging_toolkit.logging_handler import LoggingManager
+
+
+@pytest.fixture
+def logger(tmp_path):
+    LoggingManager.setup(logger_folder=str(tmp_path), logger_file='test.log', handlers=['file'],
+                         force_reconfigure=True)
+    return LoggingManager(name='test', set_as_current=True)
+
+
+@pytest.fixture
+def grid_file(tmp_path):
+    # hourly (time, latitude, longitude) grid with ascending latitudes
+    times = pd.date_range('2025-01-01', periods=6, freq='h')
+    values = np.random.default_rng(0).random((6, 4, 5)) * 300
+    dset = xr.Dataset({'t2m': (('time', 'latitude', 'longitude'), values)},
+                      coords={'time': times, 'latitude': np.linspace(43, 44, 4),
+                              'longitude': np.linspace(10, 11, 5)})
+    file_name = tmp_path / 'grid.nc'
+    dset.to_netcdf(file_name)
+    return file_name, dset
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from shybox.dataset_toolkit.dataset_handler_cache import (
+    MemoryCache, DatasetCache, materialize_data, is_frozen_data, get_dataset_cache, set_dataset_cache)
+
+
+def _get_data():
+    return xr.DataArray(np.arange(24, dtype=np.float32).reshape(2, 3, 4), dims=('time', 'y', 'x'),
+                        coords={'time': pd.date_range('2025-01-01', periods=2, freq='h')}, name='var')
+
+
+def test_memory_cache_returns_read_only_views():
+    cache = MemoryCache()
+    cache.put(_get_data())
+
+    view_a, view_b = cache.get(), cache.get()
+    assert np.shares_memory(view_a.values, view_b.values)
+    assert is_frozen_data(view_a)
+    with pytest.raises(ValueError):
+        view_a.values[0, 0, 0] = -1.0
+    assert cache.stats()['views'] == 2
+
+
+def test_memory_cache_writeable_copy():
+    cache = MemoryCache()
+    cache.put(_get_data())
+
+    data = cache.get(writeable=True)
+    data.values[0, 0, 0] = -1.0
+    assert cache.get().values[0, 0, 0] == 0.0
+    assert cache.stats()['copies'] == 1
+
+
+def test_materialize_data_copies_only_frozen_buffers():
+    cache = MemoryCache()
+    cache.put(_get_data())
+    frozen, private = cache.get(), _get_data()
+
+    data = materialize_data({'a': frozen, 'b': private})
+    assert not is_frozen_data(data['a'])
+    assert not np.shares_memory(data['a'].values, frozen.values)
+    assert data['b'] is private
+
+
+def test_dataset_cache_evicts_least_recently_used():
+    cache = DatasetCache(max_bytes=2 * _get_data().nbytes)
+    cache.put('a', _get_data())
+    cache.put('b', _get_data())
+    cache.get('a')
+    cache.put('c', _get_data())
+
+    assert 'a' in cache and 'c' in cache and 'b' not in cache
+    assert cache.stats()['evictions'] == 1
+
+
+def test_dataset_cache_shared_by_datasets(logger, grid_file):
+    from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+
+    file_name, _ = grid_file
+    set_dataset_cache(clear=True)
+
+    def get_dataset():
+        return DataLocal(path=str(file_name.parent), file_name=file_name.name, file_format='netcdf',
+                         file_type='grid_3d', file_io='input', time_signature=None, time_direction=None,
+                         variable_template={'vars_data': {'t2m': 'air_temperature'}},
+                         message=False, logger=logger)
+
+    time = pd.Timestamp('2025-01-01 02:00')
+    data_a, data_b = get_dataset().get_data(time=time), get_dataset().get_data(time=time)
+
+    assert get_dataset_cache().stats()['hits'] == 1
+    assert np.array_equal(data_a.values, data_b.values)
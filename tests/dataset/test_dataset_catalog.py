@@ -0,0 +1,101 @@
+import os
+import shutil
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+from shybox.dataset_toolkit.dataset_handler_catalog import FileCatalog
+
+
+def _write_files(folder, times):
+    for time in times:
+        file_name = folder / time.strftime('%Y/%m') / time.strftime('rain_%Y%m%d%H%M.txt')
+        file_name.parent.mkdir(parents=True, exist_ok=True)
+        file_name.write_text('0\n')
+
+
+def _touch_folder(folder):
+    # move the folder mtime forward (the mtime resolution of the file system may be coarse)
+    stat = os.stat(folder)
+    os.utime(folder, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class _TimeRange:
+    # time range with the interface used by the datasets (start, end and contains)
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+
+    def contains(self, time):
+        return self.start <= time <= self.end
+
+
+@pytest.fixture
+def archive(tmp_path):
+    folder = tmp_path / 'archive'
+    _write_files(folder, pd.date_range('2025-01-31 22:00', periods=4, freq='h'))
+    (folder / '2025' / '01' / 'readme.md').write_text('not a data file\n')
+    return folder, str(folder / '%Y' / '%m' / 'rain_%Y%m%d%H%M.txt')
+
+
+def test_catalog_query_by_time_range(tmp_path, archive):
+    folder, pattern = archive
+    catalog = FileCatalog(str(tmp_path / 'catalog.db'))
+    catalog.refresh(str(folder), pattern)
+
+    entries = catalog.query(str(folder), pattern)
+    # the files not matching the pattern are not returned
+    assert [time for _, time, _ in entries] == list(pd.date_range('2025-01-31 22:00', periods=4, freq='h'))
+    assert all(path.endswith(time.strftime('rain_%Y%m%d%H%M.txt')) for path, time, _ in entries)
+
+    entries = catalog.query(str(folder), pattern, time_start=dt.datetime(2025, 1, 31, 23),
+                            time_end=dt.datetime(2025, 2, 1, 0))
+    assert [time.hour for _, time, _ in entries] == [23, 0]
+    assert catalog.query(str(folder / '2025' / '02'), pattern)[0][1] == dt.datetime(2025, 2, 1, 0)
+
+
+def test_catalog_refresh_is_incremental(tmp_path, archive):
+    folder, pattern = archive
+    catalog = FileCatalog(str(tmp_path / 'catalog.db'))
+    catalog.refresh(str(folder), pattern)
+    n_parsed = catalog.n_parsed
+
+    # unchanged folders are not listed again
+    catalog.refresh(str(folder), pattern)
+    assert catalog.n_parsed == n_parsed
+
+    # only the changed folder is parsed again
+    _write_files(folder, [pd.Timestamp('2025-02-01 02:00')])
+    _touch_folder(folder / '2025' / '02')
+    catalog.refresh(str(folder), pattern)
+    assert catalog.n_parsed == n_parsed + 3
+    assert len(catalog.query(str(folder), pattern)) == 5
+
+    # the removed folders are dropped
+    shutil.rmtree(folder / '2025' / '01')
+    _touch_folder(folder / '2025')
+    catalog.refresh(str(folder), pattern)
+    assert [time.day for _, time, _ in catalog.query(str(folder), pattern)] == [1, 1, 1]
+
+    # the catalog is persistent (a new handle reads the stored entries)
+    catalog_new = FileCatalog(str(tmp_path / 'catalog.db'))
+    catalog_new.refresh(str(folder), pattern)
+    assert catalog_new.n_parsed == 0
+    assert len(catalog_new.query(str(folder), pattern)) == 3
+
+
+def test_available_keys_with_catalog(logger, tmp_path, archive):
+    from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+
+    folder, _ = archive
+
+    def get_dataset(file_catalog):
+        return DataLocal(path=str(folder / '%Y' / '%m'), file_name='rain_%Y%m%d%H%M.txt', file_format='ascii',
+                         file_type='grid_2d', file_io='input', time_signature=None, time_direction=None,
+                         file_catalog=file_catalog, message=False, logger=logger)
+
+    time = _TimeRange(dt.datetime(2025, 1, 31, 23), dt.datetime(2025, 2, 1, 1))
+    keys = get_dataset(None).get_available_keys(time)
+    keys_catalog = get_dataset(str(tmp_path / 'catalog.db')).get_available_keys(time)
+    assert sorted(keys_catalog) == sorted(keys)
+    assert len(keys) == 3
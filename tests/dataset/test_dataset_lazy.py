@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from shybox.dataset_toolkit.dataset_handler_cache import is_lazy_data, get_data_nbytes, set_dataset_cache
+from shybox.dataset_toolkit.lib_dataset_generic import read_from_file, reset_nan, set_type
+
+pytest.importorskip('dask')
+
+
+def _get_dataset(logger, file_name, chunks=None):
+    from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+
+    return DataLocal(path=str(file_name.parent), file_name=file_name.name, file_format='netcdf',
+                     file_type='grid_3d', file_io='input', time_signature=None, time_direction=None,
+                     variable_template={'vars_data': {'t2m': 'air_temperature'}},
+                     chunks=chunks, message=False, logger=logger)
+
+
+def test_read_from_file_lazy_mode(grid_file):
+    file_name, dset = grid_file
+
+    data = read_from_file(str(file_name), file_format='netcdf', chunks={'time': 1})
+    assert is_lazy_data(data)
+    assert data.chunks[0] == (1,) * 6
+    # dask-backed variables are not counted as held in memory
+    assert get_data_nbytes(data) < dset['t2m'].nbytes
+
+    assert not is_lazy_data(read_from_file(str(file_name), file_format='netcdf'))
+
+
+def test_lazy_normalization_matches_eager(grid_file):
+    _, dset = grid_file
+    data = dset['t2m'].copy()
+    data[0, 0, 0] = -9999.0
+    data.attrs['_FillValue'] = -9999.0
+
+    data_lazy = set_type(data.chunk({'time': 1}), nan_value=np.nan)
+    assert is_lazy_data(data_lazy)
+    assert data_lazy.dtype == np.float32
+    assert np.isnan(data_lazy.values[0, 0, 0])
+
+    data_eager = reset_nan(data.copy(), nan_value=np.nan)
+    np.testing.assert_allclose(data_lazy.values, data_eager.values, rtol=1e-6)
+
+
+def test_get_data_loads_only_the_selected_step(logger, grid_file):
+    file_name, _ = grid_file
+    time = pd.Timestamp('2025-01-01 02:00')
+
+    set_dataset_cache(clear=True)
+    data_eager = _get_dataset(logger, file_name).get_data(time=time)
+    set_dataset_cache(clear=True)
+    data_lazy = _get_dataset(logger, file_name, chunks={'time': 1}).get_data(time=time)
+
+    assert not is_lazy_data(data_lazy)
+    assert data_lazy.shape == data_eager.shape
+    np.testing.assert_allclose(data_lazy.values, data_eager.values, rtol=1e-6)
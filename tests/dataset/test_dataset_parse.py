@@ -0,0 +1,65 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+
+from shybox.dataset_toolkit.lib_dataset_parse import (
+    PathTemplate, get_path_template, substitute_string, extract_date_and_tags)
+
+PATTERN = '/data/{domain}/%Y/%m/%d/rain_{domain}_%Y%m%d%H%M_{member:02d}.nc'
+
+
+def test_path_template_segments():
+    template = PathTemplate(PATTERN)
+    assert template.tags == ['domain', 'domain', 'member']
+    assert template.literal == '/data//%Y/%m/%d/rain__%Y%m%d%H%M_.nc'
+    assert template.has_time
+    assert not PathTemplate('/data/{domain}/grid.txt').has_time
+
+    # the templates are compiled once by pattern
+    assert get_path_template(PATTERN) is get_path_template(PATTERN)
+
+
+def test_path_template_substitute():
+    template = get_path_template(PATTERN)
+
+    # missing tags are kept, formatted tags use the format
+    assert template.substitute({'domain': 'italy'}) == \
+        '/data/italy/%Y/%m/%d/rain_italy_%Y%m%d%H%M_{member:02d}.nc'
+    assert template.substitute({'domain': 'italy', 'member': 3}).endswith('_03.nc')
+
+    # list values generate a list of strings (as substitute_string)
+    keys = template.substitute({'domain': ['italy', 'alps'], 'member': 1})
+    assert keys == ['/data/italy/%Y/%m/%d/rain_italy_%Y%m%d%H%M_01.nc',
+                    '/data/alps/%Y/%m/%d/rain_alps_%Y%m%d%H%M_01.nc']
+    assert substitute_string('/{a}/{b:%Y%m}', {'a': 'x', 'b': dt.datetime(2025, 3, 1)}) == '/x/202503'
+    assert substitute_string('/{b:%Y%m}', {'b': '2025-03-01'}) == '/202503'
+
+
+def test_path_template_keys_match_the_single_key():
+    template = get_path_template(PATTERN)
+    times = pd.date_range('2025-02-28 22:00', periods=4, freq='h')
+    tags = {'domain': 'italy', 'member': 1}
+
+    keys = template.get_keys(times, tags)
+    assert keys == [template.get_key(time.to_pydatetime(), tags) for time in times]
+    assert keys[-1] == '/data/italy/2025/03/01/rain_italy_202503010100_01.nc'
+
+    assert get_path_template('/data/{domain}/grid.txt').get_keys(times, tags) == ['/data/italy/grid.txt'] * 4
+
+
+def test_path_template_parse():
+    template = get_path_template(PATTERN)
+    key = template.get_key(dt.datetime(2025, 3, 1, 1, 30), {'domain': 'italy', 'member': 1})
+
+    date, tags = template.parse(key)
+    assert date == dt.datetime(2025, 3, 1, 1, 30)
+    # formatted tags are matched but not captured
+    assert tags == {'domain': 'italy'}
+    assert extract_date_and_tags(key, PATTERN) == (date, tags)
+
+    # the date parts not in the pattern take the default values
+    assert extract_date_and_tags('/data/2025/grid.txt', '/data/%Y/grid.txt')[0] == dt.datetime(2025, 1, 1)
+
+    with pytest.raises(ValueError):
+        template.parse('/data/italy/2025/03/01/other.nc')
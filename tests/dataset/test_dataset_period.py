@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shybox.dataset_toolkit.dataset_handler_cache import set_dataset_cache
+
+
+def _get_dataset(logger, folder, file_name, time_signature):
+    from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+    return DataLocal(path=str(folder), file_name=file_name, file_format='netcdf',
+                     file_type='grid_3d', file_io='input', time_signature=time_signature, time_direction=None,
+                     variable_template={'vars_data': {'t2m': 'air_temperature'}},
+                     message=False, logger=logger)
+
+
+@pytest.mark.parametrize('time_signature', ['period', 'step', 'current', 'constant', 'start', 'end', 'unique', None])
+def test_get_data_by_period(logger, grid_file, time_signature):
+    file_name, dset = grid_file
+    set_dataset_cache(clear=True)
+
+    # by_period mode passes the whole DatetimeIndex to the datasets
+    period = pd.date_range('2025-01-01 01:00', periods=3, freq='h')
+    data = _get_dataset(logger, file_name.parent, file_name.name, time_signature).get_data(time=period)
+
+    assert list(pd.DatetimeIndex(data['time'].values)) == list(period)
+    # the datasets are normalized with descending latitudes
+    expected = dset['t2m'].sel(time=period).sortby('latitude', ascending=False)
+    np.testing.assert_allclose(data.values, expected.values, rtol=1e-6)
+
+
+@pytest.mark.parametrize('time_signature', ['step', 'current'])
+def test_get_data_by_period_with_file_per_step(logger, grid_file, time_signature):
+    file_name, _ = grid_file
+    period = pd.date_range('2025-01-01 01:00', periods=3, freq='h')
+
+    dataset = _get_dataset(logger, file_name.parent, 'grid_%Y%m%d%H%M.nc', time_signature)
+    with pytest.raises(ValueError, match='more than one file'):
+        dataset.get_key(time=period)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from shybox.dataset_toolkit import lib_dataset_plan
+from shybox.dataset_toolkit.lib_dataset_plan import normalize_data, clear_normalize_plan, NormalizePlan
+
+TEMPLATE = {'dims_geo': {'lat': 'latitude', 'lon': 'longitude'},
+            'coords_geo': {'lat': 'latitude', 'lon': 'longitude'},
+            'vars_data': {'t2m': 'air_temperature'}}
+
+
+def _get_data(seed=0, name='t2m'):
+    # (time, lat, lon) grid with ascending latitudes (flipped by the normalization)
+    values = np.random.default_rng(seed).random((2, 4, 5)).astype(np.float32)
+    return xr.DataArray(values, dims=('time', 'lat', 'lon'), name=name,
+                        coords={'time': pd.date_range('2025-01-01', periods=2, freq='h'),
+                                'lat': np.linspace(43, 44, 4), 'lon': np.linspace(10, 11, 5)})
+
+
+@pytest.fixture(autouse=True)
+def plans():
+    clear_normalize_plan()
+    yield
+    clear_normalize_plan()
+
+
+def test_plan_reproduces_the_chain():
+    data, step_name = normalize_data(_get_data(0), TEMPLATE)
+    assert step_name == 'flat_dims'
+    assert data.name == 'air_temperature' and data.dims == ('time', 'latitude', 'longitude')
+    assert data['latitude'].values[0] == 44.0
+    assert isinstance(list(lib_dataset_plan._PLAN_CACHE.values())[0], NormalizePlan)
+
+    # the next files with the same signature use the plan (a view of the input buffer)
+    data_in = _get_data(1)
+    data, step_name = normalize_data(data_in, TEMPLATE)
+    data_chain, _ = normalize_data(_get_data(1), TEMPLATE, use_plan=False)
+    assert step_name == 'flat_dims'
+    assert data.identical(data_chain)
+    assert np.shares_memory(data.values, data_in.values)
+
+
+def test_plan_of_datasets_and_dropped_variables():
+    dset = xr.Dataset({'t2m': _get_data(0), 'other': _get_data(1, name='other')})
+    for _ in range(2):
+        data, step_name = normalize_data(dset, TEMPLATE)
+        # the variables not defined in the template are dropped (as in the chain)
+        assert list(data.data_vars) == ['air_temperature']
+        assert data.identical(normalize_data(dset, TEMPLATE, use_plan=False)[0])
+
+    for _ in range(2):
+        assert normalize_data(_get_data(0, name='other'), TEMPLATE) == (None, 'map_vars')
+
+
+def test_lazy_data_and_disabled_plans_use_the_chain():
+    pytest.importorskip('dask')
+
+    data, _ = normalize_data(_get_data(0).chunk({'time': 1}), TEMPLATE)
+    assert data.chunks is not None
+    normalize_data(_get_data(0), TEMPLATE, use_plan=False)
+    assert len(lib_dataset_plan._PLAN_CACHE) == 0
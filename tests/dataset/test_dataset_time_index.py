@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from shybox.dataset_toolkit import dataset_handler_cache
+from shybox.dataset_toolkit.dataset_handler_cache import TimeIndex, get_time_index, _drop_time_index
+from shybox.dataset_toolkit.lib_dataset_generic import select_by_time, select_by_time_bulk
+
+
+def _get_data(times):
+    times = pd.DatetimeIndex(times)
+    return xr.DataArray(np.arange(times.size * 2, dtype=np.float32).reshape(times.size, 2, 1),
+                        dims=('time', 'y', 'x'), coords={'time': times}, name='var')
+
+
+def test_time_index_pad_and_nearest():
+    time_index = TimeIndex(pd.date_range('2025-01-01 00:00', periods=3, freq='h'))
+    when = pd.to_datetime(['2025-01-01 00:40', '2025-01-01 01:00', '2025-01-01 00:30', '2024-12-31 23:50'])
+
+    assert list(time_index.locate(when, tolerance=pd.Timedelta('1h'))) == [0, 1, 0, -1]
+    # ties resolve to the previous step
+    assert list(time_index.locate(when, tolerance=pd.Timedelta('1h'), method='nearest')) == [1, 1, 0, 0]
+    assert list(time_index.locate(when, tolerance=pd.Timedelta('20min'))) == [-1, 1, -1, -1]
+
+    assert time_index.locate_one('2025-01-01 05:00', tolerance=pd.Timedelta('1h')) is None
+    with pytest.raises(NotImplementedError):
+        time_index.locate(when, method='backfill')
+
+
+def test_time_index_unsorted_and_duplicated_times():
+    times = pd.to_datetime(['2025-01-01 02:00', '2025-01-01 00:00', '2025-01-01 01:00', '2025-01-01 00:00'])
+    time_index = TimeIndex(times)
+    assert not time_index.is_sorted
+
+    # positions in the original order (first occurrence of the duplicated times)
+    when = pd.to_datetime(['2025-01-01 00:10', '2025-01-01 01:00', '2025-01-01 02:30'])
+    assert list(time_index.locate(when, tolerance=pd.Timedelta('1h'))) == [1, 2, 0]
+
+
+def test_time_index_is_shared_by_the_views():
+    data = _get_data(pd.date_range('2025-01-01', periods=4, freq='h'))
+    time_index = get_time_index(data)
+
+    assert get_time_index(data.copy(deep=False)) is time_index
+    assert get_time_index(data.isel(y=0)) is time_index
+    assert get_time_index(data.isel(time=0)) is None
+
+    # the entries are dropped also while the lock is held by the same thread (garbage collection)
+    with dataset_handler_cache._TIME_INDEX_LOCK:
+        _drop_time_index(id(data.indexes['time']))
+
+
+@pytest.mark.parametrize('times', [
+    pd.date_range('2025-01-01', periods=4, freq='h'),
+    pd.to_datetime(['2025-01-01 03:00', '2025-01-01 00:00', '2025-01-01 02:00', '2025-01-01 01:00'])])
+def test_select_by_time_single_and_period(times):
+    data = _get_data(times)
+
+    data_step = select_by_time(data, pd.Timestamp('2025-01-01 02:30'), tolerance='1H')
+    assert data_step['time'].values == np.datetime64('2025-01-01T02:00')
+    data_step = select_by_time(data, pd.Timestamp('2025-01-01 02:40'), tolerance='1H', active=True)
+    assert data_step['time'].values == np.datetime64('2025-01-01T03:00')
+    assert select_by_time(data, pd.Timestamp('2025-01-01 05:00'), tolerance='1H') is None
+    assert select_by_time(data, None) is data
+
+    # the matched steps of a period are kept in time order (without duplicates)
+    when = pd.to_datetime(['2025-01-01 02:00', '2025-01-01 01:00', '2025-01-01 01:10', '2025-01-01 09:00'])
+    data_period = select_by_time(data, when, tolerance='1H')
+    assert list(data_period['time'].values) == list(pd.to_datetime(['2025-01-01 01:00', '2025-01-01 02:00']))
+
+
+def test_select_by_time_bulk():
+    data = _get_data(pd.date_range('2025-01-01', periods=4, freq='h'))
+    when = pd.to_datetime(['2025-01-01 01:30', '2025-01-01 01:45', '2025-01-01 09:00'])
+
+    data_bulk = select_by_time_bulk(data, when, tolerance='1H')
+    # one step for each matched requested time, labelled by the requested time
+    assert list(data_bulk['time'].values) == list(when[:2])
+    assert list(data_bulk['time_source'].values) == [np.datetime64('2025-01-01T01:00')] * 2
+    np.testing.assert_array_equal(data_bulk.values, data.values[[1, 1]])
+
+    assert select_by_time_bulk(data, pd.to_datetime(['2024-12-31 12:00']), tolerance='1H') is None
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pytest
+
+from shybox.io_toolkit.lib_io_ascii_grid import read_grid_ascii, get_grid_darray
+
+
+def _write_grid(path, values, nodata='-9999', corner=('xllcorner', 'yllcorner')):
+    n_rows, n_cols = values.shape
+    header = (f'ncols {n_cols}\nnrows {n_rows}\n{corner[0]} 10.0\n{corner[1]} 43.0\n'
+              f'cellsize 0.5\nNODATA_value {nodata}\n')
+    body = '\n'.join(' '.join(str(value) for value in row) for row in values)
+    path.write_text(header + body + '\n')
+    return str(path)
+
+
+def test_read_integer_and_float_grids(tmp_path):
+    values_int = np.arange(12).reshape(3, 4)
+    header, values = read_grid_ascii(_write_grid(tmp_path / 'int.txt', values_int))
+    assert header['ncols'] == '4' and header['nrows'] == '3' and header['nodata_value'] == '-9999'
+    assert values.dtype == np.int32
+    np.testing.assert_array_equal(values, values_int)
+
+    values_float = np.arange(12).reshape(3, 4) * 0.25
+    _, values = read_grid_ascii(_write_grid(tmp_path / 'float.txt', values_float))
+    assert values.dtype == np.float32
+    np.testing.assert_allclose(values, values_float)
+
+
+def test_read_grid_with_wrong_size_fails(tmp_path):
+    file_name = _write_grid(tmp_path / 'grid.txt', np.ones((3, 4), dtype=int))
+    with open(file_name, 'a') as file_handle:
+        file_handle.write('1 1\n')
+    with pytest.raises(ValueError):
+        read_grid_ascii(file_name)
+
+
+def test_grid_cache_is_opt_in(tmp_path):
+    file_name = _write_grid(tmp_path / 'grid.txt', np.ones((3, 4), dtype=int))
+
+    read_grid_ascii(file_name)
+    assert not os.path.exists(file_name + '.npy')
+
+    _, values = read_grid_ascii(file_name, grid_cache=True)
+    assert os.path.exists(file_name + '.npy')
+
+    # the sidecar is used while it has the mtime of the grid file
+    np.save(file_name + '.npy', values * 2)
+    os.utime(file_name + '.npy', ns=(os.stat(file_name).st_atime_ns, os.stat(file_name).st_mtime_ns))
+    _, values_cache = read_grid_ascii(file_name, grid_cache=True)
+    np.testing.assert_array_equal(values_cache, values * 2)
+
+    # the grid file is parsed again when it changes
+    _write_grid(tmp_path / 'grid.txt', np.zeros((3, 4), dtype=int))
+    os.utime(file_name, ns=(0, os.stat(file_name).st_mtime_ns + 10 ** 9))
+    _, values_new = read_grid_ascii(file_name, grid_cache=True)
+    np.testing.assert_array_equal(values_new, np.zeros((3, 4)))
+
+
+@pytest.mark.parametrize('corner, x_first, y_first', [
+    (('xllcorner', 'yllcorner'), 10.25, 44.25), (('xllcenter', 'yllcenter'), 10.0, 44.0)])
+def test_grid_darray_at_cell_centers(tmp_path, corner, x_first, y_first):
+    values_grid = np.arange(12, dtype=float).reshape(3, 4) + 0.5
+    header, values = read_grid_ascii(_write_grid(tmp_path / 'grid.asc', values_grid, corner=corner))
+    da = get_grid_darray(header, values)
+
+    # cell centers from the upper left corner (as the rioxarray reader)
+    np.testing.assert_allclose(da['x'].values, x_first + np.arange(4) * 0.5)
+    np.testing.assert_allclose(da['y'].values, y_first - np.arange(3) * 0.5)
+    np.testing.assert_allclose(da.values, values_grid)
+    assert da.dims == ('y', 'x')
+    assert da.attrs['_FillValue'] == -9999.0
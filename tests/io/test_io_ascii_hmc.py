@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shybox.io_toolkit.lib_io_ascii_hmc import read_sections_data, read_sections_registry
+
+
+def _write_sections_data(path):
+    path.write_text(
+        '202501010000 1.5 2.0 -9999.0\n'
+        '202501010100 1.6 NaN 3\n'
+        '202501010200 1.7 2.2 abc\n')
+    return str(path)
+
+
+def test_read_sections_data_matches_python_parser(tmp_path):
+    file_name = _write_sections_data(tmp_path / 'hydrograph.txt')
+    data = read_sections_data(file_name)
+
+    raw = pd.read_csv(file_name, sep=r'\s+', header=None, engine='python', dtype={0: str})
+    expected = raw.iloc[:, 1:].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+
+    np.testing.assert_array_equal(data.to_numpy(), expected)
+    assert list(data.columns) == ['sec_01', 'sec_02', 'sec_03']
+    assert list(data.index) == list(pd.date_range('2025-01-01', periods=3, freq='h'))
+    assert data.index.name == 'time' and data.name == 'discharge'
+    assert np.isnan(data.iloc[2, 2])
+
+
+def test_read_sections_data_cache(tmp_path):
+    file_name = _write_sections_data(tmp_path / 'hydrograph.txt')
+
+    read_sections_data(file_name)
+    assert not os.path.exists(file_name + '.npz')
+
+    data = read_sections_data(file_name, cache=True, column_names=['a', 'b', 'c'])
+    assert os.path.exists(file_name + '.npz')
+
+    # the cached table is reloaded while the txt file is unchanged
+    data_cache = read_sections_data(file_name, cache=True, column_names=['a', 'b', 'c'])
+    pd.testing.assert_frame_equal(data_cache, data)
+
+    # the txt file is parsed again when it changes
+    with open(file_name, 'a') as file_handle:
+        file_handle.write('202501010300 1.8 2.3 4.0\n')
+    os.utime(file_name, ns=(0, os.stat(file_name).st_mtime_ns + 10 ** 9))
+    assert len(read_sections_data(file_name, cache=True)) == 4
+
+
+def _write_registry(path):
+    path.write_text(
+        '# registry of the sections\n'
+        '10 20 Arno Firenze\n'
+        '\n'
+        '11 21 Arno  Ponte  a Signa\n'
+        '; comment\n'
+        '12 22 Tevere\n'
+        'x1 23 Tevere Roma\n')
+    return str(path)
+
+
+def test_read_sections_registry(tmp_path):
+    df = read_sections_registry(_write_registry(tmp_path / 'sections.txt'))
+
+    # comments, blank, short and non-integer lines are skipped
+    assert list(df['X']) == [10, 11]
+    assert list(df['Y']) == [20, 21]
+    assert df['X'].dtype == np.int64
+    assert list(df['section_name']) == ['Firenze', 'Ponte']
+    assert pd.isna(df['extra'].iloc[0]) and df['extra'].iloc[1] == 'a Signa'
+    assert list(df['tag']) == ['arno:firenze', 'arno:ponte_a_signa']
+    assert df.name == 'sections_hmc'
+
+
+def test_read_sections_registry_names_and_schema(tmp_path):
+    df = read_sections_registry(
+        _write_registry(tmp_path / 'sections.txt'), colnames={0: 'i', 1: 'j'},
+        schema={'i': 'float64'}, out_col='key', out_first=True)
+
+    assert list(df.columns) == ['key', 'i', 'j', 'catchment_name', 'section_name', 'extra']
+    assert df['i'].dtype == np.float64
+    assert df['j'].dtype == np.int64
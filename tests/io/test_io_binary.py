@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from shybox.io_toolkit.lib_io_binary import read_data_binary
+from shybox.dataset_toolkit.lib_dataset_generic import read_from_file
+
+GEO_X, GEO_Y = np.linspace(10, 11, 5), np.linspace(44, 43, 4)
+
+
+def _write_binary(path, n_steps):
+    # (rows, cols, time) cube stored in fortran order as integers (scale factor 10)
+    values = np.arange(4 * 5 * n_steps, dtype=np.int32).reshape(4, 5, n_steps)
+    values.ravel(order='F').tofile(path)
+    return str(path), values / 10.0
+
+
+def test_read_binary_all_and_selected_steps(tmp_path):
+    file_name, values = _write_binary(tmp_path / 'grid.bin', 3)
+    time = pd.Timestamp('2025-01-01 02:00')
+
+    da = read_data_binary(file_name, GEO_X, GEO_Y, var_time=time, var_time_steps_expected=3)
+    assert da.dims == ('south_north', 'west_east', 'time')
+    assert da.dtype == np.float32
+    np.testing.assert_allclose(da.values, values, rtol=1e-6)
+    assert da['time'].values[-1] == np.datetime64(time)
+
+    da = read_data_binary(file_name, GEO_X, GEO_Y, var_time=time, var_time_steps_expected=3, var_time_index=(1, 3))
+    np.testing.assert_allclose(da.values, values[:, :, 1:3], rtol=1e-6)
+    assert list(da['time'].values) == list(pd.date_range(end=time, freq='h', periods=3)[1:3].values)
+
+
+def test_read_binary_checks_the_file_steps(tmp_path):
+    file_name, _ = _write_binary(tmp_path / 'grid.bin', 3)
+
+    # the expected steps are checked on the whole file (also for partial reads)
+    with pytest.raises(NotImplementedError):
+        read_data_binary(file_name, GEO_X, GEO_Y, var_time=pd.Timestamp('2025-01-01'),
+                         var_time_steps_expected=2, var_time_index=0)
+
+    # the file must hold whole frames
+    with open(file_name, 'ab') as file_handle:
+        file_handle.write(b'\x00' * 4)
+    with pytest.raises(ValueError):
+        read_data_binary(file_name, GEO_X, GEO_Y, var_time=pd.Timestamp('2025-01-01'), var_time_steps_expected=3)
+
+
+def test_read_binary_single_step_is_repeated(tmp_path):
+    file_name, values = _write_binary(tmp_path / 'grid.bin', 1)
+
+    da = read_data_binary(file_name, GEO_X, GEO_Y, var_time=pd.Timestamp('2025-01-01 02:00'),
+                          var_time_steps_expected=3)
+    assert da.shape == (4, 5, 3)
+    for step in range(3):
+        np.testing.assert_allclose(da.values[:, :, step], values[:, :, 0], rtol=1e-6)
+
+
+def test_read_from_file_binary_format(tmp_path):
+    file_name, values = _write_binary(tmp_path / 'grid.bin', 2)
+    file_geo = xr.DataArray(np.zeros((4, 5)), dims=('latitude', 'longitude'),
+                            coords={'latitude': GEO_Y, 'longitude': GEO_X})
+
+    da = read_from_file(file_name, file_variable=['rain'], file_geo=file_geo)
+    assert da.name == 'rain'
+    assert da.dims == ('time', 'latitude', 'longitude')
+    assert list(da['time'].values) == [0, 1]
+    np.testing.assert_allclose(da.values, values.transpose(2, 0, 1), rtol=1e-6)
+    np.testing.assert_allclose(da['longitude'].values, GEO_X)
+
+    with pytest.raises(ValueError):
+        read_from_file(file_name, file_format='binary')
+
+
+def test_read_from_file_binary_time_range(tmp_path):
+    file_name, values = _write_binary(tmp_path / 'grid.bin', 4)
+    file_geo = xr.DataArray(np.zeros((4, 5)), dims=('latitude', 'longitude'),
+                            coords={'latitude': GEO_Y, 'longitude': GEO_X})
+
+    da = read_from_file(file_name, file_variable=['rain'], file_geo=file_geo, file_time_index=(1, 3))
+    assert list(da['time'].values) == [1, 2]
+    np.testing.assert_allclose(da.values, values[:, :, 1:3].transpose(2, 0, 1), rtol=1e-6)
+
+
+def test_binary_cache_key_depends_on_the_reference(tmp_path):
+    from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+
+    file_name, _ = _write_binary(tmp_path / 'grid.bin', 2)
+    file_ascii = tmp_path / 'geo.txt'
+    file_ascii.write_text('ncols 5\nnrows 4\nxllcorner 10.0\nyllcorner 43.0\ncellsize 0.25\nNODATA_value -9999\n' +
+                          '\n'.join(['1 1 1 1 1'] * 4) + '\n')
+
+    def get_key(file_geo, file_time_index=None):
+        dataset = DataLocal(path=str(tmp_path), file_name='grid.bin', file_format='binary', file_type='grid_3d',
+                            file_io='input', time_signature=None, time_direction=None, file_geo=file_geo,
+                            file_time_index=file_time_index, message=False)
+        return dataset.get_cache_key(file_name)
+
+    geo_a = xr.DataArray(np.zeros((4, 5)), dims=('latitude', 'longitude'),
+                         coords={'latitude': GEO_Y, 'longitude': GEO_X})
+    geo_b = geo_a.assign_coords(longitude=GEO_X + 1.0)
+
+    # same grid values and coordinates give the same key, other coordinates another key
+    assert get_key(geo_a) == get_key(geo_a.copy(deep=True))
+    assert get_key(geo_a) != get_key(geo_b)
+    assert get_key(geo_a) != get_key(geo_a, file_time_index=slice(0, 1))
+    hash(get_key(geo_a, file_time_index=slice(0, 1)))
+
+    # ascii references are identified by path and signature
+    key_ascii = get_key(str(file_ascii))
+    assert key_ascii != get_key(geo_a)
+    os.utime(file_ascii, ns=(0, os.stat(file_ascii).st_mtime_ns + 10 ** 9))
+    assert get_key(str(file_ascii)) != key_ascii
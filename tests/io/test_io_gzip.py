@@ -0,0 +1,68 @@
+import gzip
+import shutil
+
+import numpy as np
+import xarray as xr
+
+from shybox.io_toolkit.lib_io_gzip import open_compressed_dataset
+from shybox.dataset_toolkit.lib_dataset_generic import read_from_file
+
+
+def _write_compressed(tmp_path):
+    dset = xr.Dataset({'t2m': (('latitude', 'longitude'), np.arange(12, dtype='float32').reshape(3, 4))},
+                      coords={'latitude': [43.0, 43.5, 44.0], 'longitude': [10.0, 10.5, 11.0, 11.5]})
+    file_name = tmp_path / 'grid.nc'
+    dset.to_netcdf(file_name)
+    with open(file_name, 'rb') as f_in, gzip.open(str(file_name) + '.gz', 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    file_name.unlink()
+    return str(file_name) + '.gz', dset
+
+
+def test_open_compressed_in_memory(tmp_path):
+    file_name, dset = _write_compressed(tmp_path)
+    data = open_compressed_dataset(file_name)
+    np.testing.assert_array_equal(data['t2m'].values, dset['t2m'].values)
+    # no decompressed copy left on disk
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['grid.nc.gz']
+
+
+def test_open_compressed_with_cache(tmp_path):
+    file_name, dset = _write_compressed(tmp_path)
+    cache_folder = tmp_path / 'cache'
+    first = open_compressed_dataset(file_name, cache_folder=str(cache_folder))
+    cached = list(cache_folder.iterdir())
+    second = open_compressed_dataset(file_name, cache_folder=str(cache_folder))
+    assert len(cached) == 1 and list(cache_folder.iterdir()) == cached
+    np.testing.assert_array_equal(first['t2m'].values, second['t2m'].values)
+
+
+def test_read_from_file_compressed(tmp_path):
+    file_name, dset = _write_compressed(tmp_path)
+    data = read_from_file(file_name, file_format='netcdf')
+    assert isinstance(data, xr.DataArray)
+    np.testing.assert_array_equal(data.values, dset['t2m'].values)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['grid.nc.gz']
+
+
+def test_compress_queue(tmp_path):
+    from shybox.io_toolkit.lib_io_gzip import (compress_and_remove, submit_compress_and_remove,
+                                               wait_compression, set_compression_workers)
+    payload = np.random.default_rng(0).bytes(1024 ** 2)
+    file_list = []
+    for i in range(4):
+        file_name = tmp_path / f'file_{i}.nc'
+        file_name.write_bytes(payload)
+        file_list.append(str(file_name))
+
+    set_compression_workers(2)
+    for file_name in file_list[:3]:
+        submit_compress_and_remove(file_name)
+    done = wait_compression()
+    assert sorted(done) == sorted(f + '.gz' for f in file_list[:3])
+
+    compress_and_remove(file_list[3], compress_backend='gzip')
+    for file_name in file_list:
+        with gzip.open(file_name + '.gz', 'rb') as f_in:
+            assert f_in.read() == payload
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == ['.gz'] * 4
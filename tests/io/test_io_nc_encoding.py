@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from netCDF4 import Dataset
+
+from shybox.io_toolkit.lib_io_nc_encoding import get_nc_profile, get_nc_var_options, get_nc_encoding
+from shybox.io_toolkit.lib_io_nc_hmc import write_dataset_hmc
+from shybox.io_toolkit.lib_io_nc_s3m import write_dataset_s3m
+
+
+def _get_dataset(dim_x='west_east', dim_y='south_north'):
+    rng = np.random.default_rng(0)
+    dset = xr.Dataset(
+        {'rain': (('time', dim_y, dim_x), rng.random((3, 4, 6)) * 1e-3),
+         'air_temperature': (('time', dim_y, dim_x), rng.random((3, 4, 6)) * 30),
+         'mask': (('time', dim_y, dim_x), np.ones((3, 4, 6), dtype=np.int32))},
+        coords={'time': pd.date_range('2025-01-01', periods=3, freq='h'),
+                'latitude': (dim_y, np.linspace(44, 43, 4)), 'longitude': (dim_x, np.linspace(10, 11, 6))})
+    return dset
+
+
+def test_quantization_is_opt_in_and_by_variable():
+    # the named profiles do not quantize
+    assert 'least_significant_digit' not in get_nc_var_options(get_nc_profile('small-size'))
+
+    nc_encoding = {'profile': 'small-size', 'least_significant_digit': {'air_temperature': 2}}
+    encoding = get_nc_encoding(_get_dataset(), nc_encoding)
+    assert encoding['air_temperature']['least_significant_digit'] == 2
+    assert 'least_significant_digit' not in encoding['rain']
+    assert 'least_significant_digit' not in encoding['mask']
+
+    encoding = get_nc_encoding(_get_dataset(), {'profile': 'small-size', 'least_significant_digit': 1})
+    assert encoding['rain']['least_significant_digit'] == 1
+    assert 'least_significant_digit' not in encoding['mask']
+
+
+def test_small_fields_are_kept_by_the_small_size_profile(tmp_path):
+    dset = _get_dataset()
+    file_name = str(tmp_path / 'hmc.nc')
+    write_dataset_hmc(file_name, dset[['rain']], time=dset['time'].to_index(), file_compression=False,
+                      nc_encoding='small-size')
+
+    with Dataset(file_name) as handle:
+        values = handle.variables['rain'][:]
+    assert np.count_nonzero(values) == values.size
+    np.testing.assert_allclose(values[0], dset['rain'].values[0, ::-1, :], rtol=1e-6)
+
+
+def test_hmc_writer_quantizes_only_float_formats(tmp_path):
+    dset = _get_dataset()
+    file_name = str(tmp_path / 'hmc.nc')
+    nc_encoding = {'profile': 'small-size', 'least_significant_digit': 1}
+    write_dataset_hmc(file_name, dset[['mask']], time=dset['time'].to_index(), file_compression=False,
+                      type_data='i4', nc_encoding=nc_encoding)
+    with Dataset(file_name) as handle:
+        assert handle.variables['mask'].dtype == np.int32
+        assert 'least_significant_digit' not in handle.variables['mask'].ncattrs()
+        np.testing.assert_array_equal(handle.variables['mask'][:], 1)
+
+    write_dataset_hmc(file_name, dset[['air_temperature']], time=dset['time'].to_index(), file_compression=False,
+                      nc_encoding=nc_encoding)
+    with Dataset(file_name) as handle:
+        assert handle.variables['air_temperature'].least_significant_digit == 1
+
+
+def test_s3m_writer_without_profile_keeps_the_default_chunks(tmp_path):
+    dset = _get_dataset(dim_x='X', dim_y='Y')[['air_temperature']].isel(time=0, drop=True)
+    file_name = str(tmp_path / 's3m.nc')
+    write_dataset_s3m(file_name, dset, time=pd.Timestamp('2025-01-01'), file_compression=False,
+                      var_x='longitude', var_y='latitude')
+
+    # reference: variable created by the netcdf library with the same compression settings
+    file_ref = str(tmp_path / 'ref.nc')
+    with Dataset(file_ref, 'w') as handle:
+        handle.createDimension('Y', 4)
+        handle.createDimension('X', 6)
+        var_ref = handle.createVariable(
+            'air_temperature', 'f4', ('Y', 'X'), zlib=True, complevel=5, fill_value=-9999.0)
+        chunks_ref = var_ref.chunking()
+
+    with Dataset(file_name) as handle:
+        assert handle.variables['air_temperature'].chunking() == chunks_ref
+
+    write_dataset_s3m(file_name, dset, time=pd.Timestamp('2025-01-01'), file_compression=False,
+                      var_x='longitude', var_y='latitude', nc_encoding={'profile': 'fast-write', 'chunks': {'Y': 2}})
+    with Dataset(file_name) as handle:
+        assert handle.variables['air_temperature'].chunking() == [2, 6]
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from netCDF4 import Dataset
+
+from shybox.io_toolkit.lib_io_nc_hmc import write_dataset_hmc
+
+
+def _get_dataset(chunks=None):
+    rng = np.random.default_rng(0)
+    times = pd.date_range('2025-01-01', periods=5, freq='h')
+    lat, lon = np.linspace(44, 43, 4), np.linspace(10, 11, 6)
+    rain = rng.random((5, 4, 6))
+    rain[1, 2, 3] = np.nan
+    dset = xr.Dataset(
+        {'rain': (('time', 'south_north', 'west_east'), rain),
+         'terrain': (('south_north', 'west_east'), rng.random((4, 6)) * 100)},
+        coords={'time': times, 'latitude': ('south_north', lat), 'longitude': ('west_east', lon)})
+    return dset.chunk(chunks) if chunks is not None else dset
+
+
+def _hmc_orientation(values):
+    # orientation of the original writer (step by step)
+    return np.transpose(np.rot90(values, -1))
+
+
+@pytest.mark.parametrize('chunks', [None, {'time': 2}])
+def test_write_dataset_hmc_orientation_and_fill_value(tmp_path, chunks):
+    dset = _get_dataset(chunks)
+    file_name = str(tmp_path / 'hmc.nc')
+    write_dataset_hmc(file_name, dset, time=pd.Timestamp('2025-01-01 04:00'), file_compression=False, chunk_time=2)
+
+    rain, terrain = dset['rain'].values, dset['terrain'].values
+    with Dataset(file_name) as handle:
+        var_rain = handle.variables['rain']
+        assert var_rain.dtype == np.float32
+        assert var_rain.chunking() == [2, 4, 6]
+        values = var_rain[:].filled(np.nan)
+        for step in range(5):
+            expected = _hmc_orientation(rain[step]).astype(np.float32)
+            np.testing.assert_allclose(np.where(np.isnan(expected), -9999.0, expected),
+                                       np.where(np.isnan(values[step]), -9999.0, values[step]))
+        assert np.ma.is_masked(var_rain[1][1, 3])
+
+        np.testing.assert_allclose(handle.variables['terrain'][:], _hmc_orientation(terrain), rtol=1e-6)
+        np.testing.assert_allclose(
+            handle.variables['latitude'][:], _hmc_orientation(np.meshgrid(dset['longitude'], dset['latitude'])[1]))
+        # the time steps are taken from the data (multi-step cube)
+        assert handle.variables['time'].time_start == '202501010000'
+        assert handle.variables['time'].time_end == '202501010400'
+        assert handle.variables['time'].shape == (5,)
+
+
+def test_write_dataset_hmc_output_type(tmp_path):
+    dset = _get_dataset()
+    file_name = str(tmp_path / 'hmc.nc')
+    write_dataset_hmc(file_name, dset, time=dset['time'].to_index(), file_compression=False,
+                      type_data='f8', chunk_time=10)
+
+    with Dataset(file_name) as handle:
+        var_rain = handle.variables['rain']
+        assert var_rain.dtype == np.float64
+        # the time chunk is limited to the number of steps
+        assert var_rain.chunking() == [5, 4, 6]
+        np.testing.assert_allclose(var_rain[0], _hmc_orientation(dset['rain'].values[0]))
+
+
+def test_write_dataset_hmc_single_step(tmp_path):
+    dset = _get_dataset().isel(time=[2])
+    file_name = str(tmp_path / 'hmc.nc')
+    write_dataset_hmc(file_name, dset, time=pd.Timestamp('2025-01-01 02:00'), file_compression=False)
+
+    with Dataset(file_name) as handle:
+        assert handle.variables['time'].time_start == '202501010200'
+        np.testing.assert_allclose(handle.variables['rain'][0], _hmc_orientation(dset['rain'].values[0]), rtol=1e-6)
@@ -0,0 +1,35 @@
+import logging
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from shybox.logging_toolkit.lib_logging_utils import with_logger
+
+
+@with_logger(var_name='logger_stream')
+def _log_step(step_id, barrier):
+    barrier.wait()
+    logger_stream.debug(f'step {step_id}')
+    return step_id
+
+
+def test_with_logger_is_thread_safe():
+    # before the contextvar injection, the first call to return popped the logger of the other threads
+    workers = 8
+    barrier = threading.Barrier(workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda step_id: _log_step(step_id, barrier), range(workers * 20)))
+    assert results == list(range(workers * 20))
+
+
+def test_with_logger_keeps_module_fallback():
+    fallback = logging.getLogger('fallback')
+    globals()['logger_fallback'] = fallback
+
+    @with_logger(var_name='logger_fallback')
+    def _get_fallback():
+        return logger_fallback._get_logger()
+
+    assert _get_fallback() is not fallback
+    # outside the decorated calls the module logger is used again
+    assert logger_fallback._get_logger() is fallback
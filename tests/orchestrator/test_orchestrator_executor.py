@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+
+import pytest
+
+from shybox.orchestrator_toolkit.lib_orchestrator_executor import (
+    StepOrder, run_steps, run_graph, sort_graph, STEP_EXECUTOR_TYPES)
+
+
+@pytest.mark.parametrize('executor', ['serial', 'thread', 'process'])
+def test_run_steps_reports_in_order(executor):
+    def _step(step_obj, step_id):
+        if step_obj == 'fail':
+            raise ValueError('step failed')
+
+    steps = ['a', 'b', 'fail', 'c']
+    reports = run_steps(_step, steps, executor=executor, workers=2, stop_on_error=False)
+
+    assert [report['step'] for report in reports] == steps
+    assert [report['status'] for report in reports] == ['done', 'done', 'failed', 'done']
+    assert 'ValueError: step failed' in reports[2]['error']
+    if executor == 'process':
+        assert all(report['pid'] != os.getpid() for report in reports)
+
+
+def test_serial_steps_stop_on_error():
+    def _step(step_obj, step_id):
+        raise RuntimeError(step_obj)
+
+    reports = run_steps(_step, ['a', 'b'], executor='serial')
+    assert len(reports) == 1 and reports[0]['status'] == 'failed'
+
+
+def test_step_order_releases_writes_in_order():
+    step_order, writes, lock = StepOrder(4), [], threading.Lock()
+
+    def _step(step_obj, step_id):
+        # later steps finish the computation first
+        time.sleep(0.01 * (4 - step_id))
+        step_order.wait_turn(step_id)
+        with lock:
+            writes.append(step_id)
+        step_order.done(step_id)
+
+    run_steps(_step, list(range(4)), executor='thread', workers=4)
+    assert writes == [0, 1, 2, 3]
+
+
+def test_run_graph_respects_dependencies():
+    graph = {'a': [], 'b': ['a'], 'c': [], 'd': ['b', 'c']}
+    done, lock = [], threading.Lock()
+
+    def _node(node):
+        assert all(parent in done for parent in graph[node])
+        with lock:
+            done.append(node)
+        return node.upper()
+
+    assert run_graph(_node, graph, workers=3) == {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'}
+    assert sort_graph(graph) == ['a', 'c', 'b', 'd']
+    with pytest.raises(RuntimeError, match='cycle'):
+        sort_graph({'a': ['b'], 'b': ['a']})
+
+
+def test_time_steps_do_not_run_in_threads():
+    assert 'thread' not in STEP_EXECUTOR_TYPES
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+pytest.importorskip('osgeo')
+pytest.importorskip('rioxarray')
+
+from shybox.orchestrator_toolkit.lib_orchestrator_utils import xarray_to_gdal, gdal_to_xarray
+
+
+def _get_data():
+    values = np.arange(12, dtype=np.float32).reshape(3, 4)
+    data = xr.DataArray(values, dims=('y', 'x'),
+                        coords={'y': [44.25, 43.75, 43.25], 'x': [10.25, 10.75, 11.25, 11.75]}, name='var')
+    return data.rio.write_crs('EPSG:4326').rio.write_nodata(-9999.0)
+
+
+def test_xarray_to_gdal_in_memory():
+    gdal_dataset = xarray_to_gdal(_get_data())
+
+    assert gdal_dataset.GetDriver().ShortName in ('MEM', 'NUMPY')
+    assert gdal_dataset.RasterCount == 1
+    assert gdal_dataset.GetGeoTransform() == pytest.approx((10.0, 0.5, 0.0, 44.5, 0.0, -0.5))
+    assert gdal_dataset.GetRasterBand(1).GetNoDataValue() == -9999.0
+    np.testing.assert_array_equal(gdal_dataset.GetRasterBand(1).ReadAsArray(), _get_data().values)
+
+
+def test_gdal_to_xarray_round_trip():
+    data = _get_data()
+    data_back = gdal_to_xarray(xarray_to_gdal(data))
+
+    assert data_back.dims == ('band', 'y', 'x')
+    np.testing.assert_array_equal(data_back.values[0], data.values)
+    np.testing.assert_allclose(data_back['x'].values, data['x'].values)
+    np.testing.assert_allclose(data_back['y'].values, data['y'].values)
+    assert data_back.attrs['_FillValue'] == -9999.0
+    assert data_back.rio.crs.to_epsg() == 4326
+
+
+def test_dataset_bands_and_lists():
+    data = _get_data()
+    gdal_dataset = xarray_to_gdal(xr.Dataset({'a': data, 'b': data + 1}))
+    assert gdal_dataset.RasterCount == 2
+
+    data_list = gdal_to_xarray(xarray_to_gdal([data, data * 2]))
+    assert isinstance(data_list, list) and len(data_list) == 2
+    np.testing.assert_array_equal(data_list[1].values[0], data.values * 2)
@@ -0,0 +1,75 @@
+import logging
+import time
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('osgeo')
+
+from shybox.dataset_toolkit.dataset_handler_mem import DataMem
+from shybox.orchestrator_toolkit.orchestrator_handler_base import OrchestratorBase, get_process_graph
+
+
+def _proc(in_obj, out_obj, in_deps=None, dump_state=False):
+    return SimpleNamespace(in_obj=in_obj, out_obj=out_obj, in_deps=in_deps, dump_state=dump_state)
+
+
+def _get_orchestrator(calls):
+    orchestrator = OrchestratorBase.__new__(OrchestratorBase)
+    orchestrator.logger = logging.getLogger('test')
+
+    def _run_chain(proc_var, proc_list, time_step, proc_ws, proc_memory=None, proc_start=0,
+                   proc_return=None, step_id=None, **kwargs):
+        if proc_start == 0 and proc_var == 'rain':
+            # the producer is slower than the consumer
+            time.sleep(0.05)
+        calls.append((proc_var, proc_start, sorted(proc_ws)))
+        if proc_start == 0:
+            proc_ws[proc_var] = proc_var
+        return None, [proc_var]
+
+    orchestrator._run_chain = _run_chain
+    return orchestrator
+
+
+def test_graph_links_producer_outputs_to_consumer_inputs():
+    data_in, rain_out, snow_out = DataMem('in'), DataMem('rain'), DataMem('snow')
+    proc_group = {
+        'snow': [_proc(data_in, snow_out, in_deps={'rain': rain_out})],
+        'rain': [_proc(data_in, rain_out)],
+        'wind': [_proc(data_in, DataMem('wind'))]}
+
+    # the shared input does not link the groups, the output of rain does
+    assert get_process_graph(proc_group) == {'snow': ['rain'], 'rain': [], 'wind': []}
+
+
+def test_cross_chain_dependency_runs_after_producer():
+    data_in, rain_out, data_dump = DataMem('in'), DataMem('rain'), DataMem('dump')
+    proc_group = {
+        'snow': [_proc(data_in, DataMem('snow'), in_deps=[rain_out])],
+        'rain': [_proc(data_in, rain_out), _proc(rain_out, data_dump, dump_state=True)]}
+
+    calls = []
+    assert _get_orchestrator(calls)._run_processes_parallel(proc_group, None, workers=2)
+
+    # the consumer chain sees the result of the producer in the shared workspace
+    assert calls[0] == ('rain', 0, [])
+    assert calls[1] == ('snow', 0, ['rain'])
+    # the dump runs at the end with the collections of both the chains
+    assert calls[2] == ('rain', 1, ['rain', 'snow'])
+
+
+def test_chains_run_serially_on_cycles_or_dumped_inputs():
+    rain_out, snow_out, data_dump = DataMem('rain'), DataMem('snow'), DataMem('dump')
+    proc_cycle = {
+        'snow': [_proc(rain_out, snow_out)],
+        'rain': [_proc(snow_out, rain_out)]}
+    proc_dump = {
+        'snow': [_proc(data_dump, snow_out)],
+        'rain': [_proc(DataMem('in'), rain_out), _proc(rain_out, data_dump, dump_state=True)]}
+
+    calls = []
+    assert not _get_orchestrator(calls)._run_processes_parallel(proc_cycle, None, workers=2)
+    assert not _get_orchestrator(calls)._run_processes_parallel(proc_dump, None, workers=2)
+    assert calls == []
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+pytest.importorskip('osgeo')
+
+from shybox.dataset_toolkit.dataset_handler_cache import MemoryCache
+from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+from shybox.logging_toolkit.logging_handler import LoggingManager
+from shybox.orchestrator_toolkit.lib_orchestrator_process import ProcessorContainer
+from shybox.orchestrator_toolkit.lib_orchestrator_utils import as_process
+
+
+def _get_frozen_data():
+    cache = MemoryCache()
+    cache.put(xr.DataArray(np.zeros((3, 4), dtype=np.float32), dims=('y', 'x'), name='var'))
+    return cache.get()
+
+
+def test_process_writing_in_place_gets_private_copy():
+    calls = []
+
+    @as_process(input_type='xarray', output_type='xarray', writes_inplace=True)
+    def fill_data(data, **kwargs):
+        calls.append(1)
+        data.values[:] = 1.0
+        return data
+
+    data = _get_frozen_data()
+    result = fill_data(data)
+
+    assert len(calls) == 1
+    assert float(result.values.sum()) == 12.0
+    assert float(data.values.sum()) == 0.0
+    assert fill_data.writes_inplace
+
+
+def test_process_not_declared_in_place_is_not_retried():
+    calls = []
+
+    @as_process(input_type='xarray', output_type='xarray')
+    def fill_data(data, **kwargs):
+        calls.append(1)
+        data.values[:] = 1.0
+        return data
+
+    with pytest.raises(ValueError):
+        fill_data(_get_frozen_data())
+    assert len(calls) == 1
+
+
+class _DataOut:
+    def __init__(self):
+        self.written = []
+
+    def get_attribute(self, name):
+        return None
+
+    def write_data(self, data, time, **kwargs):
+        self.written.append((time, data))
+
+
+def test_process_by_period_writes_one_step_at_a_time(tmp_path):
+    LoggingManager.setup(logger_folder=str(tmp_path), logger_file='test.log', handlers=['file'],
+                         force_reconfigure=True)
+    logger = LoggingManager(name='test', set_as_current=True)
+
+    times = pd.date_range('2025-01-01', periods=3, freq='h')
+    values = np.arange(3 * 4 * 5, dtype=np.float32).reshape(3, 4, 5)
+    coords = {'time': times, 'latitude': np.linspace(44, 43, 4), 'longitude': np.linspace(10, 11, 5)}
+    xr.Dataset({'t2m': (('time', 'latitude', 'longitude'), values)}, coords=coords).to_netcdf(tmp_path / 't2m.nc')
+    ref = xr.DataArray(np.ones((4, 5)), dims=('latitude', 'longitude'),
+                       coords={'latitude': coords['latitude'], 'longitude': coords['longitude']})
+
+    @as_process(input_type='xarray', output_type='xarray')
+    def add_one(data, **kwargs):
+        return data + 1.0
+
+    data_in = DataLocal(
+        path=str(tmp_path), file_name='t2m.nc', file_format='netcdf', file_type='grid_3d', file_io='input',
+        file_variable='t2m', file_workflow='air_temperature', time_signature=None, time_direction=None,
+        variable_template={'vars_data': {'t2m': 'air_temperature'}}, message=False, logger=logger)
+    data_out = _DataOut()
+    process = ProcessorContainer(
+        function=add_one, in_obj=data_in, out_obj=data_out,
+        args={'ref': ref, 'tag': 't2m', 'workflow': 'air_temperature'}, logger=logger)
+
+    process.run(times, id=0, reference='t2m:air_temperature')
+
+    # one write for each step of the period (per-step output files)
+    assert [time for time, _ in data_out.written] == list(times)
+    for step, (_, data) in enumerate(data_out.written):
+        assert 'time' not in data.dims
+        np.testing.assert_allclose(data.values, values[step] + 1.0)
@@ -0,0 +1,102 @@
+import csv
+import json
+import logging
+import os
+
+from contextlib import nullcontext
+
+import pytest
+
+from shybox.orchestrator_toolkit.lib_orchestrator_profiler import ProcessProfiler, PROFILE_FIELDS
+
+
+def _run_profiler():
+    profiler = ProcessProfiler(active=True)
+    for time_step in ['2025-01-01 00:00', '2025-01-01 01:00']:
+        with profiler.measure('interpolate_data', 'rain', time_step, phase='compute'):
+            sum(range(10000))
+        with profiler.measure('interpolate_data', 'rain', time_step, phase='read'):
+            pass
+    return profiler
+
+
+def test_inactive_profiler_records_nothing():
+    profiler = ProcessProfiler(active=False)
+    assert isinstance(profiler.measure('fx'), nullcontext)
+    with profiler.measure('fx'):
+        pass
+    assert profiler.records == []
+
+
+def test_profiler_summary_by_process_and_phase():
+    profiler = _run_profiler()
+    assert len(profiler.records) == 4
+
+    summary = profiler.summary()
+    assert {(row['process'], row['phase']): row['calls'] for row in summary} == {
+        ('interpolate_data', 'compute'): 2, ('interpolate_data', 'read'): 2}
+    assert all(row['wall_s'] >= 0 for row in summary)
+    assert len(profiler.summary(group_by=('variable',), phase='read')) == 1
+
+    rows = profiler.log_summary(logging.getLogger('test'))
+    assert rows == profiler.summary()
+
+
+def test_profiler_export(tmp_path):
+    profiler = _run_profiler()
+
+    file_json = profiler.export(str(tmp_path / 'profile' / 'profile.json'))
+    with open(file_json) as file_handle:
+        assert len(json.load(file_handle)['records']) == 4
+
+    file_csv = profiler.export(str(tmp_path / 'profile.csv'))
+    with open(file_csv, newline='') as file_handle:
+        reader = csv.DictReader(file_handle)
+        assert reader.fieldnames == PROFILE_FIELDS
+        assert len(list(reader)) == 4
+
+    with pytest.raises(NotImplementedError):
+        profiler.export(str(tmp_path / 'profile.txt'))
+
+
+def test_profile_of_the_process_executor_steps(tmp_path):
+    pytest.importorskip('osgeo')
+
+    import pandas as pd
+
+    from shybox.dataset_toolkit.dataset_handler_cache import get_dataset_cache
+    from shybox.logging_toolkit.logging_handler import LoggingManager
+    from shybox.orchestrator_toolkit.orchestrator_handler_base import OrchestratorBase
+
+    class _Orchestrator(OrchestratorBase):
+        # time step working in the forked worker (profile records and dataset cache counters of the worker)
+        def run_single_ts(self, time, step_id=None, clean=True, **kwargs):
+            with self.profiler.measure('fx', 'rain', time, phase='compute'):
+                sum(range(1000))
+            get_dataset_cache().hits += 1
+
+    orchestrator = OrchestratorBase.__new__(_Orchestrator)
+    LoggingManager.setup(logger_folder=str(tmp_path), logger_file='test.log', handlers=['file'],
+                         force_reconfigure=True)
+    orchestrator.logger = LoggingManager(name='test', set_as_current=True)
+    orchestrator.options = {'profile': True, 'profile_file': str(tmp_path / 'profile.csv')}
+    orchestrator.processes, orchestrator.memory_active = [], True
+    orchestrator.tmp_dir = str(tmp_path / 'tmp')
+    orchestrator.step_stats = {}
+    orchestrator.profiler = ProcessProfiler(active=True)
+
+    hits = get_dataset_cache().hits
+    time_steps = pd.date_range('2025-01-01', periods=3, freq='h')
+    reports = orchestrator.run_parallel_ts(time_steps, executor='process', workers=2)
+
+    # the records of the workers are merged in the parent (in time order)
+    assert all(report['pid'] != os.getpid() for report in reports)
+    assert [record['time'] for record in orchestrator.profiler.records] == [str(time) for time in time_steps]
+    assert orchestrator.log_profile()[0]['calls'] == 3
+    with open(tmp_path / 'profile.csv', newline='') as file_handle:
+        assert len(list(csv.DictReader(file_handle))) == 3
+
+    # the dataset cache counters of the workers are added to the ones of the parent
+    assert get_dataset_cache().hits == hits
+    assert orchestrator.step_stats['hits'] == 3
+    assert orchestrator.log_memory_stats()['hits'] == hits + 3
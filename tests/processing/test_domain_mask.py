@@ -0,0 +1,68 @@
+import gc
+import threading
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from shybox.processing_toolkit import lib_proc_domain_mask
+from shybox.processing_toolkit.lib_proc_domain_mask import DomainMask, get_domain_mask, compute_nodata
+
+
+def _get_ref():
+    values = np.full((4, 5), 100.0)
+    values[0, :2] = -9999.0
+    values[3, 4] = -9999.0
+    return xr.DataArray(values, dims=('latitude', 'longitude'))
+
+
+def test_domain_mask_apply_compress_expand(tmp_path):
+    ref = _get_ref()
+    mask = DomainMask(ref.values != -9999.0)
+    assert mask.n_valid == 17 and mask.bbox == (0, 4, 0, 5)
+
+    data = np.arange(40, dtype=np.float32).reshape(2, 4, 5)
+    values = mask.compress(data)
+    assert values.shape == (2, 17)
+    expanded = mask.expand(values)
+    np.testing.assert_array_equal(expanded, mask.apply(data.copy()))
+    assert np.isnan(expanded[:, 0, :2]).all() and np.isnan(expanded[:, 3, 4]).all()
+
+    mask.save(str(tmp_path / 'mask.npz'))
+    np.testing.assert_array_equal(DomainMask.load(str(tmp_path / 'mask.npz')).valid, mask.valid)
+
+    with pytest.raises(ValueError):
+        mask.compress(np.zeros((3, 3)))
+
+
+def test_compute_nodata_modes():
+    ref = np.array([[1.0, np.nan], [-9999.0, 2.0]])
+    np.testing.assert_array_equal(compute_nodata(ref, -9999.0, 'lazy'), [[False, False], [True, False]])
+    np.testing.assert_array_equal(compute_nodata(ref, -9999.0, 'union'), [[False, True], [True, False]])
+    np.testing.assert_array_equal(compute_nodata(ref, -1.0, 'lazy'), [[False, True], [False, False]])
+    with pytest.raises(RuntimeError):
+        compute_nodata(ref, -1.0, 'strict')
+
+
+def test_domain_mask_cached_by_reference():
+    ref = _get_ref()
+    mask = get_domain_mask(ref, ref_value=-9999.0)
+    assert get_domain_mask(ref, ref_value=-9999.0) is mask
+    assert get_domain_mask(ref, ref_value=-9999.0, mask_mode='union') is not mask
+
+    ref_id = id(ref)
+    del ref
+    gc.collect()
+    assert ref_id not in lib_proc_domain_mask._MASK_CACHE
+
+
+def test_domain_mask_callback_while_locked():
+    # the weakref callback may run (garbage collection) while the cache lock is held by the same thread
+    def _drop_locked():
+        with lib_proc_domain_mask._MASK_LOCK:
+            lib_proc_domain_mask._drop_domain_mask(0)
+
+    worker = threading.Thread(target=_drop_locked, daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
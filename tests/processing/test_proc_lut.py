@@ -0,0 +1,51 @@
+import numpy as np
+
+from shybox.processing_toolkit.lib_proc_lut import get_lut, compile_lut
+
+LUT_CF = {
+    'CF_L1': {'Rain': [0, 1], 'CloudFactor': [0.95]},
+    'CF_L2': {'Rain': [1, 3], 'CloudFactor': [0.75]},
+    'CF_L3': {'Rain': [3, 5], 'CloudFactor': [0.65]},
+    'CF_L4': {'Rain': [5, 10], 'CloudFactor': [0.50]},
+    'CF_L5': {'Rain': [10, None], 'CloudFactor': [0.15]}
+}
+
+
+def _apply_masks(data, lookup_table, var_in='Rain', var_out='CloudFactor'):
+    # reference: one mask per range, later entries win, nan restored
+    out = np.zeros(data.shape, dtype=np.float32)
+    for lu_value in lookup_table.values():
+        lu_min, lu_max = lu_value[var_in]
+        if lu_min is not None and lu_max is not None:
+            mask = (data >= lu_min) & (data < lu_max)
+        elif lu_min is not None:
+            mask = data >= lu_min
+        else:
+            mask = data <= lu_max
+        out[mask] = lu_value[var_out][0]
+    out[np.isnan(data)] = np.nan
+    return out
+
+
+def test_lut_matches_range_masks():
+    data = np.random.default_rng(0).uniform(-2, 15, (4, 20, 30)).astype(np.float32)
+    data[:, ::7, ::5] = np.array([0, 1, 3, 5, 10], dtype=np.float32)[:, None, None][:4]
+    data[0, 0, :3] = [np.nan, -1.0, 10.0]
+
+    lut = get_lut(LUT_CF, 'Rain', 'CloudFactor')
+    np.testing.assert_array_equal(lut.apply(data), _apply_masks(data, LUT_CF))
+
+
+def test_lut_overlapping_and_open_ranges():
+    lookup_table = {'a': {'x': [None, 2], 'y': [1.0]}, 'b': {'x': [1, 4], 'y': [2.0]}, 'c': {'x': [3, None], 'y': [3.0]}}
+    data = np.array([[-5.0, 1.0, 2.0, 2.5, 3.0, 4.0, 9.0]], dtype=np.float32)
+    lut = compile_lut(lookup_table, 'x', 'y')
+    np.testing.assert_array_equal(lut.apply(data), _apply_masks(data, lookup_table, 'x', 'y'))
+
+
+def test_lut_is_cached_and_fills_output_buffer():
+    assert get_lut(LUT_CF, 'Rain', 'CloudFactor') is get_lut(dict(LUT_CF), 'Rain', 'CloudFactor')
+    data = np.array([[0.5, 20.0]], dtype=np.float32)
+    out = np.empty(data.shape, dtype=np.float32)
+    assert get_lut(LUT_CF, 'Rain', 'CloudFactor').apply(data, out=out) is out
+    np.testing.assert_allclose(out, [[0.95, 0.15]])
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+pytest.importorskip('osgeo')
+
+from shybox.processing_toolkit.lib_proc_compute_meteo import compute_data_meteo
+
+
+def _get_data():
+    rng = np.random.default_rng(0)
+    dims, shape = ('time', 'latitude', 'longitude'), (3, 5, 6)
+    coords = {'time': pd.date_range('2025-01-01', periods=3, freq='h'),
+              'latitude': np.linspace(44, 43, 5), 'longitude': np.linspace(10, 11, 6)}
+    t = xr.DataArray(rng.uniform(265, 305, shape), dims=dims, coords=coords, attrs={'units': 'K'})
+    td = t - rng.uniform(0, 10, shape)
+    td.attrs['units'] = 'K'
+    u = xr.DataArray(rng.normal(0, 5, shape), dims=dims, coords=coords)
+    v = xr.DataArray(rng.normal(0, 5, shape), dims=dims, coords=coords)
+    ref = xr.DataArray(np.full(shape[1:], 100.0), dims=dims[1:],
+                       coords={'latitude': coords['latitude'], 'longitude': coords['longitude']})
+    ref[0, :2] = -9999.0
+    return {'t': t, 'td': td, 'u': u, 'v': v}, ref
+
+
+def _run(engine):
+    data, ref = _get_data()
+    return compute_data_meteo(data=data, ref=ref, ref_value=-9999.0, engine=engine)
+
+
+def test_meteo_numpy_matches_formulas():
+    data, _ = _get_data()
+    dset = _run('numpy')
+
+    t_c, td_c = data['t'].values - 273.15, data['td'].values - 273.15
+    rh = np.clip(100 * np.exp(17.67 * td_c / (td_c + 243.5) - 17.67 * t_c / (t_c + 243.5)), 0, 100)
+    ws = np.hypot(data['u'].values, data['v'].values)
+
+    valid = np.ones((5, 6), dtype=bool)
+    valid[0, :2] = False
+    np.testing.assert_allclose(dset['air_temperature'].values[:, valid], t_c[:, valid], rtol=1e-5, atol=1e-4)
+    np.testing.assert_allclose(dset['relative_humidity'].values[:, valid], rh[:, valid], rtol=1e-4, atol=1e-3)
+    np.testing.assert_allclose(dset['wind_speed'].values[:, valid], ws[:, valid], rtol=1e-5, atol=1e-5)
+    assert np.isnan(dset['relative_humidity'].values[:, ~valid]).all()
+    assert dset['air_temperature'].attrs['units'] == 'C'
+
+
+def test_meteo_numba_matches_numpy():
+    pytest.importorskip('numba')
+    dset_numpy, dset_numba = _run('numpy'), _run('numba')
+    for var_name in ['air_temperature', 'relative_humidity', 'wind_speed']:
+        np.testing.assert_allclose(dset_numba[var_name].values, dset_numpy[var_name].values, rtol=1e-5, atol=1e-4)
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('osgeo')
+
+from shybox.processing_toolkit.lib_proc_compute_radiation import (
+    define_parameters, exec_astronomic_radiation, exec_astronomic_radiation_batch, get_astronomic_grid)
+
+
+def test_batch_radiation_matches_single_steps():
+    geo_x, geo_y = np.meshgrid(np.linspace(8, 10, 6), np.linspace(45, 44, 5))
+    geo_z = np.linspace(0, 1500, 30).reshape(5, 6)
+    time = pd.date_range('2025-06-20 00:00', periods=30, freq='h')
+
+    data_cf = np.random.default_rng(0).uniform(0.1, 1.0, (time.size, 5, 6)).astype(np.float32)
+    data_cf[3, 0, 0] = np.nan
+
+    grid_terms = get_astronomic_grid(geo_x, geo_y, geo_z)
+    assert get_astronomic_grid(geo_x, geo_y, geo_z) is grid_terms
+    batch_ar, batch_k = exec_astronomic_radiation_batch(data_cf, time, grid_terms, time_chunk=7)
+    assert batch_ar.shape == data_cf.shape and batch_ar.dtype == np.float32
+
+    geo_lz, geo_lm, geo_phi, param_gsc, param_as, param_bs = define_parameters(geo_x, geo_y)
+    for step_id, time_step in enumerate(time):
+        step_ar, step_k = exec_astronomic_radiation(
+            data_cf[step_id], time_step, geo_lz, geo_lm, geo_phi, param_gsc, param_as, param_bs, geo_z=geo_z)
+        np.testing.assert_allclose(batch_ar[step_id], step_ar, rtol=1e-4, atol=1e-3)
+        np.testing.assert_allclose(batch_k[step_id], step_k, rtol=1e-4, atol=1e-3)
+
+    assert np.isnan(batch_ar[3, 0, 0]) and np.isnan(batch_k[3, 0, 0])
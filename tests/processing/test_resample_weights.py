@@ -0,0 +1,35 @@
+import numpy as np
+
+from shybox.processing_toolkit.lib_proc_resample_weights import get_weights, clear_weights, ResampleWeights
+
+
+def _grids():
+    src_x, src_y = np.linspace(10, 11, 11), np.linspace(43, 44, 11)
+    dst_x, dst_y = src_x[::2], src_y[::2]
+    return src_x, src_y, dst_x, dst_y
+
+
+def test_nearest_weights_pick_source_cells():
+    clear_weights()
+    src_x, src_y, dst_x, dst_y = _grids()
+    data = np.random.default_rng(0).random((3, 11, 11))
+    weights = get_weights(src_x, src_y, dst_x, dst_y, method='nn', max_distance=20000)
+    values = weights.apply(data)
+    assert values.shape == (3, 6, 6)
+    np.testing.assert_allclose(values, data[:, ::2, ::2])
+
+
+def test_weights_cached_in_memory_and_on_disk(tmp_path):
+    clear_weights()
+    src_x, src_y, dst_x, dst_y = _grids()
+    first = get_weights(src_x, src_y, dst_x, dst_y, method='idw', cache_folder=str(tmp_path))
+    assert get_weights(src_x, src_y, dst_x, dst_y, method='idw', cache_folder=str(tmp_path)) is first
+
+    weights_file = list(tmp_path.glob('weights_*.npz'))
+    assert len(weights_file) == 1
+    clear_weights()
+    loaded = get_weights(src_x, src_y, dst_x, dst_y, method='idw', cache_folder=str(tmp_path))
+    assert loaded is not first
+    np.testing.assert_array_equal(loaded.index, first.index)
+    np.testing.assert_allclose(loaded.weight, ResampleWeights.load(str(weights_file[0])).weight)
+    np.testing.assert_allclose(loaded.weight.sum(axis=1)[loaded.valid], 1.0)
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+pytest.importorskip('osgeo')
+
+from shybox.dataset_toolkit.dataset_handler_local import DataLocal
+from shybox.logging_toolkit.logging_handler import LoggingManager
+from shybox.orchestrator_toolkit.lib_orchestrator_process import ProcessorContainer
+from shybox.orchestrator_toolkit.lib_orchestrator_utils import as_process
+from shybox.processing_toolkit.lib_proc_compute_temperature import convert_temperature_units
+from shybox.processing_toolkit.lib_proc_mask import mask_data_by_limits
+from shybox.processing_toolkit.lib_proc_sparse_grid import SparseGrid, to_grid
+
+
+# processes working on the active cells only (opt in with the sparse input and output types)
+@as_process(input_type='sparse', output_type='sparse')
+def _convert_to_celsius(data, **kwargs):
+    data = data - 273.15
+    data.attrs['units'] = 'C'
+    return data
+
+
+@as_process(input_type='sparse', output_type='sparse')
+def _mask_by_min(data, mask_min=None, mask_no_data=np.nan, **kwargs):
+    return data.copy(data=np.where(data.values >= mask_min, data.values, mask_no_data))
+
+
+class _DataOut:
+    def __init__(self):
+        self.written = []
+
+    def get_attribute(self, name):
+        return None
+
+    def write_data(self, data, time, **kwargs):
+        self.written.append(data)
+
+
+def _get_data():
+    coords = {'latitude': np.linspace(44, 43, 4), 'longitude': np.linspace(10, 11, 5)}
+    da = xr.DataArray(np.linspace(260, 300, 20).reshape(4, 5), dims=('latitude', 'longitude'), coords=coords,
+                      attrs={'units': 'K'}, name='air_temperature')
+    ref = xr.DataArray(np.full((4, 5), 100.0), dims=('latitude', 'longitude'), coords=coords)
+    ref[0, :3] = -9999.0
+    return da, ref
+
+
+def _count_expand(monkeypatch):
+    calls = []
+    to_darray = SparseGrid.to_darray
+
+    def _to_darray(self, *args, **kwargs):
+        calls.append(self.name)
+        return to_darray(self, *args, **kwargs)
+
+    monkeypatch.setattr(SparseGrid, 'to_darray', _to_darray)
+    return calls
+
+
+def test_sparse_processes_chain_without_expanding(monkeypatch):
+    da, ref = _get_data()
+    calls = _count_expand(monkeypatch)
+
+    sg = _convert_to_celsius(da, ref=ref)
+    sg = _mask_by_min(sg, mask_min=0.0, mask_no_data=np.nan, ref=ref)
+
+    # the chain works on the active cells only (no expansion between the processes)
+    assert isinstance(sg, SparseGrid)
+    assert sg.values.shape == (17,)
+    assert calls == []
+
+    # the expansion at the writer rebuilds the full grid (inactive cells to nan)
+    result = to_grid(sg)
+    expected = (da - 273.15).where(da >= 273.15)
+    valid = ref.values != -9999.0
+    np.testing.assert_allclose(result.values[valid], expected.values[valid])
+    assert np.isnan(result.values[~valid]).all()
+    assert result.attrs['units'] == 'C'
+    assert calls == ['air_temperature']
+
+
+def test_grid_process_gets_sparse_input_expanded():
+    da, ref = _get_data()
+
+    @as_process(input_type='xarray', output_type='xarray')
+    def get_data_type(data, **kwargs):
+        assert isinstance(data, xr.DataArray)
+        return data + 1.0
+
+    result = get_data_type(_convert_to_celsius(da, ref=ref), ref=ref)
+    assert isinstance(result, xr.DataArray)
+    assert result.shape == (4, 5)
+    assert np.isnan(result.values[0, :3]).all()
+
+
+@pytest.mark.parametrize('sparse_keep', [True, False])
+def test_processor_expands_sparse_output_only_at_the_writer(tmp_path, sparse_keep):
+    da, ref = _get_data()
+    data_in = DataLocal(
+        path=str(tmp_path), file_name='t2m.nc', file_format='netcdf', file_type='grid_2d', file_io='input',
+        file_variable='t2m', file_workflow='air_temperature',
+        variable_template={'vars_data': {'t2m': 'air_temperature'}}, message=False)
+    data_out = _DataOut()
+
+    process = ProcessorContainer(
+        function=_mask_by_min, in_obj=data_in, out_obj=data_out,
+        args={'ref': ref, 'mask_min': 0.0, 'mask_no_data': np.nan, 'tag': 't2m', 'workflow': 'air_temperature'},
+        logger=LoggingManager(name='test'))
+    process.sparse_keep = sparse_keep
+
+    # the sparse data of the previous process is used as it is (nothing is read from the input)
+    data_sparse = _convert_to_celsius(da, ref=ref)
+    result, _ = process.run(
+        pd.Timestamp('2025-01-01'), id=1, reference='t2m:air_temperature', data_sparse=data_sparse)
+
+    if sparse_keep:
+        assert isinstance(result, SparseGrid)
+        assert result.name == 'air_temperature'
+        assert data_out.written == []
+    else:
+        assert isinstance(result, xr.DataArray)
+        assert len(data_out.written) == 1
+        assert isinstance(data_out.written[0], xr.DataArray)
+        assert data_out.written[0].shape == (4, 5)
+
+
+def test_grid_processes_keep_the_full_grid():
+    da, ref = _get_data()
+
+    # the processes not declared as sparse keep the values outside the reference domain and the data type
+    result = convert_temperature_units(da, ref=ref)
+    assert isinstance(result, xr.DataArray)
+    np.testing.assert_allclose(result.values, da.values - 273.15)
+
+    result = mask_data_by_limits(da, mask_min=270.0, mask_format='integer', ref=ref)
+    assert isinstance(result, xr.DataArray)
+    assert np.issubdtype(result.dtype, np.integer)
+    np.testing.assert_array_equal(result.values, np.where(da.values >= 270.0, da.values, -9999.0).astype(result.dtype))
@@ -4,7 +4,8 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any
 import json, os, re
 import io
-import gzip, tempfile
+import gzip
+import threading
 import numpy as np
 
 # -----------------------------------------------------------------------------
@@ -39,6 +40,52 @@ def load_app_config(config_path: str) -> Dict[str, Any]:
         return json.loads(_preprocess_config_text(raw))
 
 
+# -----------------------------------------------------------------------------
+# NetCDF opener (supports .nc.gz with in-memory decompression, no temp files)
+# -----------------------------------------------------------------------------
+# only the last decompressed archive is kept (a single payload in the server process)
+_GZIP_LAST: Dict[str, Any] = {"key": None, "raw": None}
+_GZIP_LOCK = threading.Lock()
+
+
+def _read_gzip_bytes(fp: str, mtime_ns: int, size: int) -> bytes:
+    # cached by (path, mtime, size): repeated requests on the same archive skip gunzip
+    key = (fp, mtime_ns, size)
+    with _GZIP_LOCK:
+        if _GZIP_LAST["key"] == key:
+            return _GZIP_LAST["raw"]
+    with gzip.open(fp, "rb") as f_in:
+        raw = f_in.read()
+    with _GZIP_LOCK:
+        _GZIP_LAST["key"], _GZIP_LAST["raw"] = key, raw
+    return raw
+
+
+def open_netcdf(fp: str, **kwargs):
+    import xarray as xr
+
+    if fp.lower().endswith(".gz"):
+        import netCDF4
+
+        st = os.stat(fp)
+        raw = _read_gzip_bytes(fp, st.st_mtime_ns, st.st_size)
+        nc = netCDF4.Dataset(os.path.basename(fp), mode="r", memory=raw)
+        try:
+            ds = xr.open_dataset(xr.backends.NetCDF4DataStore(nc), **kwargs)
+        except Exception:
+            nc.close()
+            raise
+
+        # the in-memory netCDF4 dataset is closed with the xarray dataset
+        def _close():
+            if nc.isopen():
+                nc.close()
+
+        ds.set_close(_close)
+        return ds
+    return xr.open_dataset(fp, **kwargs)
+
+
 def build_compat_config(cfg: Dict[str, Any]) -> Dict[str, Any]:
     """
     Compatibility layer.
@@ -953,25 +1000,14 @@ def maps_view():
     if fp and os.path.exists(fp):
         if is_netcdf:
             try:
-                import xarray as xr
-                import gzip, tempfile
-
-                if fp.lower().endswith(".gz"):
-                    with gzip.open(fp, "rb") as f_in:
-                        raw = f_in.read()
-                    with tempfile.NamedTemporaryFile(suffix=".nc", delete=True) as tmp:
-                        tmp.write(raw)
-                        tmp.flush()
-                        ds = xr.open_dataset(tmp.name, decode_times=False)
-                else:
-                    ds = xr.open_dataset(fp, decode_times=False)
-
-                # HMC grid georef from attrs (reference = forcing grid itself)
-                x0 = float(ds.attrs["xllcorner"])
-                y0 = float(ds.attrs["yllcorner"])
-                cs = float(ds.attrs["cellsize"])
-                ncols = int(ds.attrs["ncols"])
-                nrows = int(ds.attrs["nrows"])
+                with open_netcdf(fp, decode_times=False) as ds:
+
+                    # HMC grid georef from attrs (reference = forcing grid itself)
+                    x0 = float(ds.attrs["xllcorner"])
+                    y0 = float(ds.attrs["yllcorner"])
+                    cs = float(ds.attrs["cellsize"])
+                    ncols = int(ds.attrs["ncols"])
+                    nrows = int(ds.attrs["nrows"])
 
                 maps_png_extent = [x0, y0, x0 + cs * ncols, y0 + cs * nrows]
 
@@ -1087,35 +1123,27 @@ def maps_tif_png():
 
         # Open NetCDF (support .nc.gz) – same approach as maps_nc_tif
         try:
-            import xarray as xr
-            import gzip, tempfile
-
-            if fp.lower().endswith(".gz"):
-                with gzip.open(fp, "rb") as f_in:
-                    raw = f_in.read()
-                with tempfile.NamedTemporaryFile(suffix=".nc", delete=True) as tmp:
-                    tmp.write(raw)
-                    tmp.flush()
-                    ds = xr.open_dataset(tmp.name, decode_times=False)
-            else:
-                ds = xr.open_dataset(fp, decode_times=False)
+            ds = open_netcdf(fp, decode_times=False)
         except Exception as e:
             abort(500, f"Unable to open NetCDF: {e}")
 
-        alias = {"Precipitation": "Rain", "AirT": "AirTemperature", "WindSpeed": "Wind"}
-        var_name = var if var in ds.data_vars else alias.get(var, var)
-        if var_name not in ds.data_vars:
-            available = ", ".join(sorted(list(ds.data_vars.keys())))
-            abort(404, f"Variable not found in NetCDF: {var}. Available: {available}")
-
-        da = ds[var_name]
-        if "time" in da.dims:
-            try:
-                da = da.isel(time=0)
-            except Exception:
-                pass
+        try:
+            alias = {"Precipitation": "Rain", "AirT": "AirTemperature", "WindSpeed": "Wind"}
+            var_name = var if var in ds.data_vars else alias.get(var, var)
+            if var_name not in ds.data_vars:
+                available = ", ".join(sorted(list(ds.data_vars.keys())))
+                abort(404, f"Variable not found in NetCDF: {var}. Available: {available}")
+
+            da = ds[var_name]
+            if "time" in da.dims:
+                try:
+                    da = da.isel(time=0)
+                except Exception:
+                    pass
 
-        arr = da.values
+            arr = da.values
+        finally:
+            ds.close()
         if arr.ndim != 2:
             abort(500, f"Variable {var} is not 2D (shape={arr.shape})")
 
@@ -1215,79 +1243,72 @@ def maps_nc_tif():
 
     # Open NetCDF (support .nc.gz)
     try:
-        if fp.lower().endswith(".gz"):
-            with gzip.open(fp, "rb") as f_in:
-                raw = f_in.read()
-            with tempfile.NamedTemporaryFile(suffix=".nc", delete=True) as tmp:
-                tmp.write(raw)
-                tmp.flush()
-                import xarray as xr
-                ds = xr.open_dataset(tmp.name, decode_times=False)
-        else:
-            import xarray as xr
-            ds = xr.open_dataset(fp, decode_times=False)
+        ds = open_netcdf(fp, decode_times=False)
     except Exception as e:
         abort(500, f"Unable to open NetCDF: {e}")
 
-    # Simple variable aliases (config may differ from file variable names)
-    alias = {"Precipitation": "Rain", "AirT": "AirTemperature", "WindSpeed": "Wind"}
-    var_name = var if var in ds.data_vars else alias.get(var, var)
-    if var_name not in ds.data_vars:
-        available = ", ".join(sorted(list(ds.data_vars.keys())))
-        abort(404, f"Variable not found in NetCDF: {var}. Available: {available}")
+    try:
+        # Simple variable aliases (config may differ from file variable names)
+        alias = {"Precipitation": "Rain", "AirT": "AirTemperature", "WindSpeed": "Wind"}
+        var_name = var if var in ds.data_vars else alias.get(var, var)
+        if var_name not in ds.data_vars:
+            available = ", ".join(sorted(list(ds.data_vars.keys())))
+            abort(404, f"Variable not found in NetCDF: {var}. Available: {available}")
 
-    da = ds[var_name]
-    # If variable has time, take first timestep
-    if "time" in da.dims:
-        try:
-            da = da.isel(time=0)
-        except Exception:
-            pass
+        da = ds[var_name]
+        # If variable has time, take first timestep
+        if "time" in da.dims:
+            try:
+                da = da.isel(time=0)
+            except Exception:
+                pass
 
-    arr = da.values
-    if arr.ndim != 2:
-        abort(500, f"Variable {var} is not 2D (shape={arr.shape})")
+        arr = da.values
+        if arr.ndim != 2:
+            abort(500, f"Variable {var} is not 2D (shape={arr.shape})")
 
-    # Compute an approximate georeferencing from lon/lat arrays (support many conventions)
-    xmin = ymin = xmax = ymax = None
+        # Compute an approximate georeferencing from lon/lat arrays (support many conventions)
+        xmin = ymin = xmax = ymax = None
 
-    def _pick_var(ds, names):
-        for n in names:
-            if n in ds.variables:
-                return ds[n]
-            if n in ds.coords:
-                return ds.coords[n]
-        return None
+        def _pick_var(ds, names):
+            for n in names:
+                if n in ds.variables:
+                    return ds[n]
+                if n in ds.coords:
+                    return ds.coords[n]
+            return None
 
-    lon_da = _pick_var(ds, ["longitude", "lon", "LONGITUDE", "LON", "x", "X", "XLONG", "nav_lon"])
-    lat_da = _pick_var(ds, ["latitude", "lat", "LATITUDE", "LAT", "y", "Y", "XLAT", "nav_lat"])
-
-    # Fallback: try coords attached to the selected dataarray
-    if lon_da is None:
-        for n in ["longitude", "lon", "x", "XLONG"]:
-            if n in da.coords:
-                lon_da = da.coords[n]
-                break
-    if lat_da is None:
-        for n in ["latitude", "lat", "y", "XLAT"]:
-            if n in da.coords:
-                lat_da = da.coords[n]
-                break
+        lon_da = _pick_var(ds, ["longitude", "lon", "LONGITUDE", "LON", "x", "X", "XLONG", "nav_lon"])
+        lat_da = _pick_var(ds, ["latitude", "lat", "LATITUDE", "LAT", "y", "Y", "XLAT", "nav_lat"])
+
+        # Fallback: try coords attached to the selected dataarray
+        if lon_da is None:
+            for n in ["longitude", "lon", "x", "XLONG"]:
+                if n in da.coords:
+                    lon_da = da.coords[n]
+                    break
+        if lat_da is None:
+            for n in ["latitude", "lat", "y", "XLAT"]:
+                if n in da.coords:
+                    lat_da = da.coords[n]
+                    break
 
-    try:
-        if lon_da is not None and lat_da is not None:
-            lon = lon_da.values
-            lat = lat_da.values
-            xmin = float(lon.min())
-            xmax = float(lon.max())
-            ymin = float(lat.min())
-            ymax = float(lat.max())
-    except Exception:
-        pass
+        try:
+            if lon_da is not None and lat_da is not None:
+                lon = lon_da.values
+                lat = lat_da.values
+                xmin = float(lon.min())
+                xmax = float(lon.max())
+                ymin = float(lat.min())
+                ymax = float(lat.max())
+        except Exception:
+            pass
 
-    if xmin is None or ymin is None or xmax is None or ymax is None:
-        available = ", ".join(sorted(list(ds.variables.keys())))
-        abort(500, f"Missing lon/lat variables or coords. Available variables: {available}")
+        if xmin is None or ymin is None or xmax is None or ymax is None:
+            available = ", ".join(sorted(list(ds.variables.keys())))
+            abort(500, f"Missing lon/lat variables or coords. Available variables: {available}")
+    finally:
+        ds.close()
 
     ny, nx = arr.shape
     xres = (xmax - xmin) / float(nx)
@@ -1463,7 +1484,7 @@ def maps_rivers_geojson():
                 {
                     "type": "Feature",
                     "geometry": {"type": "Point", "coordinates": [lon, lat]},
-                    "properties": {"value": v},
+                    "properties": {"value": float(v)},
                 }
             )
 
@@ -1,62 +1,37 @@
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Optional, Tuple
 
 from utils_config import DEM_FILE, CHOICE_FILE
 
+from shybox.io_toolkit.lib_io_ascii_grid import read_grid_ascii
+
 
 def load_ascii_grid(path: Path):
     """
     Load an ESRI ASCII grid, returning (meta, grid) where:
       meta: {ncols, nrows, xllcorner, yllcorner, cellsize, nodata}
-      grid: list of list of float
+      grid: 2D numpy array (nrows, ncols) of float
+    The values are parsed by the shybox ascii grid reader.
     """
     if not path.exists():
         print("[WARNING] grid file not found:", path)
         return None, None
 
-    with path.open(encoding="utf-8") as f:
-        header: Dict[str, Any] = {}
-        for _ in range(6):
-            line = f.readline()
-            if not line:
-                break
-            parts = line.split()
-            if len(parts) < 2:
-                continue
-            key = parts[0].lower()
-            val = parts[1]
-            if key in ("ncols", "nrows"):
-                header[key] = int(val)
-            elif key in ("xllcorner", "yllcorner", "cellsize", "nodata_value"):
-                header[key] = float(val)
-
-        ncols = header.get("ncols")
-        nrows = header.get("nrows")
-        if not (ncols and nrows):
-            print("[WARNING] invalid grid header in", path)
-            return None, None
-
-        grid: List[List[float]] = []
-        for _row in range(nrows):
-            vals: List[str] = []
-            while len(vals) < ncols:
-                line = f.readline()
-                if not line:
-                    break
-                vals.extend(line.split())
-            if len(vals) == 0:
-                break
-            grid.append([float(v) for v in vals[:ncols]])
-
-        meta = {
-            "ncols": ncols,
-            "nrows": nrows,
-            "xllcorner": header["xllcorner"],
-            "yllcorner": header["yllcorner"],
-            "cellsize": header["cellsize"],
-            "nodata": header.get("nodata_value", -9999.0),
-        }
-        return meta, grid
+    try:
+        header, values = read_grid_ascii(str(path))
+    except (ValueError, KeyError) as exc:
+        print("[WARNING] invalid grid in", path, exc)
+        return None, None
+
+    meta = {
+        "ncols": int(header["ncols"]),
+        "nrows": int(header["nrows"]),
+        "xllcorner": float(header["xllcorner"]),
+        "yllcorner": float(header["yllcorner"]),
+        "cellsize": float(header["cellsize"]),
+        "nodata": float(header.get("nodata_value", -9999.0)),
+    }
+    return meta, values.astype(float)
 
 
 def grid_value_at_lonlat(meta, grid, lon: float, lat: float) -> Optional[float]:
@@ -86,7 +61,7 @@ def grid_value_at_lonlat(meta, grid, lon: float, lat: float) -> Optional[float]:
     if not (0 <= row_from_top < nrows and 0 <= col < ncols):
         return None
 
-    val = grid[row_from_top][col]
+    val = float(grid[row_from_top][col])
     if val == nodata:
         return None
     return val